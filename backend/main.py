@@ -19,9 +19,12 @@ import secrets
 import hashlib
 import hmac
 import asyncio
+import shutil
+import itertools
 from datetime import datetime
-from typing import Optional, List, Dict
-from collections import defaultdict
+from typing import Optional, List, Dict, Tuple, Iterator
+from collections import defaultdict, deque, OrderedDict
+from contextlib import asynccontextmanager
 import time
 
 from fastapi import FastAPI, HTTPException, Depends, Header, Request
@@ -93,7 +96,9 @@ class RateLimiter:
                 del self.requests[key]
         self.last_cleanup = now
 
-    def is_allowed(self, key: str, limit: int, window: int = 60) -> bool:
+    def is_allowed(
+        self, key: str, limit: int, window: int = 60, cost: int = 1
+    ) -> bool:
         self._cleanup()
         now = time.time()
         window_start = now - window
@@ -101,9 +106,9 @@ class RateLimiter:
             (ts, cnt) for ts, cnt in self.requests[key] if ts > window_start
         ]
         total_requests = sum(cnt for _, cnt in recent_requests)
-        if total_requests >= limit:
+        if total_requests + cost > limit:
             return False
-        self.requests[key].append((now, 1))
+        self.requests[key].append((now, cost))
         return True
 
     def get_remaining(self, key: str, limit: int, window: int = 60) -> int:
@@ -121,6 +126,8 @@ rate_limiter = RateLimiter()
 RATE_LIMITS = {
     "generate": {"limit": 10, "window": 60},
     "api_key": {"limit": 20, "window": 60},
+    # 배치 생성: 서버 측 스케줄링 처리량 (계정 단위)
+    "batch": {"limit": 30, "window": 60},
 }
 
 # 모델 설정
@@ -139,22 +146,68 @@ PRICING_PLANS = {
     "ultimate": {"credits": 5000, "price": 999000, "name": "Ultimate"},
 }
 
-current_key_index = 0
+# 키별 동시 Gemini 호출 수 제한
+GEMINI_KEY_CONCURRENCY = int(os.getenv("GEMINI_KEY_CONCURRENCY", "4"))
+
+
+class GeminiKeyScheduler:
+    """Gemini API 키 스케줄러 - 호출마다 다음 키부터 진행 중 호출이 가장 적은 키 선택"""
+
+    def __init__(self, keys: List[str], per_key_limit: int):
+        self.keys = [key.strip() for key in keys if key.strip()]
+        self.per_key_limit = per_key_limit
+        self.next_index = 0
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.clients: Dict[str, genai.Client] = {}
+
+    def _pick_key(self) -> str:
+        count = len(self.keys)
+        candidates = [self.keys[(self.next_index + i) % count] for i in range(count)]
+        self.next_index = (self.next_index + 1) % count
+        return min(candidates, key=lambda key: self.in_flight[key])
+
+    def _get_client(self, key: str) -> genai.Client:
+        if key not in self.clients:
+            self.clients[key] = genai.Client(api_key=key)
+        return self.clients[key]
+
+    @staticmethod
+    def fingerprint(key: str) -> str:
+        """DB에 저장할 키 식별자 (키 원문 대신 해시)"""
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def fingerprint_of(self, client: genai.Client) -> Optional[str]:
+        for key, known in self.clients.items():
+            if known is client:
+                return self.fingerprint(key)
+        return None
 
+    def client_for(self, fingerprint: str) -> Optional[genai.Client]:
+        for key in self.keys:
+            if self.fingerprint(key) == fingerprint:
+                return self._get_client(key)
+        return None
 
-def get_gemini_client():
-    global current_key_index
-    if not GEMINI_API_KEYS or not GEMINI_API_KEYS[0]:
-        raise HTTPException(
-            status_code=500, detail="Gemini API 키가 설정되지 않았습니다"
-        )
-    key = GEMINI_API_KEYS[current_key_index % len(GEMINI_API_KEYS)]
-    return genai.Client(api_key=key)
+    @asynccontextmanager
+    async def acquire(self):
+        if not self.keys:
+            raise HTTPException(
+                status_code=500, detail="Gemini API 키가 설정되지 않았습니다"
+            )
+        key = self._pick_key()
+        if key not in self.semaphores:
+            self.semaphores[key] = asyncio.Semaphore(self.per_key_limit)
+
+        self.in_flight[key] += 1
+        try:
+            async with self.semaphores[key]:
+                yield self._get_client(key)
+        finally:
+            self.in_flight[key] -= 1
 
 
-def rotate_key():
-    global current_key_index
-    current_key_index = (current_key_index + 1) % len(GEMINI_API_KEYS)
+gemini_scheduler = GeminiKeyScheduler(GEMINI_API_KEYS, GEMINI_KEY_CONCURRENCY)
 
 
 # ============================================================================
@@ -573,9 +626,11 @@ STYLE REQUIREMENTS:
 CRITICAL: Make the food look ABSOLUTELY DELICIOUS. Fresh, vibrant colors. Professional food magazine quality."""
 
 
-def build_editorial_product_prompt(category: str, target: str = "사람") -> str:
+def build_editorial_product_prompt(
+    category: str, target: str = "사람", category2: str = ""
+) -> str:
     """카테고리/타겟별 화보 정물 프롬프트 생성"""
-    category_group = get_category_group(category, "", target)
+    category_group = get_category_group(category, category2, target)
 
     if category_group == "키즈" or target == "아동":
         return PROMPT_PRODUCT_EDITORIAL_KIDS
@@ -587,9 +642,11 @@ def build_editorial_product_prompt(category: str, target: str = "사람") -> str
         return PROMPT_PRODUCT_EDITORIAL_LUXURY
 
 
-def build_model_prompt(category: str, gender: str, target: str = "사람") -> str:
+def build_model_prompt(
+    category: str, gender: str, target: str = "사람", category2: str = ""
+) -> str:
     """카테고리별 기본 모델 프롬프트 생성 (공홈 스타일)"""
-    category_group = get_category_group(category, "", target)
+    category_group = get_category_group(category, category2, target)
     config = CATEGORY_MODEL_CONFIG.get(category_group, CATEGORY_MODEL_CONFIG["의류"])
     gender_model = convert_gender_to_model(gender)
 
@@ -667,10 +724,10 @@ CRITICAL:
 
 
 def build_editorial_model_prompt(
-    category: str, gender: str, target: str = "사람"
+    category: str, gender: str, target: str = "사람", category2: str = ""
 ) -> str:
     """카테고리별 화보 모델 프롬프트 생성 (에디토리얼 스타일)"""
-    category_group = get_category_group(category, "", target)
+    category_group = get_category_group(category, category2, target)
     config = CATEGORY_MODEL_CONFIG.get(category_group, CATEGORY_MODEL_CONFIG["의류"])
     gender_model = convert_gender_to_model(gender)
 
@@ -868,6 +925,19 @@ ABSOLUTELY FORBIDDEN:
         )
 
 
+def build_generation_prompt(
+    mode: str, category: str, gender: str, target: str = "사람", category2: str = ""
+) -> str:
+    """모드별 프롬프트 선택 (TARGET 기반 카테고리 오버라이드 적용)"""
+    if mode == "model":
+        return build_model_prompt(category, gender, target, category2)
+    elif mode == "editorial_product":
+        return build_editorial_product_prompt(category, target, category2)
+    elif mode == "editorial_model":
+        return build_editorial_model_prompt(category, gender, target, category2)
+    return PROMPT_PRODUCT
+
+
 # ============================================================================
 # API 모델
 # ============================================================================
@@ -917,14 +987,41 @@ class PaymentResponse(BaseModel):
 # ============================================================================
 
 
-def process_image(base64_data: str, max_size: int = 1568) -> str:
+# 비전 입력 프로파일 (프로바이더별 최대 변 길이/포맷/품질/MIME)
+# - claude: 긴 변 1568px 초과 시 API 내부에서 다운샘플되므로 그 이상 보낼 필요 없음
+# - gemini: 기존 생성 경로와 동일 (1568px, JPEG 90)
+# - veo: 레퍼런스 이미지는 출력 해상도(720p/1080p) 이상 불필요
+VISION_PROFILES = {
+    "claude": {"max_edge": 1568, "format": "JPEG", "quality": 85, "mime_type": "image/jpeg"},
+    "gemini": {"max_edge": 1568, "format": "JPEG", "quality": 90, "mime_type": "image/jpeg"},
+    "veo": {"max_edge": 1280, "format": "JPEG", "quality": 90, "mime_type": "image/jpeg"},
+}
+
+
+def decode_base64_image(base64_data: str) -> bytes:
+    """data URL / 순수 base64 문자열을 바이트로 디코딩"""
     try:
         if "," in base64_data:
             base64_data = base64_data.split(",")[1]
+        return base64.b64decode(base64_data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"이미지 처리 오류: {str(e)}")
+
+
+def prepare_vision_image(
+    image_bytes: bytes, provider: str, max_edge: Optional[int] = None
+) -> Tuple[bytes, str]:
+    """프로바이더 프로파일에 맞춰 이미지 리사이즈/재인코딩 → (바이트, MIME 타입)"""
+    profile = VISION_PROFILES[provider]
+    max_edge = max_edge or profile["max_edge"]
 
-        image_bytes = base64.b64decode(base64_data)
+    try:
         img = Image.open(io.BytesIO(image_bytes))
 
+        # JPEG는 디코딩 단계에서 축소 (대용량 원본의 디코딩 비용 절감)
+        if img.format == "JPEG":
+            img.draft("RGB", (max_edge, max_edge))
+
         if img.mode in ("RGBA", "LA", "P"):
             bg = Image.new("RGB", img.size, (255, 255, 255))
             if img.mode == "P":
@@ -935,16 +1032,31 @@ def process_image(base64_data: str, max_size: int = 1568) -> str:
         elif img.mode != "RGB":
             img = img.convert("RGB")
 
-        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
 
         buffer = io.BytesIO()
-        img.save(buffer, format="JPEG", quality=90)
-        return base64.standard_b64encode(buffer.getvalue()).decode("utf-8")
+        img.save(buffer, format=profile["format"], quality=profile["quality"])
+        return buffer.getvalue(), profile["mime_type"]
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"이미지 처리 오류: {str(e)}")
 
 
+def prepare_vision_base64(
+    base64_data: str, provider: str, max_edge: Optional[int] = None
+) -> Tuple[str, str]:
+    """base64 입력용 래퍼 → (base64, MIME 타입)"""
+    image_bytes, mime_type = prepare_vision_image(
+        decode_base64_image(base64_data), provider, max_edge
+    )
+    return base64.standard_b64encode(image_bytes).decode("utf-8"), mime_type
+
+
+def process_image(base64_data: str, max_size: int = 1568) -> str:
+    processed, _ = prepare_vision_base64(base64_data, "gemini", max_size)
+    return processed
+
+
 def split_grid_image(image_bytes: bytes, upscale_factor: int = 4) -> List[bytes]:
     try:
         img = Image.open(io.BytesIO(image_bytes))
@@ -978,19 +1090,412 @@ def split_grid_image(image_bytes: bytes, upscale_factor: int = 4) -> List[bytes]
         raise HTTPException(status_code=500, detail=f"이미지 분할 오류: {str(e)}")
 
 
+# ============================================================================
+# Blob 저장소 (이미지/비디오 공용)
+# ============================================================================
+
+# supabase: Supabase Storage / local: 로컬 디스크 (오프라인 테스트용) / s3: S3 호환 저장소
+BLOB_STORAGE_BACKEND = os.getenv("BLOB_STORAGE_BACKEND", "supabase")
+BLOB_LOCAL_ROOT = os.getenv(
+    "BLOB_LOCAL_ROOT", os.path.join(os.path.dirname(__file__), "blob_storage")
+)
+# 공개 URL이 없는 저장소(local, 공개 URL 미설정 s3)의 파일은 /api/blob/... 경로로 제공
+BLOB_PUBLIC_BASE_URL = os.getenv("BLOB_PUBLIC_BASE_URL", "")
+BLOB_CACHE_DIR = os.getenv(
+    "BLOB_CACHE_DIR", os.path.join(os.path.dirname(__file__), "blob_cache")
+)
+BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "")
+S3_REGION = os.getenv("S3_REGION", "auto")
+S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL", "")
+
+
+class BlobStore:
+    """저장소 공통 인터페이스. namespace = Supabase 버킷 이름 / 로컬 디렉터리 / S3 키 접두어"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def put(self, key: str, data: bytes, content_type: str):
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        """파일이 없으면 None"""
+        raise NotImplementedError
+
+    def delete(self, keys: List[str]):
+        raise NotImplementedError
+
+    def list_folders(self, prefix: str) -> List[str]:
+        """prefix 바로 아래 폴더 이름 목록"""
+        raise NotImplementedError
+
+    def iter_objects(self, prefix: str) -> Iterator[Tuple[str, Optional[float]]]:
+        """prefix 아래 파일 (키, 수정 시각 epoch) 을 하위 폴더 포함해 순서대로. 목록은 백엔드에서 페이지 단위로 조회"""
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str, limit: int = 1000) -> List[str]:
+        """prefix 아래 파일 키 (하위 폴더 포함), 최대 limit개"""
+        return [key for key, _ in itertools.islice(self.iter_objects(prefix), limit)]
+
+    def iter_key_pages(self, prefix: str, page_size: int = 1000) -> Iterator[List[str]]:
+        """prefix 아래 파일 키를 page_size개씩 - 파일 수와 관계없이 메모리 사용 일정"""
+        objects = self.iter_objects(prefix)
+        while True:
+            page = [key for key, _ in itertools.islice(objects, page_size)]
+            if not page:
+                return
+            yield page
+
+    def last_modified(self, prefix: str) -> Optional[float]:
+        """prefix 아래 파일 중 가장 최근 수정 시각 (epoch). 파일이 없거나 시각을 알 수 없으면 None"""
+        times = [modified for _, modified in self.iter_objects(prefix)]
+        if not times or None in times:
+            return None
+        return max(times)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """prefix 아래 파일 전체 삭제 - 목록/삭제를 1000개 단위로 반복. 삭제한 파일 수 반환"""
+        deleted = 0
+        previous = None
+        while True:
+            keys = self.list_keys(prefix)
+            if not keys:
+                return deleted
+            if keys == previous:
+                raise RuntimeError(f"저장소 파일 삭제 실패: {prefix} ({len(keys)}개 남음)")
+            self.delete(keys)
+            deleted += len(keys)
+            previous = keys
+
+    def public_url(self, key: str) -> str:
+        return f"{BLOB_PUBLIC_BASE_URL}/api/blob/{self.namespace}/{key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        marker = f"/{self.namespace}/"
+        if marker not in url:
+            return None
+        return url.split(marker, 1)[1].split("?", 1)[0]
+
+
+def is_storage_not_found(error: Exception) -> bool:
+    """Supabase Storage 오류가 '파일 없음'인지 (404 / not_found). 네트워크 등 다른 오류는 False"""
+    detail = error.args[0] if error.args else None
+    if isinstance(detail, dict):
+        status = str(detail.get("statusCode") or detail.get("status") or "")
+        code = str(detail.get("error") or "").lower()
+        return status == "404" or code in ("not_found", "not found")
+    message = str(error).lower()
+    return "not_found" in message or "object not found" in message
+
+
+class SupabaseBlobStore(BlobStore):
+    def put(self, key: str, data: bytes, content_type: str):
+        supabase.storage.from_(self.namespace).upload(
+            key, data, {"content-type": content_type, "upsert": "true"}
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return supabase.storage.from_(self.namespace).download(key)
+        except Exception as e:
+            # 일시적인 오류를 '파일 없음'으로 처리하면 인덱스/캐시 항목이 지워짐 → 그대로 전달
+            if is_storage_not_found(e):
+                return None
+            print(f"Storage 다운로드 오류 ({key}): {e}")
+            raise
+
+    def delete(self, keys: List[str]):
+        if keys:
+            supabase.storage.from_(self.namespace).remove(keys)
+
+    def _list(self, path: str, offset: int = 0) -> List[dict]:
+        return supabase.storage.from_(self.namespace).list(
+            path, {"limit": 1000, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+        ) or []
+
+    def list_folders(self, prefix: str) -> List[str]:
+        folders = []
+        offset = 0
+        while True:
+            entries = self._list(prefix.rstrip("/"), offset)
+            # 폴더 항목은 id가 없음
+            folders += [entry["name"] for entry in entries if not entry.get("id")]
+            if len(entries) < 1000:
+                return folders
+            offset += len(entries)
+
+    def iter_objects(self, prefix: str) -> Iterator[Tuple[str, Optional[float]]]:
+        pending = [prefix.rstrip("/")]
+        while pending:
+            path = pending.pop()
+            offset = 0
+            while True:
+                entries = self._list(path, offset)
+                for entry in entries:
+                    if entry.get("id"):
+                        modified = parse_db_timestamp(entry.get("updated_at") or entry.get("created_at"))
+                        yield f"{path}/{entry['name']}", modified
+                    else:
+                        pending.append(f"{path}/{entry['name']}")
+                if len(entries) < 1000:
+                    break
+                offset += len(entries)
+
+    def public_url(self, key: str) -> str:
+        return supabase.storage.from_(self.namespace).get_public_url(key)
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, namespace: str, root: str):
+        super().__init__(namespace)
+        self.root = os.path.join(root, namespace)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"잘못된 저장소 키: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            path = self._path(key)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def list_folders(self, prefix: str) -> List[str]:
+        path = self._path(prefix) if prefix else self.root
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+    def iter_objects(self, prefix: str) -> Iterator[Tuple[str, Optional[float]]]:
+        path = self._path(prefix)
+        for dirpath, _, filenames in os.walk(path):
+            for filename in sorted(filenames):
+                file_path = os.path.join(dirpath, filename)
+                try:
+                    modified = os.path.getmtime(file_path)
+                except OSError:
+                    continue
+                yield os.path.relpath(file_path, self.root).replace(os.sep, "/"), modified
+
+    def delete_prefix(self, prefix: str) -> int:
+        deleted = super().delete_prefix(prefix)
+        path = self._path(prefix)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        return deleted
+
+
+class S3BlobStore(BlobStore):
+    """S3 호환 저장소 (AWS S3, Cloudflare R2, MinIO 등). boto3 필요"""
+
+    def __init__(self, namespace: str):
+        super().__init__(namespace)
+        import boto3
+
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT_URL or None,
+            region_name=S3_REGION,
+            aws_access_key_id=os.getenv("S3_ACCESS_KEY_ID") or None,
+            aws_secret_access_key=os.getenv("S3_SECRET_ACCESS_KEY") or None,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}/{key}"
+
+    def put(self, key: str, data: bytes, content_type: str):
+        self.client.put_object(
+            Bucket=S3_BUCKET, Key=self._key(key), Body=data, ContentType=content_type
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=S3_BUCKET, Key=self._key(key))
+            return response["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def delete(self, keys: List[str]):
+        # delete_objects는 요청당 최대 1000개
+        for i in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=S3_BUCKET,
+                Delete={"Objects": [{"Key": self._key(key)} for key in keys[i : i + 1000]]},
+            )
+
+    def list_folders(self, prefix: str) -> List[str]:
+        folders = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        base = self._key(prefix.rstrip("/")).rstrip("/") + "/"
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=base, Delimiter="/"):
+            folders += [p["Prefix"][len(base) :].rstrip("/") for p in page.get("CommonPrefixes", [])]
+        return folders
+
+    def iter_objects(self, prefix: str) -> Iterator[Tuple[str, Optional[float]]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        offset = len(self.namespace) + 1
+        for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=self._key(prefix.rstrip("/")) + "/"):
+            for item in page.get("Contents", []):
+                yield item["Key"][offset:], item["LastModified"].timestamp()
+
+    def public_url(self, key: str) -> str:
+        if S3_PUBLIC_BASE_URL:
+            return f"{S3_PUBLIC_BASE_URL.rstrip('/')}/{self._key(key)}"
+        return super().public_url(key)
+
+
+def create_blob_store(namespace: str) -> BlobStore:
+    if BLOB_STORAGE_BACKEND == "local":
+        return LocalBlobStore(namespace, BLOB_LOCAL_ROOT)
+    if BLOB_STORAGE_BACKEND == "s3":
+        return S3BlobStore(namespace)
+    return SupabaseBlobStore(namespace)
+
+
+class BlobCache:
+    """로컬 디스크 LRU 읽기 캐시 - 자주 요청되는 파일을 저장소 왕복 없이 제공"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.inflight: Dict[str, asyncio.Future] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        # 재시작 후에도 기존 캐시 파일 재사용 (오래된 것부터 제거되도록 mtime 순)
+        files = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def _name(self, store: BlobStore, key: str) -> str:
+        digest = hashlib.sha256(f"{store.namespace}/{key}".encode()).hexdigest()[:32]
+        return digest + os.path.splitext(key)[1]
+
+    def _add(self, name: str, size: int):
+        if name in self.entries:
+            self.total_bytes -= self.entries.pop(name)
+        self.entries[name] = size
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            evicted, evicted_size = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            try:
+                os.remove(os.path.join(self.cache_dir, evicted))
+            except OSError:
+                pass
+
+    def prime(self, store: BlobStore, key: str, source_path: str):
+        """방금 업로드한 로컬 파일을 캐시에 등록 (파일 이동)"""
+        name = self._name(store, key)
+        path = os.path.join(self.cache_dir, name)
+        os.replace(source_path, path)
+        self._add(name, os.path.getsize(path))
+
+    async def fetch(self, store: BlobStore, key: str) -> Optional[str]:
+        """로컬 캐시 파일 경로 반환 (없으면 저장소에서 받아 캐시). 저장소에도 없으면 None"""
+        name = self._name(store, key)
+        path = os.path.join(self.cache_dir, name)
+        if name in self.entries and os.path.exists(path):
+            self.entries.move_to_end(name)
+            return path
+
+        # 같은 파일 동시 요청은 한 번만 다운로드
+        if name in self.inflight:
+            return await self.inflight[name]
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[name] = future
+        try:
+            data = await asyncio.to_thread(store.get, key)
+            if data is None:
+                result = None
+            else:
+                temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+                await asyncio.to_thread(write_file, temp_path, data)
+                os.replace(temp_path, path)
+                self._add(name, len(data))
+                result = path
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self.inflight.pop(name, None)
+
+
+def write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+image_store = create_blob_store("generated-images")
+video_store = create_blob_store(os.getenv("VIDEO_STORAGE_BUCKET", "videos"))
+blob_cache = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES)
+BLOB_STORES = {store.namespace: store for store in (image_store, video_store)}
+
+
+# 생성 이미지 키: daily/{날짜}/{user_id}/{시각}_{index}_{고유값}.jpg
+# 날짜 폴더 단위로 보관 기간 만료 처리 (폴더째 삭제)
+IMAGE_PARTITION_ROOT = "daily"
+
+
+def image_partition_day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def image_key_owner(key: str) -> Optional[str]:
+    """저장소 키의 소유자 user_id (신규 날짜 분할 키 / 기존 {user_id}/ 키 모두 지원)"""
+    parts = key.split("/")
+    if parts[0] == IMAGE_PARTITION_ROOT:
+        return parts[2] if len(parts) > 3 else None
+    return parts[0] if len(parts) > 1 else None
+
+
 async def upload_to_storage(user_id: str, image_bytes: bytes, index: int) -> str:
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{user_id}/{timestamp}_{index}.jpg"
-
-        supabase.storage.from_("generated-images").upload(
-            filename, image_bytes, {"content-type": "image/jpeg"}
+        now = datetime.utcnow()
+        filename = (
+            f"{IMAGE_PARTITION_ROOT}/{image_partition_day(now)}/{user_id}/"
+            f"{now.strftime('%H%M%S')}_{index}_{uuid.uuid4().hex[:8]}.jpg"
         )
 
-        url = supabase.storage.from_("generated-images").get_public_url(filename)
+        await asyncio.to_thread(image_store.put, filename, image_bytes, "image/jpeg")
+
+        url = image_store.public_url(filename)
         return url
     except Exception as e:
-        print(f"Storage 업로드 오류: {e}")
+        # 빈 URL은 생성 내역에 저장되지 않음. 일부만 업로드된 파일은 정합성 점검에서 정리
+        print(f"Storage 업로드 오류 ({user_id}, {index}): {e}")
         return ""
 
 
@@ -1016,6 +1521,7 @@ async def deduct_credits(user_id: str, amount: int) -> int:
         result = supabase.rpc(
             "deduct_credits_atomic", {"p_user_id": user_id, "p_amount": amount}
         ).execute()
+        subscription_status_cache.invalidate(user_id)
 
         if result.data:
             data = result.data
@@ -1050,6 +1556,7 @@ async def add_credits(user_id: str, amount: int) -> int:
         result = supabase.rpc(
             "add_credits_atomic", {"p_user_id": user_id, "p_amount": amount}
         ).execute()
+        subscription_status_cache.invalidate(user_id)
 
         if result.data:
             data = result.data
@@ -1072,24 +1579,57 @@ async def add_credits(user_id: str, amount: int) -> int:
         )
 
 
+async def refund_generation_credits(user_id: str, amount: int, reason: str) -> int:
+    """이미지 생성 실패분 크레딧 환불 + 사용 기록"""
+    remaining = await add_credits(user_id, amount)
+    try:
+        supabase.table("usages").insert(
+            {
+                "user_id": user_id,
+                "action": "image_generation_refund",
+                "credits_used": -amount,
+                "metadata": {"reason": reason},
+            }
+        ).execute()
+    except Exception as e:
+        print(f"환불 기록 오류: {e}")
+    return remaining
+
+
+def get_prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.strip().encode()).hexdigest()[:12]
+
+
 async def save_generation(
-    user_id: str, image_urls: List[str], mode: str, model_type: str, credits_used: int
-):
+    user_id: str,
+    image_urls: List[str],
+    mode: str,
+    model_type: str,
+    credits_used: int,
+    model: Optional[str] = None,
+    prompt: Optional[str] = None,
+    timings: Optional[dict] = None,
+) -> Optional[str]:
+    """생성 내역 저장 - 요청 1건 = generation_sets 1행 (이미지 단위 조회는 generation_images 뷰)"""
     try:
-        for url in image_urls:
-            supabase.table("generations").insert(
-                {
-                    "user_id": user_id,
-                    "generated_image_url": url,
-                    "mode": mode,
-                    "model_type": model_type,
-                    "credits_used": (
-                        credits_used // len(image_urls) if image_urls else credits_used
-                    ),
-                }
-            ).execute()
+        image_urls = [url for url in image_urls if url]
+        result = supabase.table("generation_sets").insert(
+            {
+                "user_id": user_id,
+                "mode": mode,
+                "model_type": model_type,
+                "model": model,
+                "prompt_version": get_prompt_version(prompt) if prompt else None,
+                "image_urls": image_urls,
+                "image_count": len(image_urls),
+                "credits_used": credits_used,
+                "timings": timings,
+            }
+        ).execute()
+        return result.data[0]["id"] if result.data else None
     except Exception as e:
         print(f"생성 내역 저장 오류: {e}")
+        return None
 
 
 # ============================================================================
@@ -1133,6 +1673,15 @@ async def get_categories():
 
 @app.post("/api/generate", response_model=GenerateResponse)
 async def generate_image(request: GenerateRequest):
+    return await run_generation(request)
+
+
+async def run_generation(
+    request: GenerateRequest,
+    processed_image: Optional[str] = None,
+    category2: str = "",
+) -> GenerateResponse:
+    """이미지 생성 본 처리 (processed_image가 주어지면 전처리 생략)"""
     if request.model_type not in MODEL_CONFIG:
         raise HTTPException(status_code=400, detail="잘못된 모델 타입입니다")
 
@@ -1148,70 +1697,25 @@ async def generate_image(request: GenerateRequest):
         )
 
     try:
-        processed_image = process_image(request.image_base64)
-
-        # 프롬프트 선택 (TARGET 기반 카테고리 오버라이드 적용)
-        if request.mode == "model":
-            prompt = build_model_prompt(
-                request.category, request.gender, request.target
-            )
-        elif request.mode == "editorial_product":
-            prompt = build_editorial_product_prompt(request.category, request.target)
-        elif request.mode == "editorial_model":
-            prompt = build_editorial_model_prompt(
-                request.category, request.gender, request.target
-            )
-        else:
-            prompt = PROMPT_PRODUCT
-
-        client = get_gemini_client()
+        if processed_image is None:
+            processed_image = process_image(request.image_base64)
 
-        response = client.models.generate_content(
-            model=config["model"],
-            contents=[
-                {
-                    "parts": [
-                        {"text": prompt},
-                        {
-                            "inline_data": {
-                                "mime_type": "image/jpeg",
-                                "data": processed_image,
-                            }
-                        },
-                    ]
-                }
-            ],
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE", "TEXT"], temperature=0.4
-            ),
+        prompt = build_generation_prompt(
+            request.mode, request.category, request.gender, request.target, category2
         )
 
-        image_bytes = None
-        if response.candidates and response.candidates[0].content:
-            for part in response.candidates[0].content.parts:
-                if hasattr(part, "inline_data") and part.inline_data:
-                    data = part.inline_data.data
-                    if isinstance(data, str):
-                        image_bytes = base64.b64decode(data)
-                    else:
-                        image_bytes = data
-                    break
+        produced = await produce_generation(
+            request.user_id, processed_image, prompt, config["model"]
+        )
 
-        if not image_bytes:
-            rotate_key()
+        if not produced:
             return GenerateResponse(
                 success=False,
                 error="이미지 생성에 실패했습니다. 다시 시도해주세요.",
                 remaining_credits=current_credits,
             )
 
-        split_images = split_grid_image(image_bytes)
-
-        image_urls = []
-        for i, img_bytes in enumerate(split_images):
-            url = await upload_to_storage(request.user_id, img_bytes, i)
-            if url:
-                image_urls.append(url)
+        split_images, image_urls, timings = produced
 
         remaining = await deduct_credits(request.user_id, required_credits)
 
@@ -1221,6 +1725,9 @@ async def generate_image(request: GenerateRequest):
             request.mode,
             request.model_type,
             required_credits,
+            model=config["model"],
+            prompt=prompt,
+            timings=timings,
         )
 
         images_base64 = [base64.b64encode(img).decode("utf-8") for img in split_images]
@@ -1235,7 +1742,6 @@ async def generate_image(request: GenerateRequest):
 
     except Exception as e:
         print(f"이미지 생성 오류: {e}")
-        rotate_key()
         return GenerateResponse(
             success=False,
             error=f"이미지 생성 중 오류가 발생했습니다: {str(e)}",
@@ -1243,130 +1749,772 @@ async def generate_image(request: GenerateRequest):
         )
 
 
+GEMINI_IMAGE_GENERATION_CONFIG = {
+    "response_modalities": ["IMAGE", "TEXT"],
+    "temperature": 0.4,
+}
+
+
+def build_gemini_image_contents(prompt: str, processed_image: str) -> list:
+    return [
+        {
+            "role": "user",
+            "parts": [
+                {"text": prompt},
+                {
+                    "inline_data": {
+                        "mime_type": VISION_PROFILES["gemini"]["mime_type"],
+                        "data": processed_image,
+                    }
+                },
+            ],
+        }
+    ]
+
+
+def extract_grid_image(response) -> Optional[bytes]:
+    """Gemini 응답에서 첫 번째 이미지 파트 추출"""
+    if response and response.candidates and response.candidates[0].content:
+        for part in response.candidates[0].content.parts:
+            if hasattr(part, "inline_data") and part.inline_data:
+                data = part.inline_data.data
+                if isinstance(data, str):
+                    return base64.b64decode(data)
+                return data
+    return None
+
+
+async def generate_grid_image(
+    prompt: str, processed_image: str, model: str
+) -> Optional[bytes]:
+    """Gemini 2x2 그리드 이미지 생성 (키 스케줄러 경유, 이벤트 루프 비차단)"""
+    async with gemini_scheduler.acquire() as client:
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=build_gemini_image_contents(prompt, processed_image),
+            config=types.GenerateContentConfig(**GEMINI_IMAGE_GENERATION_CONFIG),
+        )
+    return extract_grid_image(response)
+
+
+async def produce_generation(
+    user_id: str,
+    processed_image: str,
+    prompt: str,
+    model: str,
+    lane: str = "interactive",
+    ref: Optional[str] = None,
+) -> Optional[Tuple[List[bytes], List[str], dict]]:
+    """생성 → 4분할 → 업로드. (분할 이미지, URL, 소요 시간) 반환, 생성 결과가 없으면 None
+
+    ref: 이코노미 레인 배치 아이템 id (서버 재시작 후 결과를 이어받는 데 사용)
+    """
+    started = time.time()
+    if lane == "economy":
+        image_bytes = await economy_lane.generate(prompt, processed_image, model, ref)
+    else:
+        image_bytes = await generate_grid_image(prompt, processed_image, model)
+    if not image_bytes:
+        return None
+    generated = time.time()
+
+    return await upload_generation(user_id, image_bytes, started, generated)
+
+
+async def upload_generation(
+    user_id: str, image_bytes: bytes, started: float, generated: float
+) -> Tuple[List[bytes], List[str], dict]:
+    split_images = await asyncio.to_thread(split_grid_image, image_bytes)
+
+    image_urls = []
+    for i, img_bytes in enumerate(split_images):
+        url = await upload_to_storage(user_id, img_bytes, i)
+        if url:
+            image_urls.append(url)
+
+    timings = {
+        "generate_ms": int((generated - started) * 1000),
+        "upload_ms": int((time.time() - generated) * 1000),
+    }
+    return split_images, image_urls, timings
+
+
 # ============================================================================
-# API 엔드포인트 - 결제
+# 이코노미 레인 (Gemini 배치 모드 - 급하지 않은 대량 생성용)
 # ============================================================================
 
+# gemini: Gemini Batch API / local: 같은 프로세스에서 일반 생성 경로로 처리 (테스트/개발용)
+ECONOMY_BATCH_BACKEND = os.getenv("ECONOMY_BATCH_BACKEND", "gemini")
+# 인라인 배치 요청 20MB 제한 → 전처리 이미지(~300KB) 기준 여유있게 50건
+ECONOMY_MAX_JOBS_PER_SUBMIT = int(os.getenv("ECONOMY_MAX_JOBS_PER_SUBMIT", "50"))
+# 첫 작업 대기 후 제출까지 최대 대기 시간 (초) - 그 사이 들어온 작업을 모아서 제출
+ECONOMY_FLUSH_SECONDS = int(os.getenv("ECONOMY_FLUSH_SECONDS", "60"))
+ECONOMY_POLL_SECONDS = int(os.getenv("ECONOMY_POLL_SECONDS", "30"))
+ECONOMY_TICK_SECONDS = 5
+# 배치 모드 목표 처리 시간은 24시간
+ECONOMY_MAX_WAIT_SECONDS = 24 * 60 * 60
+# 제출한 배치는 economy_batches에 기록 → 처리 중인 서버가 heartbeat 갱신,
+# 갱신이 끊긴 배치는 다른 서버(또는 재시작한 서버)가 이어받아 결과 반영
+ECONOMY_HEARTBEAT_SECONDS = 60
+ECONOMY_STALE_SECONDS = int(os.getenv("ECONOMY_STALE_SECONDS", "300"))
+ECONOMY_INSTANCE_ID = f"{os.getenv('HOSTNAME', 'local')}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+ECONOMY_TERMINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
 
-@app.post("/api/payment/create")
-async def create_payment(request: PaymentRequest):
-    if request.plan not in PRICING_PLANS:
-        raise HTTPException(status_code=400, detail="잘못된 요금제입니다")
+class GeminiBatchBackend:
+    """Gemini Batch API (비동기, 일반 호출 대비 저렴)"""
 
-    plan = PRICING_PLANS[request.plan]
+    poll_seconds = ECONOMY_POLL_SECONDS
+    persistent = True
 
-    try:
-        supabase.table("payments").insert(
+    async def submit(self, model: str, jobs: List[Tuple[str, str]]) -> dict:
+        requests = [
             {
-                "user_id": request.user_id,
-                "order_id": request.order_id,
-                "amount": plan["price"],
-                "credits": plan["credits"],
-                "status": "pending",
+                "contents": build_gemini_image_contents(prompt, processed_image),
+                "config": GEMINI_IMAGE_GENERATION_CONFIG,
             }
-        ).execute()
-
+            for prompt, processed_image in jobs
+        ]
+        # 배치 작업 조회는 제출한 키로만 가능 → 클라이언트를 핸들에 보관
+        async with gemini_scheduler.acquire() as client:
+            batch_job = await client.aio.batches.create(
+                model=model,
+                src=requests,
+                config={"display_name": f"autopic-economy-{uuid.uuid4().hex[:8]}"},
+            )
         return {
-            "success": True,
-            "order_id": request.order_id,
-            "amount": plan["price"],
-            "credits": plan["credits"],
-            "plan_name": plan["name"],
+            "name": batch_job.name,
+            "client": client,
+            "count": len(jobs),
+            "key_fingerprint": gemini_scheduler.fingerprint_of(client),
         }
-    except Exception as e:
-        print(f"결제 생성 오류: {e}")
-        raise HTTPException(status_code=500, detail="결제 생성 중 오류가 발생했습니다")
-
 
-@app.post("/api/payment/confirm", response_model=PaymentResponse)
-async def confirm_payment(request: PaymentConfirmRequest):
-    try:
-        auth_string = base64.b64encode(f"{TOSS_SECRET_KEY}:".encode()).decode()
+    def attach(self, row: dict) -> Optional[dict]:
+        """economy_batches 기록으로 핸들 복원 (제출한 키가 더 이상 없으면 None)"""
+        client = gemini_scheduler.client_for(row.get("key_fingerprint") or "")
+        if not client:
+            return None
+        return {"name": row["name"], "client": client, "count": row["item_count"]}
+
+    async def poll(self, handle: dict) -> Optional[List[Optional[bytes]]]:
+        """진행 중이면 None, 종료 시 작업 순서대로 그리드 이미지 (실패 항목은 None)"""
+        batch_job = await handle["client"].aio.batches.get(name=handle["name"])
+        state = getattr(batch_job.state, "name", str(batch_job.state))
+        if state not in ECONOMY_TERMINAL_STATES:
+            return None
+
+        results: List[Optional[bytes]] = [None] * handle["count"]
+        if state == "JOB_STATE_SUCCEEDED" and batch_job.dest:
+            for index, inlined in enumerate(batch_job.dest.inlined_responses or []):
+                if index < len(results) and inlined.response:
+                    results[index] = extract_grid_image(inlined.response)
+        else:
+            print(f"이코노미 배치 종료 ({handle['name']}): {state}")
+        return results
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.tosspayments.com/v1/payments/confirm",
-                headers={
-                    "Authorization": f"Basic {auth_string}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "paymentKey": request.payment_key,
-                    "orderId": request.order_id,
-                    "amount": request.amount,
-                },
-            )
 
-        if response.status_code != 200:
-            error_data = response.json()
-            return PaymentResponse(
-                success=False, error=error_data.get("message", "결제 승인 실패")
-            )
+class LocalBatchBackend:
+    """로컬 대체 백엔드 - 제출 즉시 일반 생성 경로로 처리 (테스트/개발용)"""
 
-        payment_data = response.json()
+    poll_seconds = ECONOMY_TICK_SECONDS
+    # 프로세스 안에서만 처리 → 재시작 후 이어받을 수 없음
+    persistent = False
 
-        payment_result = (
-            supabase.table("payments")
-            .select("*")
-            .eq("order_id", request.order_id)
-            .single()
-            .execute()
+    async def submit(self, model: str, jobs: List[Tuple[str, str]]) -> dict:
+        task = asyncio.create_task(
+            asyncio.gather(
+                *[generate_grid_image(prompt, image, model) for prompt, image in jobs],
+                return_exceptions=True,
+            )
         )
+        return {"name": f"local-{uuid.uuid4().hex[:8]}", "task": task}
+
+    async def poll(self, handle: dict) -> Optional[List[Optional[bytes]]]:
+        if not handle["task"].done():
+            return None
+        return [
+            None if isinstance(result, BaseException) else result
+            for result in handle["task"].result()
+        ]
 
-        if not payment_result.data:
-            return PaymentResponse(success=False, error="결제 정보를 찾을 수 없습니다")
 
-        payment = payment_result.data
-        credits_to_add = payment["credits"]
+class EconomyLane:
+    """이코노미 레인 - 대기 작업을 모아 배치 제출 → 완료 폴링 → 작업별 결과 전달"""
 
-        supabase.table("payments").update(
+    def __init__(self, backend):
+        self.backend = backend
+        self.pending: List[dict] = []
+        self.submitted: List[dict] = []
+        self.task: Optional[asyncio.Task] = None
+        self.heartbeat_at = 0.0
+
+    async def generate(
+        self, prompt: str, processed_image: str, model: str, ref: Optional[str] = None
+    ) -> Optional[bytes]:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(
             {
-                "status": "completed",
-                "payment_key": request.payment_key,
-                "method": payment_data.get("method", ""),
-                "paid_at": datetime.now().isoformat(),
+                "model": model,
+                "job": (prompt, processed_image),
+                "ref": ref,
+                "future": future,
+                "queued_at": time.time(),
             }
-        ).eq("order_id", request.order_id).execute()
-
-        new_credits = await add_credits(request.user_id, credits_to_add)
-
-        return PaymentResponse(
-            success=True,
-            credits=credits_to_add,
-            total_credits=new_credits,
         )
+        self._ensure_running()
+        return await future
 
-    except Exception as e:
-        print(f"결제 승인 오류: {e}")
-        return PaymentResponse(
-            success=False, error=f"결제 처리 중 오류가 발생했습니다: {str(e)}"
+    def attach(self, handle: dict, submitted_at: float, on_results):
+        """재시작 전에 제출된 배치 이어받기 - 결과는 on_results(results)로 전달"""
+        self.submitted.append(
+            {
+                "handle": handle,
+                "entries": None,
+                "on_results": on_results,
+                "submitted_at": submitted_at,
+                "next_poll_at": time.time(),
+            }
         )
+        self._ensure_running()
 
+    def _ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
 
-@app.get("/api/payment/config")
-async def get_payment_config():
-    return {
-        "client_key": TOSS_CLIENT_KEY,
-        "plans": PRICING_PLANS,
-    }
+    async def _run(self):
+        while self.pending or self.submitted:
+            try:
+                oldest = min(entry["queued_at"] for entry in self.pending) if self.pending else None
+                if oldest and (
+                    len(self.pending) >= ECONOMY_MAX_JOBS_PER_SUBMIT
+                    or time.time() - oldest >= ECONOMY_FLUSH_SECONDS
+                ):
+                    await self._flush()
+                await self._poll()
+            except Exception as e:
+                print(f"이코노미 레인 오류: {e}")
+            await asyncio.sleep(ECONOMY_TICK_SECONDS)
 
+    async def _flush(self):
+        entries, self.pending = self.pending, []
 
-# ============================================================================
-# 나이스페이 결제 API
-# ============================================================================
+        by_model: Dict[str, List[dict]] = defaultdict(list)
+        for entry in entries:
+            by_model[entry["model"]].append(entry)
 
+        for model, group in by_model.items():
+            for i in range(0, len(group), ECONOMY_MAX_JOBS_PER_SUBMIT):
+                chunk = group[i : i + ECONOMY_MAX_JOBS_PER_SUBMIT]
+                try:
+                    handle = await self.backend.submit(
+                        model, [entry["job"] for entry in chunk]
+                    )
+                except Exception as e:
+                    print(f"이코노미 배치 제출 오류: {e}")
+                    self._resolve(chunk, [None] * len(chunk))
+                    continue
+
+                print(f"이코노미 배치 제출: {handle['name']} ({len(chunk)}건)")
+                if self.backend.persistent:
+                    try:
+                        persist_economy_batch(handle, model, [entry["ref"] for entry in chunk])
+                    except Exception as e:
+                        print(f"이코노미 배치 기록 오류 ({handle['name']}): {e}")
+                self.submitted.append(
+                    {
+                        "handle": handle,
+                        "entries": chunk,
+                        "submitted_at": time.time(),
+                        "next_poll_at": time.time() + self.backend.poll_seconds,
+                    }
+                )
 
-class NicepayConfirmRequest(BaseModel):
-    user_id: str
-    tid: str
-    order_id: str
-    amount: int
+    async def _poll(self):
+        now = time.time()
+        if self.backend.persistent and self.submitted and now - self.heartbeat_at >= ECONOMY_HEARTBEAT_SECONDS:
+            self.heartbeat_at = now
+            try:
+                touch_economy_batches([batch["handle"]["name"] for batch in self.submitted])
+            except Exception as e:
+                print(f"이코노미 배치 heartbeat 오류: {e}")
 
+        for batch in list(self.submitted):
+            if now < batch["next_poll_at"]:
+                continue
+            batch["next_poll_at"] = now + self.backend.poll_seconds
 
-@app.get("/api/nicepay/config")
-async def get_nicepay_config():
-    """나이스페이 설정 반환"""
-    return {
+            try:
+                results = await self.backend.poll(batch["handle"])
+            except Exception as e:
+                print(f"이코노미 배치 조회 오류 ({batch['handle']['name']}): {e}")
+                results = None
+
+            if results is None and now - batch["submitted_at"] > ECONOMY_MAX_WAIT_SECONDS:
+                results = [None] * batch["handle"].get("count", len(batch["entries"] or []))
+
+            if results is not None:
+                self.submitted.remove(batch)
+                if batch["entries"] is None:
+                    try:
+                        await batch["on_results"](results)
+                    except Exception as e:
+                        print(f"이코노미 배치 결과 반영 오류 ({batch['handle']['name']}): {e}")
+                else:
+                    self._resolve(batch["entries"], results)
+                if self.backend.persistent:
+                    try:
+                        close_economy_batch(batch["handle"]["name"], results)
+                    except Exception as e:
+                        print(f"이코노미 배치 완료 기록 오류 ({batch['handle']['name']}): {e}")
+
+    def _resolve(self, entries: List[dict], results: List[Optional[bytes]]):
+        for entry, result in zip(entries, results):
+            # 원본 이미지 참조 해제
+            entry["job"] = None
+            if not entry["future"].done():
+                entry["future"].set_result(result)
+
+
+economy_lane = EconomyLane(
+    LocalBatchBackend() if ECONOMY_BATCH_BACKEND == "local" else GeminiBatchBackend()
+)
+economy_tasks: set = set()
+
+
+def persist_economy_batch(handle: dict, model: str, refs: List[Optional[str]]):
+    """제출한 배치 + 아이템별 배치 내 순서 기록 (재시작 후 결과를 이어받기 위함)"""
+    now = datetime.utcnow().isoformat() + "+00:00"
+    supabase.table("economy_batches").insert(
+        {
+            "name": handle["name"],
+            "model": model,
+            "key_fingerprint": handle.get("key_fingerprint"),
+            "item_count": len(refs),
+            "status": "running",
+            "locked_by": ECONOMY_INSTANCE_ID,
+            "heartbeat_at": now,
+            "submitted_at": now,
+        }
+    ).execute()
+    for index, ref in enumerate(refs):
+        if ref:
+            supabase.table("generation_batch_job_items").update(
+                {"economy_batch_name": handle["name"], "economy_batch_index": index}
+            ).eq("id", ref).execute()
+
+
+def touch_economy_batches(names: List[str]):
+    supabase.table("economy_batches").update(
+        {"heartbeat_at": datetime.utcnow().isoformat() + "+00:00"}
+    ).in_("name", names).eq("locked_by", ECONOMY_INSTANCE_ID).eq("status", "running").execute()
+
+
+def close_economy_batch(name: str, results: List[Optional[bytes]]):
+    supabase.table("economy_batches").update(
+        {
+            "status": "completed" if any(results) else "failed",
+            "completed_at": datetime.now().isoformat(),
+        }
+    ).eq("name", name).eq("locked_by", ECONOMY_INSTANCE_ID).execute()
+
+
+async def apply_economy_results(name: str, results: List[Optional[bytes]]):
+    """이어받은 배치 결과를 아이템에 반영 - 업로드/저장 후 완료, 결과 없으면 실패
+
+    배치 마무리(상태/환불/웹훅)는 중단된 배치 복구(recover_generation_batches)에서 처리
+    """
+    items = (
+        supabase.table("generation_batch_job_items")
+        .select("id, batch_id, economy_batch_index, mode, model_type, category, gender, target")
+        .eq("economy_batch_name", name)
+        .in_("status", ["queued", "processing"])
+        .execute()
+    ).data or []
+    if not items:
+        return
+
+    owners = (
+        supabase.table("generation_batch_jobs")
+        .select("id, user_id")
+        .in_("id", list({item["batch_id"] for item in items}))
+        .execute()
+    ).data or []
+    user_ids = {row["id"]: row["user_id"] for row in owners}
+
+    completed = 0
+    for item in items:
+        index = item.get("economy_batch_index")
+        image_bytes = results[index] if index is not None and index < len(results) else None
+        user_id = user_ids.get(item["batch_id"])
+        try:
+            if not image_bytes or not user_id:
+                raise RuntimeError("이미지 생성에 실패했습니다")
+
+            config = MODEL_CONFIG[item["model_type"]]
+            prompt = build_generation_prompt(
+                item["mode"], item["category"], item["gender"], item["target"]
+            )
+            now = time.time()
+            _, image_urls, timings = await upload_generation(user_id, image_bytes, now, now)
+            await save_generation(
+                user_id,
+                image_urls,
+                item["mode"],
+                item["model_type"],
+                config["credits"],
+                model=config["model"],
+                prompt=prompt,
+                timings=timings,
+            )
+            supabase.table("generation_batch_job_items").update(
+                {
+                    "status": "completed",
+                    "image_urls": image_urls,
+                    "completed_at": datetime.now().isoformat(),
+                }
+            ).eq("id", item["id"]).execute()
+            completed += 1
+        except Exception as e:
+            supabase.table("generation_batch_job_items").update(
+                {
+                    "status": "failed",
+                    "error_message": str(e),
+                    "completed_at": datetime.now().isoformat(),
+                }
+            ).eq("id", item["id"]).execute()
+
+    print(f"이어받은 이코노미 배치 반영 ({name}): 완료 {completed}건, 실패 {len(items) - completed}건")
+
+
+async def recover_economy_batches():
+    """heartbeat가 끊긴 이코노미 배치를 이어받아 폴링 재개"""
+    if not economy_lane.backend.persistent:
+        return
+    try:
+        result = (
+            supabase.table("economy_batches")
+            .select("*")
+            .eq("status", "running")
+            .execute()
+        )
+    except Exception as e:
+        print(f"이코노미 배치 복구 조회 오류: {e}")
+        return
+
+    now = time.time()
+    attached = {batch["handle"]["name"] for batch in economy_lane.submitted}
+    for row in result.data or []:
+        if row["name"] in attached:
+            continue
+        last_seen = parse_db_timestamp(row.get("heartbeat_at")) or 0
+        if now - last_seen < ECONOMY_STALE_SECONDS:
+            continue
+
+        # heartbeat 값 기준 선점 → 다른 서버가 먼저 가져갔으면 건너뜀
+        claimed = (
+            supabase.table("economy_batches")
+            .update({
+                "locked_by": ECONOMY_INSTANCE_ID,
+                "heartbeat_at": datetime.utcnow().isoformat() + "+00:00",
+            })
+            .eq("name", row["name"])
+            .eq("status", "running")
+            .eq("heartbeat_at", row["heartbeat_at"])
+            .execute()
+        )
+        if not claimed.data:
+            continue
+
+        handle = economy_lane.backend.attach(row)
+        name = row["name"]
+        if not handle:
+            # 제출한 키가 없어져 조회 불가 → 결과 없음으로 처리 (아이템 실패 → 배치 복구에서 환불)
+            print(f"이코노미 배치 이어받기 불가 ({name}): 제출 키 없음")
+            await apply_economy_results(name, [])
+            close_economy_batch(name, [])
+            continue
+
+        print(f"이코노미 배치 이어받기: {name} ({row['item_count']}건)")
+        economy_lane.attach(
+            handle,
+            parse_db_timestamp(row.get("submitted_at")) or now,
+            lambda results, name=name: apply_economy_results(name, results),
+        )
+
+
+async def run_economy_recovery_loop():
+    while True:
+        await recover_economy_batches()
+        await asyncio.sleep(ECONOMY_STALE_SECONDS)
+
+
+@app.on_event("startup")
+async def start_economy_recovery():
+    task = asyncio.create_task(run_economy_recovery_loop())
+    economy_tasks.add(task)
+
+
+# ============================================================================
+# API 엔드포인트 - 멀티 모드 생성 (1회 업로드 → 여러 모드 동시 생성)
+# ============================================================================
+
+GENERATION_MODES = ["product", "model", "editorial_product", "editorial_model"]
+MULTI_GENERATE_MAX_JOBS = 8
+
+
+class MultiGenerateRequest(BaseModel):
+    user_id: str
+    image_base64: str
+    modes: List[str] = GENERATION_MODES
+    model_types: List[str] = ["flash"]
+    gender: str = "female"
+    category: str = "clothing"
+    target: str = "사람"
+
+
+class MultiGenerateResponse(BaseModel):
+    success: bool
+    # mode → model_type → 결과
+    results: Dict[str, Dict[str, GenerateResponse]] = {}
+    credits_used: int = 0
+    credits_refunded: int = 0
+    remaining_credits: int = 0
+    error: Optional[str] = None
+
+
+def build_multi_generate_jobs(modes: List[str], model_types: List[str]) -> List[tuple]:
+    """(mode, model_type) 조합 목록 (중복 제거, 순서 유지)"""
+    for mode in modes:
+        if mode not in GENERATION_MODES:
+            raise HTTPException(status_code=400, detail=f"잘못된 모드입니다: {mode}")
+    for model_type in model_types:
+        if model_type not in MODEL_CONFIG:
+            raise HTTPException(status_code=400, detail="잘못된 모델 타입입니다")
+
+    jobs = list(dict.fromkeys((mode, mt) for mode in modes for mt in model_types))
+    if not jobs:
+        raise HTTPException(status_code=400, detail="생성할 모드를 선택해주세요")
+    if len(jobs) > MULTI_GENERATE_MAX_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {MULTI_GENERATE_MAX_JOBS}개 조합까지 생성할 수 있습니다",
+        )
+    return jobs
+
+
+@app.post("/api/generate/multi", response_model=MultiGenerateResponse)
+async def generate_multi(request: MultiGenerateRequest):
+    jobs = build_multi_generate_jobs(request.modes, request.model_types)
+    total_credits = sum(MODEL_CONFIG[mt]["credits"] for _, mt in jobs)
+
+    current_credits = await check_credits(request.user_id, total_credits)
+    if current_credits < total_credits:
+        return MultiGenerateResponse(
+            success=False,
+            error=f"크레딧이 부족합니다. 필요: {total_credits}, 보유: {current_credits}",
+            remaining_credits=current_credits,
+        )
+
+    # 전처리 1회
+    processed_image = process_image(request.image_base64)
+
+    # 크레딧 일괄 예약 (실패분은 아래에서 환불)
+    remaining = await deduct_credits(request.user_id, total_credits)
+
+    # auto/공용 성별은 한 번만 결정 → 모든 모드에서 같은 모델 성별 사용
+    gender = convert_gender_to_model(request.gender)
+
+    async def run_job(mode: str, model_type: str) -> GenerateResponse:
+        config = MODEL_CONFIG[model_type]
+        try:
+            prompt = build_generation_prompt(
+                mode, request.category, gender, request.target
+            )
+            produced = await produce_generation(
+                request.user_id, processed_image, prompt, config["model"]
+            )
+            if not produced:
+                return GenerateResponse(
+                    success=False, error="이미지 생성에 실패했습니다. 다시 시도해주세요."
+                )
+
+            split_images, image_urls, timings = produced
+            await save_generation(
+                request.user_id,
+                image_urls,
+                mode,
+                model_type,
+                config["credits"],
+                model=config["model"],
+                prompt=prompt,
+                timings=timings,
+            )
+            return GenerateResponse(
+                success=True,
+                images=[base64.b64encode(img).decode("utf-8") for img in split_images],
+                image_urls=image_urls,
+                credits_used=config["credits"],
+            )
+        except Exception as e:
+            print(f"멀티 생성 오류 ({mode}/{model_type}): {e}")
+            return GenerateResponse(
+                success=False, error=f"이미지 생성 중 오류가 발생했습니다: {str(e)}"
+            )
+
+    outcomes = await asyncio.gather(*[run_job(mode, mt) for mode, mt in jobs])
+
+    results: Dict[str, Dict[str, GenerateResponse]] = {}
+    refund = 0
+    for (mode, model_type), outcome in zip(jobs, outcomes):
+        results.setdefault(mode, {})[model_type] = outcome
+        if not outcome.success:
+            refund += MODEL_CONFIG[model_type]["credits"]
+
+    if refund:
+        remaining = await refund_generation_credits(
+            request.user_id, refund, "multi_generation_failed"
+        )
+
+    return MultiGenerateResponse(
+        success=any(outcome.success for outcome in outcomes),
+        results=results,
+        credits_used=total_credits - refund,
+        credits_refunded=refund,
+        remaining_credits=remaining,
+        error=None if refund < total_credits else "이미지 생성에 실패했습니다",
+    )
+
+
+# ============================================================================
+# API 엔드포인트 - 결제
+# ============================================================================
+
+
+@app.post("/api/payment/create")
+async def create_payment(request: PaymentRequest):
+    if request.plan not in PRICING_PLANS:
+        raise HTTPException(status_code=400, detail="잘못된 요금제입니다")
+
+    plan = PRICING_PLANS[request.plan]
+
+    try:
+        supabase.table("payments").insert(
+            {
+                "user_id": request.user_id,
+                "order_id": request.order_id,
+                "amount": plan["price"],
+                "credits": plan["credits"],
+                "status": "pending",
+            }
+        ).execute()
+
+        return {
+            "success": True,
+            "order_id": request.order_id,
+            "amount": plan["price"],
+            "credits": plan["credits"],
+            "plan_name": plan["name"],
+        }
+    except Exception as e:
+        print(f"결제 생성 오류: {e}")
+        raise HTTPException(status_code=500, detail="결제 생성 중 오류가 발생했습니다")
+
+
+@app.post("/api/payment/confirm", response_model=PaymentResponse)
+async def confirm_payment(request: PaymentConfirmRequest):
+    try:
+        auth_string = base64.b64encode(f"{TOSS_SECRET_KEY}:".encode()).decode()
+
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                "https://api.tosspayments.com/v1/payments/confirm",
+                headers={
+                    "Authorization": f"Basic {auth_string}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "paymentKey": request.payment_key,
+                    "orderId": request.order_id,
+                    "amount": request.amount,
+                },
+            )
+
+        if response.status_code != 200:
+            error_data = response.json()
+            return PaymentResponse(
+                success=False, error=error_data.get("message", "결제 승인 실패")
+            )
+
+        payment_data = response.json()
+
+        payment_result = (
+            supabase.table("payments")
+            .select("*")
+            .eq("order_id", request.order_id)
+            .single()
+            .execute()
+        )
+
+        if not payment_result.data:
+            return PaymentResponse(success=False, error="결제 정보를 찾을 수 없습니다")
+
+        payment = payment_result.data
+        credits_to_add = payment["credits"]
+
+        supabase.table("payments").update(
+            {
+                "status": "completed",
+                "payment_key": request.payment_key,
+                "method": payment_data.get("method", ""),
+                "paid_at": datetime.now().isoformat(),
+            }
+        ).eq("order_id", request.order_id).execute()
+
+        new_credits = await add_credits(request.user_id, credits_to_add)
+
+        return PaymentResponse(
+            success=True,
+            credits=credits_to_add,
+            total_credits=new_credits,
+        )
+
+    except Exception as e:
+        print(f"결제 승인 오류: {e}")
+        return PaymentResponse(
+            success=False, error=f"결제 처리 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
+@app.get("/api/payment/config")
+async def get_payment_config():
+    return {
+        "client_key": TOSS_CLIENT_KEY,
+        "plans": PRICING_PLANS,
+    }
+
+
+# ============================================================================
+# 나이스페이 결제 API
+# ============================================================================
+
+
+class NicepayConfirmRequest(BaseModel):
+    user_id: str
+    tid: str
+    order_id: str
+    amount: int
+
+
+@app.get("/api/nicepay/config")
+async def get_nicepay_config():
+    """나이스페이 설정 반환"""
+    return {
         "client_id": NICEPAY_CLIENT_ID,
         "plans": PRICING_PLANS,
     }
@@ -1556,12 +2704,13 @@ async def delete_api_key(key_id: str):
         return {"success": False, "error": str(e)}
 
 
-async def verify_api_key(api_key: str) -> Optional[str]:
+async def verify_api_key_details(api_key: str) -> Optional[dict]:
+    """API 키 검증 → {"id": 키 id, "user_id": 사용자 id}"""
     try:
         key_hash = hash_api_key(api_key)
         result = (
             supabase.table("api_keys")
-            .select("user_id")
+            .select("id, user_id")
             .eq("key_hash", key_hash)
             .eq("is_active", True)
             .single()
@@ -1572,40 +2721,476 @@ async def verify_api_key(api_key: str) -> Optional[str]:
             supabase.table("api_keys").update(
                 {"last_used_at": datetime.now().isoformat()}
             ).eq("key_hash", key_hash).execute()
-            return result.data["user_id"]
+            return result.data
         return None
     except:
         return None
 
 
+async def verify_api_key(api_key: str) -> Optional[str]:
+    key = await verify_api_key_details(api_key)
+    return key["user_id"] if key else None
+
+
 # ============================================================================
-# 설치형 프로그램용 API
+# 웹훅 (설치형 프로그램 작업 완료 알림)
 # ============================================================================
 
+WEBHOOK_EVENTS = ["video.completed", "video.failed", "batch.completed", "batch.failed"]
+WEBHOOK_MAX_PER_KEY = 5
+WEBHOOK_TIMEOUT_SECONDS = 10
+# 재시도 간격 (초) - 모두 실패하면 failed
+WEBHOOK_RETRY_DELAYS = [10, 60, 300, 1800, 7200]
+# 시도 1회 선점 시간 (URL 검사 + 전송 타임아웃보다 길게). 인스턴스가 죽으면 만료 후 다른 인스턴스가 재시도
+WEBHOOK_LEASE_SECONDS = 60
+# 대기 중인 전송 점검 주기 / 한 번에 조회하는 개수
+WEBHOOK_SWEEP_SECONDS = 30
+WEBHOOK_SWEEP_PAGE_SIZE = 200
+WEBHOOK_INSTANCE_ID = f"{os.getenv('HOSTNAME', 'local')}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
 
-class DesktopGenerateRequest(BaseModel):
-    image_base64: str
-    mode: str = "product"
-    model_type: str = "flash"
-    gender: str = "female"
-    category: str = "clothing"
-    target: str = "사람"
+webhook_tasks: set = set()
+# 이 인스턴스에서 처리 중(대기 포함)인 전송 id - 점검 시 중복 예약 방지
+webhook_inflight: set = set()
 
 
-@app.post("/api/v1/generate")
-async def desktop_generate_image(
-    request: DesktopGenerateRequest, x_api_key: str = Header(None, alias="X-API-Key")
-):
-    if not x_api_key:
-        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+class WebhookRegisterRequest(BaseModel):
+    url: str
+    events: List[str] = WEBHOOK_EVENTS
 
-    rate_key = f"generate:{x_api_key[:20]}"
-    if not rate_limiter.is_allowed(
-        rate_key, RATE_LIMITS["generate"]["limit"], RATE_LIMITS["generate"]["window"]
-    ):
-        remaining = rate_limiter.get_remaining(
-            rate_key, RATE_LIMITS["generate"]["limit"]
-        )
+
+async def check_webhook_url(url: str) -> Optional[str]:
+    """웹훅 URL 검사 - 문제가 있으면 오류 메시지, 통과하면 None
+
+    서버에서 내부망으로 요청이 나가지 않도록 호스트를 실제로 조회해
+    사설/루프백/링크로컬 등 공인 주소가 아닌 곳을 가리키면 거부 (등록 시 + 전송 직전)
+    """
+    import ipaddress
+    from urllib.parse import urlsplit
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port or 443
+    except ValueError:
+        return "올바른 웹훅 URL이 아닙니다"
+    if parts.scheme != "https" or not parts.hostname:
+        return "웹훅 URL은 https://로 시작해야 합니다"
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+    except OSError:
+        return "웹훅 URL의 호스트를 찾을 수 없습니다"
+
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            return "내부 네트워크 주소로는 웹훅을 보낼 수 없습니다"
+    return None
+
+
+def sign_webhook_payload(secret: str, timestamp: int, body: str) -> str:
+    """HMAC-SHA256 서명 ("{timestamp}.{body}") - 수신측은 X-Autopic-Signature로 검증"""
+    digest = hmac.new(
+        secret.encode(), f"{timestamp}.{body}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def claim_webhook_attempt(delivery_id: str, attempts: int) -> bool:
+    """전송 시도 1회 선점 - 대기 중이고, 그 사이 다른 인스턴스가 시도하지 않았고(attempts), 선점이 없거나 만료된 경우만"""
+    now = datetime.utcnow()
+    result = (
+        supabase.table("webhook_deliveries")
+        .update({
+            "locked_by": WEBHOOK_INSTANCE_ID,
+            "lease_until": (now + timedelta(seconds=WEBHOOK_LEASE_SECONDS)).isoformat() + "+00:00",
+        })
+        .eq("id", delivery_id)
+        .eq("status", "pending")
+        .eq("attempts", attempts)
+        .or_(f"lease_until.is.null,lease_until.lt.{now.isoformat()}+00:00")
+        .execute()
+    )
+    return bool(result.data)
+
+
+def finish_webhook_attempt(delivery_id: str, update: dict):
+    """선점한 시도 결과 기록 + 선점 해제"""
+    supabase.table("webhook_deliveries").update(
+        {**update, "locked_by": None, "lease_until": None}
+    ).eq("id", delivery_id).eq("locked_by", WEBHOOK_INSTANCE_ID).execute()
+
+
+async def deliver_webhook(delivery_id: str):
+    """웹훅 전송 (실패 시 백오프 후 재시도, 결과는 webhook_deliveries에 기록)
+
+    시도마다 선점(claim_webhook_attempt) 후 전송 → 여러 인스턴스가 같은 전송을 예약해도 한 곳만 보냄
+    """
+    import json as json_module
+
+    while True:
+        try:
+            result = (
+                supabase.table("webhook_deliveries")
+                .select("*, api_key_webhooks(url, secret, is_active)")
+                .eq("id", delivery_id)
+                .single()
+                .execute()
+            )
+            delivery = result.data
+        except Exception as e:
+            print(f"웹훅 전송 조회 오류 ({delivery_id}): {e}")
+            return
+        if delivery.get("status") != "pending":
+            return
+
+        webhook = delivery.get("api_key_webhooks") or {}
+        attempts = delivery.get("attempts", 0)
+
+        # 기록된 다음 시도 시각까지 대기 (재시작/다른 인스턴스에서 넘어온 전송도 백오프 유지)
+        next_attempt_at = parse_db_timestamp(delivery.get("next_attempt_at"))
+        if next_attempt_at and next_attempt_at > time.time():
+            await asyncio.sleep(next_attempt_at - time.time())
+
+        try:
+            if not await asyncio.to_thread(claim_webhook_attempt, delivery_id, attempts):
+                # 다른 인스턴스가 시도 중이거나 이미 시도함 → 그쪽에서 이어서 처리
+                return
+        except Exception as e:
+            print(f"웹훅 전송 선점 오류 ({delivery_id}): {e}")
+            return
+
+        if not webhook.get("is_active"):
+            finish_webhook_attempt(delivery_id, {
+                "status": "failed",
+                "last_error": "웹훅이 비활성화되었습니다",
+            })
+            return
+
+        # 등록 이후 DNS가 내부 주소로 바뀐 경우 대비 (리다이렉트는 따라가지 않음)
+        url_error = await check_webhook_url(webhook["url"])
+        if url_error:
+            finish_webhook_attempt(delivery_id, {
+                "status": "failed",
+                "last_error": url_error,
+            })
+            return
+
+        body = json_module.dumps(
+            {
+                "id": delivery_id,
+                "event": delivery["event"],
+                "created_at": delivery["created_at"],
+                "data": delivery["payload"],
+            },
+            ensure_ascii=False,
+        )
+        timestamp = int(time.time())
+        headers = {
+            "Content-Type": "application/json",
+            "X-Autopic-Event": delivery["event"],
+            "X-Autopic-Delivery": delivery_id,
+            "X-Autopic-Signature": sign_webhook_payload(webhook["secret"], timestamp, body),
+        }
+
+        attempts += 1
+        response_status = None
+        error = None
+        try:
+            async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+                response = await client.post(webhook["url"], content=body, headers=headers)
+            response_status = response.status_code
+            if not 200 <= response.status_code < 300:
+                error = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = str(e)[:500]
+
+        update = {
+            "attempts": attempts,
+            "response_status": response_status,
+            "last_error": error,
+        }
+        if error is None:
+            update.update({"status": "delivered", "delivered_at": datetime.now().isoformat()})
+        elif attempts > len(WEBHOOK_RETRY_DELAYS):
+            update["status"] = "failed"
+        else:
+            delay = WEBHOOK_RETRY_DELAYS[attempts - 1]
+            update["next_attempt_at"] = (
+                datetime.utcnow() + timedelta(seconds=delay)
+            ).isoformat() + "+00:00"
+
+        try:
+            finish_webhook_attempt(delivery_id, update)
+        except Exception as e:
+            # 선점은 만료 후 점검에서 재시도됨
+            print(f"웹훅 전송 결과 기록 오류 ({delivery_id}): {e}")
+            return
+        if "status" in update:
+            return
+
+
+def schedule_webhook_delivery(delivery_id: str):
+    if delivery_id in webhook_inflight:
+        return
+    webhook_inflight.add(delivery_id)
+    task = asyncio.create_task(deliver_webhook(delivery_id))
+    webhook_tasks.add(task)
+    task.add_done_callback(webhook_tasks.discard)
+    task.add_done_callback(lambda _: webhook_inflight.discard(delivery_id))
+
+
+async def emit_webhook_event(
+    api_key_id: Optional[str], user_id: str, event: str, payload: dict
+):
+    """API 키에 등록된 웹훅으로 이벤트 전송 (등록된 웹훅이 없으면 무시)"""
+    if not api_key_id:
+        return
+    try:
+        result = (
+            supabase.table("api_key_webhooks")
+            .select("id, events")
+            .eq("api_key_id", api_key_id)
+            .eq("user_id", user_id)
+            .eq("is_active", True)
+            .execute()
+        )
+        webhooks = [w for w in result.data or [] if event in (w.get("events") or [])]
+        if not webhooks:
+            return
+
+        deliveries = (
+            supabase.table("webhook_deliveries")
+            .insert(
+                [
+                    {
+                        "webhook_id": webhook["id"],
+                        "event": event,
+                        "resource_id": payload.get("video_id") or payload.get("batch_id"),
+                        "payload": payload,
+                        "status": "pending",
+                    }
+                    for webhook in webhooks
+                ]
+            )
+            .execute()
+        )
+        for delivery in deliveries.data or []:
+            schedule_webhook_delivery(delivery["id"])
+    except Exception as e:
+        print(f"웹훅 이벤트 오류 ({event}): {e}")
+
+
+def list_due_webhook_deliveries(due_before: str) -> List[dict]:
+    """다음 시도 시각이 due_before 이전인 대기 중 전송 전체 (id 순 페이지 조회)"""
+    deliveries = []
+    last_id = None
+    while True:
+        query = (
+            supabase.table("webhook_deliveries")
+            .select("id, lease_until")
+            .eq("status", "pending")
+            .or_(f"next_attempt_at.is.null,next_attempt_at.lte.{due_before}")
+        )
+        if last_id:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(WEBHOOK_SWEEP_PAGE_SIZE).execute().data or []
+        deliveries += rows
+        if len(rows) < WEBHOOK_SWEEP_PAGE_SIZE:
+            return deliveries
+        last_id = rows[-1]["id"]
+
+
+async def resume_webhook_deliveries():
+    """대기 중인 웹훅 전송 예약 - 곧 시도할 차례이고 다른 인스턴스가 선점하지 않은 것만
+
+    (재시작으로 끊긴 전송, 다른 인스턴스가 죽어 선점이 만료된 전송 포함. 실제 전송 여부는 시도마다 선점으로 결정)
+    """
+    due_before = (
+        datetime.utcnow() + timedelta(seconds=WEBHOOK_SWEEP_SECONDS)
+    ).isoformat() + "+00:00"
+    try:
+        deliveries = await asyncio.to_thread(list_due_webhook_deliveries, due_before)
+    except Exception as e:
+        print(f"웹훅 전송 재개 오류: {e}")
+        return
+
+    now = time.time()
+    for delivery in deliveries:
+        lease_until = parse_db_timestamp(delivery.get("lease_until"))
+        if lease_until and lease_until > now:
+            continue
+        schedule_webhook_delivery(delivery["id"])
+
+
+async def run_webhook_sweep_loop():
+    """서버 시작 시 + WEBHOOK_SWEEP_SECONDS마다 대기 중인 전송 점검"""
+    while True:
+        await resume_webhook_deliveries()
+        await asyncio.sleep(WEBHOOK_SWEEP_SECONDS)
+
+
+@app.on_event("startup")
+async def start_webhook_deliveries():
+    task = asyncio.create_task(run_webhook_sweep_loop())
+    webhook_tasks.add(task)
+
+
+async def require_api_key(x_api_key: Optional[str]) -> dict:
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+    key = await verify_api_key_details(x_api_key)
+    if not key:
+        raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
+    return key
+
+
+@app.post("/api/v1/webhooks")
+async def register_webhook(
+    request: WebhookRegisterRequest,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+):
+    """웹훅 등록 - 서명 검증용 secret은 이 응답에서만 확인 가능"""
+    key = await require_api_key(x_api_key)
+
+    url_error = await check_webhook_url(request.url)
+    if url_error:
+        return {"success": False, "error": url_error}
+    events = [event for event in request.events if event in WEBHOOK_EVENTS]
+    if not events:
+        return {"success": False, "error": f"지원 이벤트: {', '.join(WEBHOOK_EVENTS)}"}
+
+    try:
+        existing = (
+            supabase.table("api_key_webhooks")
+            .select("id")
+            .eq("api_key_id", key["id"])
+            .eq("is_active", True)
+            .execute()
+        )
+        if len(existing.data or []) >= WEBHOOK_MAX_PER_KEY:
+            return {
+                "success": False,
+                "error": f"API 키당 최대 {WEBHOOK_MAX_PER_KEY}개의 웹훅만 등록할 수 있습니다",
+            }
+
+        secret = f"whsec_{secrets.token_urlsafe(32)}"
+        result = (
+            supabase.table("api_key_webhooks")
+            .insert(
+                {
+                    "api_key_id": key["id"],
+                    "user_id": key["user_id"],
+                    "url": request.url,
+                    "secret": secret,
+                    "events": events,
+                    "is_active": True,
+                }
+            )
+            .execute()
+        )
+        return {
+            "success": True,
+            "webhook_id": result.data[0]["id"],
+            "url": request.url,
+            "events": events,
+            "secret": secret,
+        }
+    except Exception as e:
+        print(f"웹훅 등록 오류: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/api/v1/webhooks")
+async def list_webhooks(x_api_key: str = Header(None, alias="X-API-Key")):
+    key = await require_api_key(x_api_key)
+    try:
+        result = (
+            supabase.table("api_key_webhooks")
+            .select("id, url, events, is_active, created_at")
+            .eq("api_key_id", key["id"])
+            .eq("is_active", True)
+            .execute()
+        )
+        return {"success": True, "webhooks": result.data or []}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@app.delete("/api/v1/webhooks/{webhook_id}")
+async def delete_webhook(webhook_id: str, x_api_key: str = Header(None, alias="X-API-Key")):
+    key = await require_api_key(x_api_key)
+    try:
+        supabase.table("api_key_webhooks").update({"is_active": False}).eq(
+            "id", webhook_id
+        ).eq("api_key_id", key["id"]).execute()
+        return {"success": True}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@app.get("/api/v1/webhooks/{webhook_id}/deliveries")
+async def list_webhook_deliveries(
+    webhook_id: str,
+    limit: int = 50,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+):
+    """웹훅 전송 기록 (최근순)"""
+    key = await require_api_key(x_api_key)
+    try:
+        webhook = (
+            supabase.table("api_key_webhooks")
+            .select("id")
+            .eq("id", webhook_id)
+            .eq("api_key_id", key["id"])
+            .execute()
+        )
+        if not webhook.data:
+            return {"success": False, "error": "웹훅을 찾을 수 없습니다"}
+
+        result = (
+            supabase.table("webhook_deliveries")
+            .select(
+                "id, event, resource_id, status, attempts, response_status, "
+                "last_error, next_attempt_at, created_at, delivered_at"
+            )
+            .eq("webhook_id", webhook_id)
+            .order("created_at", desc=True)
+            .limit(min(limit, 200))
+            .execute()
+        )
+        return {"success": True, "deliveries": result.data or []}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# 설치형 프로그램용 API
+# ============================================================================
+
+
+class DesktopGenerateRequest(BaseModel):
+    image_base64: str
+    mode: str = "product"
+    model_type: str = "flash"
+    gender: str = "female"
+    category: str = "clothing"
+    target: str = "사람"
+
+
+@app.post("/api/v1/generate")
+async def desktop_generate_image(
+    request: DesktopGenerateRequest, x_api_key: str = Header(None, alias="X-API-Key")
+):
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+
+    rate_key = f"generate:{x_api_key[:20]}"
+    if not rate_limiter.is_allowed(
+        rate_key, RATE_LIMITS["generate"]["limit"], RATE_LIMITS["generate"]["window"]
+    ):
+        remaining = rate_limiter.get_remaining(
+            rate_key, RATE_LIMITS["generate"]["limit"]
+        )
         raise HTTPException(
             status_code=429,
             detail=f"요청 횟수 초과. 1분 후 다시 시도해주세요. (남은 횟수: {remaining})",
@@ -1628,6 +3213,57 @@ async def desktop_generate_image(
     return await generate_image(gen_request)
 
 
+class DesktopMultiGenerateRequest(BaseModel):
+    image_base64: str
+    modes: List[str] = GENERATION_MODES
+    model_types: List[str] = ["flash"]
+    gender: str = "female"
+    category: str = "clothing"
+    target: str = "사람"
+
+
+@app.post("/api/v1/generate/multi", response_model=MultiGenerateResponse)
+async def desktop_generate_multi(
+    request: DesktopMultiGenerateRequest,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+):
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+
+    # 조합 수만큼 generate 한도 소모
+    jobs = build_multi_generate_jobs(request.modes, request.model_types)
+    rate_key = f"generate:{x_api_key[:20]}"
+    if not rate_limiter.is_allowed(
+        rate_key,
+        RATE_LIMITS["generate"]["limit"],
+        RATE_LIMITS["generate"]["window"],
+        cost=len(jobs),
+    ):
+        remaining = rate_limiter.get_remaining(
+            rate_key, RATE_LIMITS["generate"]["limit"]
+        )
+        raise HTTPException(
+            status_code=429,
+            detail=f"요청 횟수 초과. 1분 후 다시 시도해주세요. (남은 횟수: {remaining})",
+        )
+
+    user_id = await verify_api_key(x_api_key)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
+
+    multi_request = MultiGenerateRequest(
+        user_id=user_id,
+        image_base64=request.image_base64,
+        modes=request.modes,
+        model_types=request.model_types,
+        gender=request.gender,
+        category=request.category,
+        target=request.target,
+    )
+
+    return await generate_multi(multi_request)
+
+
 @app.get("/api/v1/credits")
 async def desktop_get_credits(x_api_key: str = Header(None, alias="X-API-Key")):
     if not x_api_key:
@@ -1674,60 +3310,607 @@ async def desktop_get_credits(x_api_key: str = Header(None, alias="X-API-Key")):
 
 
 # ============================================================================
-# AI 분석 API
+# 설치형 프로그램용 배치 생성 API
 # ============================================================================
 
+BATCH_MAX_ITEMS = 200
+# 계정당 동시 처리 아이템 수
+BATCH_ITEM_CONCURRENCY = int(os.getenv("BATCH_ITEM_CONCURRENCY", "3"))
+# 처리량 한도 도달 시 재확인 간격 (초)
+BATCH_ALLOWANCE_POLL_SECONDS = 2
+# 처리 중인 배치는 주기적으로 heartbeat_at 갱신 → 일정 시간 갱신이 없으면 중단된 배치로 보고 복구
+BATCH_HEARTBEAT_SECONDS = 60
+BATCH_STALE_SECONDS = int(os.getenv("BATCH_STALE_SECONDS", "300"))
+BATCH_INTERRUPTED_MESSAGE = "서버 재시작으로 배치 처리가 중단되었습니다"
 
-class AnalyzeRequest(BaseModel):
-    image_base64: str
-    product_name: str = ""
-    text_content: str = ""
-    business_type: str = "luxury"
-    categories: Dict[str, List[str]] = {}
-    brands: List[str] = []
+batch_user_slots: Dict[str, asyncio.Semaphore] = {}
+batch_tasks: set = set()
 
 
-class AnalyzeResponse(BaseModel):
-    success: bool
-    brand: str = ""
-    brand_kr: str = ""
-    category1: str = ""
-    category2: str = ""
-    product_name: str = ""
-    product_keyword: str = ""
-    gender: str = ""
+class BatchGenerateItem(BaseModel):
+    image_base64: str
+    mode: str = "product"
+    model_type: str = "flash"
+    gender: str = "female"
+    category: str = "clothing"
     target: str = "사람"
-    seo_title: str = ""
-    seo_description: str = ""
-    seo_keywords: str = ""
-    error: Optional[str] = None
+    client_ref: Optional[str] = None  # 클라이언트 측 식별자 (상품 코드 등)
 
 
-BRAND_KR_MAP = {
-    "GUCCI": "구찌",
-    "LOUIS VUITTON": "루이비통",
-    "CHANEL": "샤넬",
-    "PRADA": "프라다",
-    "HERMES": "에르메스",
-    "DIOR": "디올",
-    "BURBERRY": "버버리",
-    "BALENCIAGA": "발렌시아가",
-    "BOTTEGA VENETA": "보테가 베네타",
-    "SAINT LAURENT": "생로랑",
-    "CELINE": "셀린느",
-    "LOEWE": "로에베",
-    "FENDI": "펜디",
-    "VALENTINO": "발렌티노",
-    "GIVENCHY": "지방시",
-    "MIU MIU": "미우미우",
-    "VERSACE": "베르사체",
-    "COACH": "코치",
-    "MICHAEL KORS": "마이클코어스",
-}
+class DesktopBatchGenerateRequest(BaseModel):
+    items: List[BatchGenerateItem]
+    # interactive: 즉시 처리 / economy: Gemini 배치 모드로 모아서 처리 (최대 24시간)
+    lane: str = "interactive"
 
 
-def build_analyze_prompt(
-    business_type: str, categories: dict, brands: list, text_content: str = ""
+async def wait_for_batch_allowance(user_id: str):
+    """계정의 배치 처리량 한도 내에서만 다음 아이템 진행"""
+    rate_key = f"batch:{user_id}"
+    while not rate_limiter.is_allowed(
+        rate_key, RATE_LIMITS["batch"]["limit"], RATE_LIMITS["batch"]["window"]
+    ):
+        await asyncio.sleep(BATCH_ALLOWANCE_POLL_SECONDS)
+
+
+async def process_batch_item(
+    user_id: str, item_id: str, item: BatchGenerateItem, lane: str = "interactive"
+) -> bool:
+    """배치 아이템 1건 생성 - 성공 여부 반환"""
+    config = MODEL_CONFIG[item.model_type]
+
+    try:
+        supabase.table("generation_batch_job_items").update(
+            {"status": "processing", "started_at": datetime.now().isoformat()}
+        ).eq("id", item_id).execute()
+
+        processed_image = await asyncio.to_thread(process_image, item.image_base64)
+        prompt = build_generation_prompt(
+            item.mode, item.category, item.gender, item.target
+        )
+        produced = await produce_generation(
+            user_id, processed_image, prompt, config["model"], lane, item_id
+        )
+        if not produced:
+            raise RuntimeError("이미지 생성에 실패했습니다")
+
+        _, image_urls, timings = produced
+        await save_generation(
+            user_id,
+            image_urls,
+            item.mode,
+            item.model_type,
+            config["credits"],
+            model=config["model"],
+            prompt=prompt,
+            timings=timings,
+        )
+
+        supabase.table("generation_batch_job_items").update(
+            {
+                "status": "completed",
+                "image_urls": image_urls,
+                "completed_at": datetime.now().isoformat(),
+            }
+        ).eq("id", item_id).execute()
+        return True
+
+    except Exception as e:
+        print(f"배치 아이템 생성 오류 ({item_id}): {e}")
+        try:
+            supabase.table("generation_batch_job_items").update(
+                {
+                    "status": "failed",
+                    "error_message": str(e),
+                    "completed_at": datetime.now().isoformat(),
+                }
+            ).eq("id", item_id).execute()
+        except Exception:
+            pass
+        return False
+
+
+async def run_generation_batch(
+    batch_id: str,
+    user_id: str,
+    items: List[BatchGenerateItem],
+    item_ids: List[str],
+    lane: str = "interactive",
+    api_key_id: Optional[str] = None,
+):
+    """배치 전체 처리 (백그라운드) - 실패 아이템 크레딧 환불"""
+    slots = batch_user_slots.setdefault(
+        user_id, asyncio.Semaphore(BATCH_ITEM_CONCURRENCY)
+    )
+    counters = {"completed": 0, "failed": 0, "refund": 0}
+
+    async def beat():
+        while True:
+            try:
+                supabase.table("generation_batch_jobs").update(
+                    {"heartbeat_at": datetime.utcnow().isoformat() + "+00:00"}
+                ).eq("id", batch_id).execute()
+            except Exception as e:
+                print(f"배치 heartbeat 오류 ({batch_id}): {e}")
+            await asyncio.sleep(BATCH_HEARTBEAT_SECONDS)
+
+    heartbeat = asyncio.create_task(beat())
+
+    try:
+        supabase.table("generation_batch_jobs").update(
+            {"status": "processing", "started_at": datetime.now().isoformat()}
+        ).eq("id", batch_id).execute()
+
+        async def worker(index: int):
+            item = items[index]
+            if lane == "economy":
+                # 이코노미 레인은 인터랙티브 처리량을 쓰지 않음 → 전부 바로 대기열로
+                success = await process_batch_item(
+                    user_id, item_ids[index], item, lane
+                )
+            else:
+                async with slots:
+                    await wait_for_batch_allowance(user_id)
+                    success = await process_batch_item(user_id, item_ids[index], item)
+
+            # 처리 끝난 원본 이미지는 즉시 해제
+            items[index] = None
+            if success:
+                counters["completed"] += 1
+            else:
+                counters["failed"] += 1
+                counters["refund"] += MODEL_CONFIG[item.model_type]["credits"]
+
+            try:
+                supabase.table("generation_batch_jobs").update(
+                    {
+                        "completed_items": counters["completed"],
+                        "failed_items": counters["failed"],
+                    }
+                ).eq("id", batch_id).execute()
+            except Exception as e:
+                print(f"배치 진행률 업데이트 오류 ({batch_id}): {e}")
+
+        await asyncio.gather(*[worker(i) for i in range(len(items))])
+
+    except Exception as e:
+        print(f"배치 처리 오류 ({batch_id}): {e}")
+        import traceback
+        traceback.print_exc()
+
+    finally:
+        # 미처리 아이템(예외로 중단된 경우 포함)도 실패로 환불
+        for index, item in enumerate(items):
+            if item is not None:
+                counters["failed"] += 1
+                counters["refund"] += MODEL_CONFIG[item.model_type]["credits"]
+                try:
+                    supabase.table("generation_batch_job_items").update(
+                        {"status": "failed", "error_message": "배치 처리 중단"}
+                    ).eq("id", item_ids[index]).execute()
+                except Exception:
+                    pass
+
+        heartbeat.cancel()
+        await finish_generation_batch(
+            batch_id,
+            user_id,
+            len(item_ids),
+            counters["completed"],
+            counters["failed"],
+            counters["refund"],
+            counters["refund"],
+            api_key_id,
+        )
+
+
+async def finish_generation_batch(
+    batch_id: str,
+    user_id: str,
+    total_items: int,
+    completed_items: int,
+    failed_items: int,
+    refund: int,
+    credits_refunded: int,
+    api_key_id: Optional[str] = None,
+):
+    """배치 마무리 - 실패분 환불, 최종 상태 기록, 웹훅 전송
+
+    refund: 이번에 환불할 크레딧 / credits_refunded: 배치 전체 환불 누계
+    """
+    if refund:
+        try:
+            await refund_generation_credits(user_id, refund, f"batch_failed:{batch_id}")
+        except Exception as e:
+            print(f"배치 환불 오류 ({batch_id}): {e}")
+
+    if failed_items == 0:
+        status = "completed"
+    elif completed_items == 0:
+        status = "failed"
+    else:
+        status = "partial"
+
+    completed_at = datetime.now().isoformat()
+    supabase.table("generation_batch_jobs").update(
+        {
+            "status": status,
+            "completed_items": completed_items,
+            "failed_items": failed_items,
+            "credits_refunded": credits_refunded,
+            "completed_at": completed_at,
+        }
+    ).eq("id", batch_id).execute()
+
+    await emit_webhook_event(
+        api_key_id,
+        user_id,
+        "batch.failed" if status == "failed" else "batch.completed",
+        {
+            "batch_id": batch_id,
+            "status": status,
+            "total_items": total_items,
+            "completed_items": completed_items,
+            "failed_items": failed_items,
+            "credits_refunded": credits_refunded,
+            "completed_at": completed_at,
+        },
+    )
+
+
+async def recover_generation_batch(batch: dict):
+    """중단된 배치 정리 - 남은 아이템 실패 처리 후 아직 환불하지 않은 실패분 환불
+
+    원본 이미지는 저장하지 않으므로 재처리하지 않고 실패 + 환불로 마무리
+    """
+    batch_id = batch["id"]
+    items = (
+        supabase.table("generation_batch_job_items")
+        .select("id, status, credits, economy_batch_name")
+        .eq("batch_id", batch_id)
+        .execute()
+    ).data or []
+
+    # 제출된 이코노미 배치에 남은 아이템은 결과가 반영될 때까지 대기 (recover_economy_batches)
+    waiting = {
+        item["economy_batch_name"]
+        for item in items
+        if item["status"] in ("queued", "processing") and item.get("economy_batch_name")
+    }
+    if waiting:
+        running = (
+            supabase.table("economy_batches")
+            .select("name")
+            .in_("name", list(waiting))
+            .eq("status", "running")
+            .execute()
+        ).data
+        if running:
+            return
+
+    unfinished = [item["id"] for item in items if item["status"] in ("queued", "processing")]
+    if unfinished:
+        supabase.table("generation_batch_job_items").update(
+            {
+                "status": "failed",
+                "error_message": BATCH_INTERRUPTED_MESSAGE,
+                "completed_at": datetime.now().isoformat(),
+            }
+        ).in_("id", unfinished).in_("status", ["queued", "processing"]).execute()
+        for item in items:
+            if item["id"] in unfinished:
+                item["status"] = "failed"
+
+    completed_items = sum(1 for item in items if item["status"] == "completed")
+    failed_credits = sum(item.get("credits") or 0 for item in items if item["status"] == "failed")
+    # 중단 전에 이미 환불한 몫은 제외
+    refund = max(0, failed_credits - (batch.get("credits_refunded") or 0))
+
+    await finish_generation_batch(
+        batch_id,
+        batch["user_id"],
+        batch.get("total_items") or len(items),
+        completed_items,
+        len(items) - completed_items,
+        refund,
+        failed_credits,
+        batch.get("api_key_id"),
+    )
+    print(f"중단된 배치 복구 ({batch_id}): 실패 처리 {len(unfinished)}건, 환불 {refund} 크레딧")
+
+
+async def recover_generation_batches():
+    """heartbeat가 끊긴 배치(서버 재시작 등)를 찾아 마무리 - 여러 서버 중 한 곳만 처리"""
+    try:
+        result = (
+            supabase.table("generation_batch_jobs")
+            .select("id, user_id, total_items, credits_refunded, api_key_id, heartbeat_at, created_at")
+            .in_("status", ["queued", "processing"])
+            .execute()
+        )
+    except Exception as e:
+        print(f"배치 복구 조회 오류: {e}")
+        return
+
+    now = time.time()
+    for batch in result.data or []:
+        last_seen = parse_db_timestamp(batch.get("heartbeat_at") or batch.get("created_at")) or now
+        if now - last_seen < BATCH_STALE_SECONDS:
+            continue
+
+        # heartbeat 값 기준 선점 → 다른 서버가 먼저 가져갔으면 건너뜀
+        claim = supabase.table("generation_batch_jobs").update(
+            {"heartbeat_at": datetime.utcnow().isoformat() + "+00:00"}
+        ).eq("id", batch["id"])
+        if batch.get("heartbeat_at"):
+            claim = claim.eq("heartbeat_at", batch["heartbeat_at"])
+        else:
+            claim = claim.is_("heartbeat_at", "null")
+        if not claim.execute().data:
+            continue
+
+        try:
+            await recover_generation_batch(batch)
+        except Exception as e:
+            print(f"배치 복구 오류 ({batch['id']}): {e}")
+
+
+async def run_batch_recovery_loop():
+    """시작 직후 + 주기적으로 중단된 배치 확인 (재시작 직후엔 heartbeat가 아직 최신일 수 있음)"""
+    while True:
+        await recover_generation_batches()
+        await asyncio.sleep(BATCH_STALE_SECONDS)
+
+
+@app.on_event("startup")
+async def start_batch_recovery():
+    task = asyncio.create_task(run_batch_recovery_loop())
+    batch_tasks.add(task)
+
+
+@app.post("/api/v1/batch/generate")
+async def desktop_batch_generate(
+    request: DesktopBatchGenerateRequest,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+):
+    """
+    배치 생성 접수 (설치형 프로그램용)
+    - 아이템별 모드/카테고리/성별/타겟 지정
+    - 계정 처리량 한도(RATE_LIMITS["batch"]) 내에서 서버가 순차 스케줄링
+    - 진행 상황은 GET /api/v1/batch/{batch_id}로 조회
+    """
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+
+    rate_key = f"batch_submit:{x_api_key[:20]}"
+    if not rate_limiter.is_allowed(
+        rate_key, RATE_LIMITS["api_key"]["limit"], RATE_LIMITS["api_key"]["window"]
+    ):
+        raise HTTPException(
+            status_code=429, detail="요청 횟수 초과. 1분 후 다시 시도해주세요."
+        )
+
+    api_key = await verify_api_key_details(x_api_key)
+    if not api_key:
+        raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
+    user_id = api_key["user_id"]
+
+    items = request.items
+    if not items:
+        return {"success": False, "error": "생성할 아이템이 없습니다"}
+    if request.lane not in ("interactive", "economy"):
+        return {"success": False, "error": "잘못된 처리 방식입니다"}
+    if len(items) > BATCH_MAX_ITEMS:
+        return {
+            "success": False,
+            "error": f"한 번에 최대 {BATCH_MAX_ITEMS}개까지 접수할 수 있습니다",
+        }
+
+    for item in items:
+        if item.model_type not in MODEL_CONFIG:
+            return {"success": False, "error": "잘못된 모델 타입입니다"}
+        if item.mode not in GENERATION_MODES:
+            return {"success": False, "error": f"잘못된 모드입니다: {item.mode}"}
+
+    total_credits = sum(MODEL_CONFIG[item.model_type]["credits"] for item in items)
+    current_credits = await check_credits(user_id, total_credits)
+    if current_credits < total_credits:
+        return {
+            "success": False,
+            "error": f"크레딧이 부족합니다. 필요: {total_credits}, 보유: {current_credits}",
+        }
+
+    try:
+        batch_id = str(uuid.uuid4())
+        item_ids = [str(uuid.uuid4()) for _ in items]
+
+        supabase.table("generation_batch_jobs").insert(
+            {
+                "id": batch_id,
+                "user_id": user_id,
+                "status": "queued",
+                "lane": request.lane,
+                "api_key_id": api_key["id"],
+                "total_items": len(items),
+                "credits_reserved": total_credits,
+                "heartbeat_at": datetime.utcnow().isoformat() + "+00:00",
+            }
+        ).execute()
+
+        supabase.table("generation_batch_job_items").insert(
+            [
+                {
+                    "id": item_ids[index],
+                    "batch_id": batch_id,
+                    "item_index": index,
+                    "client_ref": item.client_ref,
+                    "mode": item.mode,
+                    "model_type": item.model_type,
+                    "category": item.category,
+                    "gender": item.gender,
+                    "target": item.target,
+                    "status": "queued",
+                    "credits": MODEL_CONFIG[item.model_type]["credits"],
+                }
+                for index, item in enumerate(items)
+            ]
+        ).execute()
+    except Exception as e:
+        print(f"배치 접수 오류: {e}")
+        return {"success": False, "error": "배치 작업을 접수할 수 없습니다"}
+
+    # 크레딧 일괄 예약 (실패 아이템은 처리 후 환불)
+    try:
+        remaining = await deduct_credits(user_id, total_credits)
+    except HTTPException as e:
+        completed_at = datetime.now().isoformat()
+        supabase.table("generation_batch_job_items").update(
+            {"status": "failed", "error_message": e.detail, "completed_at": completed_at}
+        ).eq("batch_id", batch_id).execute()
+        supabase.table("generation_batch_jobs").update(
+            {
+                "status": "failed",
+                "failed_items": len(items),
+                "credits_reserved": 0,
+                "completed_at": completed_at,
+            }
+        ).eq("id", batch_id).execute()
+        return {"success": False, "error": e.detail}
+
+    task = asyncio.create_task(
+        run_generation_batch(
+            batch_id, user_id, list(items), item_ids, request.lane, api_key["id"]
+        )
+    )
+    batch_tasks.add(task)
+    task.add_done_callback(batch_tasks.discard)
+
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "status": "queued",
+        "lane": request.lane,
+        "total_items": len(items),
+        "credits_reserved": total_credits,
+        "remaining_credits": remaining,
+    }
+
+
+@app.get("/api/v1/batch/{batch_id}")
+async def desktop_batch_status(
+    batch_id: str,
+    include_items: bool = True,
+    x_api_key: str = Header(None, alias="X-API-Key"),
+):
+    """배치 진행 상황 + 아이템별 결과 조회"""
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+
+    user_id = await verify_api_key(x_api_key)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
+
+    try:
+        result = (
+            supabase.table("generation_batch_jobs")
+            .select("*")
+            .eq("id", batch_id)
+            .eq("user_id", user_id)
+            .single()
+            .execute()
+        )
+
+        if not result.data:
+            return {"success": False, "error": "배치를 찾을 수 없습니다"}
+
+        batch = result.data
+        response = {
+            "success": True,
+            "batch_id": batch_id,
+            "status": batch.get("status"),
+            "lane": batch.get("lane", "interactive"),
+            "total_items": batch.get("total_items", 0),
+            "completed_items": batch.get("completed_items", 0),
+            "failed_items": batch.get("failed_items", 0),
+            "credits_reserved": batch.get("credits_reserved", 0),
+            "credits_refunded": batch.get("credits_refunded", 0),
+            "created_at": batch.get("created_at"),
+            "completed_at": batch.get("completed_at"),
+        }
+
+        if include_items:
+            items_result = (
+                supabase.table("generation_batch_job_items")
+                .select(
+                    "item_index, client_ref, mode, model_type, status, image_urls, error_message"
+                )
+                .eq("batch_id", batch_id)
+                .order("item_index")
+                .execute()
+            )
+            response["items"] = items_result.data or []
+
+        return response
+
+    except Exception as e:
+        print(f"배치 상태 조회 오류: {e}")
+        return {"success": False, "error": str(e)}
+
+
+# ============================================================================
+# AI 분석 API
+# ============================================================================
+
+
+class AnalyzeRequest(BaseModel):
+    image_base64: str
+    product_name: str = ""
+    text_content: str = ""
+    business_type: str = "luxury"
+    categories: Dict[str, List[str]] = {}
+    brands: List[str] = []
+
+
+class AnalyzeResponse(BaseModel):
+    success: bool
+    brand: str = ""
+    brand_kr: str = ""
+    category1: str = ""
+    category2: str = ""
+    product_name: str = ""
+    product_keyword: str = ""
+    gender: str = ""
+    target: str = "사람"
+    seo_title: str = ""
+    seo_description: str = ""
+    seo_keywords: str = ""
+    error: Optional[str] = None
+
+
+BRAND_KR_MAP = {
+    "GUCCI": "구찌",
+    "LOUIS VUITTON": "루이비통",
+    "CHANEL": "샤넬",
+    "PRADA": "프라다",
+    "HERMES": "에르메스",
+    "DIOR": "디올",
+    "BURBERRY": "버버리",
+    "BALENCIAGA": "발렌시아가",
+    "BOTTEGA VENETA": "보테가 베네타",
+    "SAINT LAURENT": "생로랑",
+    "CELINE": "셀린느",
+    "LOEWE": "로에베",
+    "FENDI": "펜디",
+    "VALENTINO": "발렌티노",
+    "GIVENCHY": "지방시",
+    "MIU MIU": "미우미우",
+    "VERSACE": "베르사체",
+    "COACH": "코치",
+    "MICHAEL KORS": "마이클코어스",
+}
+
+
+def build_analyze_prompt(
+    business_type: str, categories: dict, brands: list, text_content: str = ""
 ) -> str:
     if categories:
         category_str = ""
@@ -1869,7 +4052,10 @@ def parse_analyze_response(response: str, business_type: str) -> dict:
 
 
 async def call_claude_api_text(
-    prompt: str, image_base64: str = None, max_retries: int = 3
+    prompt: str,
+    image_base64: str = None,
+    max_retries: int = 3,
+    media_type: str = "image/jpeg",
 ) -> str:
     if not CLAUDE_API_KEY:
         return ""
@@ -1890,7 +4076,7 @@ async def call_claude_api_text(
                         "type": "image",
                         "source": {
                             "type": "base64",
-                            "media_type": "image/jpeg",
+                            "media_type": media_type,
                             "data": image_base64,
                         },
                     },
@@ -1938,6 +4124,54 @@ async def call_claude_api_text(
     return ""
 
 
+def parse_seo_response(seo_response: str) -> dict:
+    seo_data = {}
+    if seo_response:
+        try:
+            import json as json_module
+
+            if "```json" in seo_response:
+                seo_response = seo_response.split("```json")[1].split("```")[0]
+            elif "```" in seo_response:
+                seo_response = seo_response.split("```")[1].split("```")[0]
+            seo_data = json_module.loads(seo_response.strip())
+        except:
+            pass
+    return seo_data
+
+
+async def run_product_analysis(
+    request: AnalyzeRequest, image_base64: str, media_type: str
+) -> Optional[dict]:
+    """Claude 상품 분석 (전처리된 이미지 사용) - 실패 시 None"""
+    analyze_prompt = build_analyze_prompt(
+        request.business_type,
+        request.categories,
+        request.brands,
+        request.text_content,
+    )
+
+    response_text = await call_claude_api_text(
+        analyze_prompt, image_base64, media_type=media_type
+    )
+
+    if not response_text:
+        return None
+
+    return parse_analyze_response(response_text, request.business_type)
+
+
+async def run_seo_generation(parsed: dict) -> dict:
+    seo_prompt = build_seo_prompt(
+        parsed["brand"],
+        parsed["category1"],
+        parsed["category2"],
+        parsed.get("product_name", parsed["product_keyword"]),
+        parsed["gender"],
+    )
+    return parse_seo_response(await call_claude_api_text(seo_prompt))
+
+
 @app.post("/api/v1/analyze", response_model=AnalyzeResponse)
 async def analyze_product(
     request: AnalyzeRequest, x_api_key: str = Header(None, alias="X-API-Key")
@@ -1950,42 +4184,13 @@ async def analyze_product(
         raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
 
     try:
-        analyze_prompt = build_analyze_prompt(
-            request.business_type,
-            request.categories,
-            request.brands,
-            request.text_content,
-        )
-
-        response_text = await call_claude_api_text(analyze_prompt, request.image_base64)
+        image_base64, media_type = prepare_vision_base64(request.image_base64, "claude")
+        parsed = await run_product_analysis(request, image_base64, media_type)
 
-        if not response_text:
+        if not parsed:
             return AnalyzeResponse(success=False, error="분석 API 오류")
 
-        parsed = parse_analyze_response(response_text, request.business_type)
-
-        seo_prompt = build_seo_prompt(
-            parsed["brand"],
-            parsed["category1"],
-            parsed["category2"],
-            parsed.get("product_name", parsed["product_keyword"]),
-            parsed["gender"],
-        )
-
-        seo_response = await call_claude_api_text(seo_prompt)
-
-        seo_data = {}
-        if seo_response:
-            try:
-                import json as json_module
-
-                if "```json" in seo_response:
-                    seo_response = seo_response.split("```json")[1].split("```")[0]
-                elif "```" in seo_response:
-                    seo_response = seo_response.split("```")[1].split("```")[0]
-                seo_data = json_module.loads(seo_response.strip())
-            except:
-                pass
+        seo_data = await run_seo_generation(parsed)
 
         return AnalyzeResponse(
             success=True,
@@ -2007,10 +4212,137 @@ async def analyze_product(
         return AnalyzeResponse(success=False, error=str(e))
 
 
-# ============================================================================
-# SMS 인증 (솔라피)
-# ============================================================================
-
+class AnalyzeGenerateRequest(AnalyzeRequest):
+    mode: str = "product"
+    model_type: str = "flash"
+    # 미지정 시 분석 결과(GENDER/CATEGORY1/TARGET) 사용
+    gender: Optional[str] = None
+    category: Optional[str] = None
+    target: Optional[str] = None
+
+
+@app.post("/api/v1/analyze-generate")
+async def analyze_and_generate(
+    request: AnalyzeGenerateRequest, x_api_key: str = Header(None, alias="X-API-Key")
+):
+    """
+    분석 + 생성 통합 파이프라인 (설치형 프로그램용)
+
+    이미지를 한 번만 업로드/디코딩하고 Claude 분석 결과를 바로 생성에 사용.
+    응답은 NDJSON 스트림 (한 줄에 이벤트 하나):
+    - {"event": "analysis", ...}   분석 완료 즉시 전송
+    - {"event": "seo", ...}        SEO 콘텐츠
+    - {"event": "generation", ...} 생성 결과 (GenerateResponse)
+    - {"event": "error", ...}      크레딧 부족/분석 실패/생성 오류 시 (크레딧 차감 없음)
+    """
+    import json as json_module
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import StreamingResponse
+
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API 키가 필요합니다")
+
+    rate_key = f"generate:{x_api_key[:20]}"
+    if not rate_limiter.is_allowed(
+        rate_key, RATE_LIMITS["generate"]["limit"], RATE_LIMITS["generate"]["window"]
+    ):
+        remaining = rate_limiter.get_remaining(
+            rate_key, RATE_LIMITS["generate"]["limit"]
+        )
+        raise HTTPException(
+            status_code=429,
+            detail=f"요청 횟수 초과. 1분 후 다시 시도해주세요. (남은 횟수: {remaining})",
+        )
+
+    user_id = await verify_api_key(x_api_key)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
+
+    if request.model_type not in MODEL_CONFIG:
+        raise HTTPException(status_code=400, detail="잘못된 모델 타입입니다")
+
+    def to_line(event: str, payload: dict) -> bytes:
+        return (
+            json_module.dumps(
+                {"event": event, **jsonable_encoder(payload)}, ensure_ascii=False
+            )
+            + "\n"
+        ).encode("utf-8")
+
+    # 크레딧이 부족하면 유료 분석 호출 전에 종료 (생성 시점에도 다시 확인)
+    required_credits = MODEL_CONFIG[request.model_type]["credits"]
+    current_credits = await check_credits(user_id, required_credits)
+    if current_credits < required_credits:
+        insufficient = to_line(
+            "error",
+            {
+                "success": False,
+                "error": f"크레딧이 부족합니다. 필요: {required_credits}, 보유: {current_credits}",
+                "remaining_credits": current_credits,
+            },
+        )
+        return StreamingResponse(iter([insufficient]), media_type="application/x-ndjson")
+
+    # 디코딩 1회 → 프로바이더별 전처리
+    image_bytes = decode_base64_image(request.image_base64)
+    claude_bytes, claude_mime = prepare_vision_image(image_bytes, "claude")
+    gemini_bytes, _ = prepare_vision_image(image_bytes, "gemini")
+    claude_image = base64.standard_b64encode(claude_bytes).decode("utf-8")
+    gemini_image = base64.standard_b64encode(gemini_bytes).decode("utf-8")
+    del image_bytes, claude_bytes, gemini_bytes
+
+    async def stream():
+        try:
+            parsed = await run_product_analysis(request, claude_image, claude_mime)
+        except Exception as e:
+            print(f"분석 오류: {e}")
+            parsed = None
+
+        if not parsed:
+            yield to_line("error", {"success": False, "error": "분석 API 오류"})
+            return
+
+        yield to_line("analysis", {"success": True, **parsed})
+
+        gen_request = GenerateRequest(
+            user_id=user_id,
+            image_base64="",
+            mode=request.mode,
+            model_type=request.model_type,
+            gender=request.gender or parsed["gender"],
+            category=request.category or parsed["category1"],
+            target=request.target or parsed["target"],
+        )
+        category2 = "" if request.category else parsed["category2"]
+
+        async def seo_step():
+            try:
+                return "seo", await run_seo_generation(parsed)
+            except Exception as e:
+                print(f"SEO 생성 오류: {e}")
+                return "seo", {}
+
+        async def generation_step():
+            try:
+                result = await run_generation(gen_request, gemini_image, category2)
+            except HTTPException as e:
+                return "error", {"success": False, "error": e.detail}
+            except Exception as e:
+                print(f"생성 오류: {e}")
+                return "error", {"success": False, "error": str(e)}
+            return "generation", result
+
+        for next_done in asyncio.as_completed([seo_step(), generation_step()]):
+            event, payload = await next_done
+            yield to_line(event, payload)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ============================================================================
+# SMS 인증 (솔라피)
+# ============================================================================
+
 SOLAPI_API_KEY = os.getenv("SOLAPI_API_KEY", "NCSNAG6NANL6YDB5")
 SOLAPI_API_SECRET = os.getenv("SOLAPI_API_SECRET", "OU2SXN00ZPCW1ZUTCJ2MJSISV6BFXPS2")
 SOLAPI_SENDER = os.getenv("SOLAPI_SENDER", "01074708283")
@@ -2234,79 +4566,159 @@ CLEANUP_SECRET = os.getenv("CLEANUP_SECRET", "autopic-cleanup-secret-2025")
 IMAGE_RETENTION_DAYS = 7
 
 
-@app.post("/api/cleanup/expired-images")
-async def cleanup_expired_images(
-    x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
-):
-    """7일 경과한 이미지 자동 삭제 (크론잡용)"""
+# 만료 이미지 정리 배치 설정
+CLEANUP_PAGE_SIZE = int(os.getenv("CLEANUP_PAGE_SIZE", "500"))
+CLEANUP_REMOVE_CHUNK = 100  # storage.remove 한 번에 넘기는 경로 수
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", "4"))
+# 날짜 폴더 URL 정리 시 created_at 범위 여유 (자정 직전 업로드 → 자정 이후 DB 기록)
+CLEANUP_PARTITION_SLACK_SECONDS = 3600
 
-    # 보안: 시크릿 키 확인
-    if x_cleanup_secret != CLEANUP_SECRET:
-        raise HTTPException(status_code=401, detail="Unauthorized")
 
-    try:
-        # 7일 전 날짜 계산
-        cutoff_date = datetime.now() - timedelta(days=IMAGE_RETENTION_DAYS)
-        cutoff_iso = cutoff_date.isoformat()
+async def purge_expired_partitions(cutoff_date: datetime) -> dict:
+    """날짜 분할 키 보관 만료 - 만료된 날짜 폴더를 통째로 삭제하고 DB URL은 날짜별 한 번에 정리
 
-        # 삭제 대상 이미지 조회
-        result = (
+    cutoff_date는 UTC. 날짜별로 실패해도 나머지 날짜는 계속 처리하고 실패 목록을 반환
+    """
+    cutoff_day = image_partition_day(cutoff_date)
+    days = await asyncio.to_thread(image_store.list_folders, IMAGE_PARTITION_ROOT)
+    # 폴더명이 YYYY-MM-DD라 문자열 비교 = 날짜 비교. 기준일 당일 폴더는 다음 실행에서 삭제
+    expired_days = sorted(day for day in days if day < cutoff_day)
+
+    deleted_count = 0
+    deleted_days = []
+    failed_days = []
+    for day in expired_days:
+        prefix = f"{IMAGE_PARTITION_ROOT}/{day}"
+        try:
+            deleted_count += await asyncio.to_thread(image_store.delete_prefix, prefix)
+
+            # 업로드 후 DB 기록 → created_at은 같은 날이거나 자정 직후. 인덱스 범위로 좁힌 뒤 해당 날짜 키만 정리
+            day_start = datetime.strptime(day, "%Y-%m-%d")
+            range_end = day_start + timedelta(days=1, seconds=CLEANUP_PARTITION_SLACK_SECONDS)
+            supabase.table("generations").update({"generated_image_url": None}).gte(
+                "created_at", day_start.isoformat() + "+00:00"
+            ).lt("created_at", range_end.isoformat() + "+00:00").like(
+                "generated_image_url", f"%/{prefix}/%"
+            ).execute()
+            deleted_days.append(day)
+        except Exception as e:
+            print(f"날짜 폴더 정리 실패 ({day}): {e}")
+            failed_days.append({"day": day, "error": str(e)})
+
+    # generation_sets는 요청 1건 = 1행 → 삭제된 날짜 구간의 URL을 한 번에 정리 (실패한 날짜 이후는 다음 실행에서)
+    if deleted_days:
+        clear_before = min([failed["day"] for failed in failed_days] + [cutoff_day])
+        supabase.table("generation_sets").update({"image_urls": None}).lt(
+            "created_at", f"{clear_before}T00:00:00+00:00"
+        ).not_.is_("image_urls", "null").execute()
+
+    return {"deleted_days": deleted_days, "failed_days": failed_days, "deleted_count": deleted_count}
+
+
+async def purge_expired_generations(cutoff_iso: str, progress=None) -> dict:
+    """기존 키({user_id}/...) 만료 이미지 삭제 - id 기준 키셋 페이지네이션 + 청크 단위 삭제/일괄 업데이트"""
+    semaphore = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+    deleted_count = 0
+    failed_count = 0
+    last_id = None
+
+    async def remove_chunk(rows: List[dict]) -> List[str]:
+        """경로 묶음 삭제 → 성공한 행 id 반환 (실패 시 다음 실행에서 재시도)"""
+        keys = [row["key"] for row in rows if row["key"]]
+        async with semaphore:
+            try:
+                if keys:
+                    await asyncio.to_thread(image_store.delete, keys)
+            except Exception as storage_error:
+                print(f"Storage 일괄 삭제 실패 ({len(keys)}개): {storage_error}")
+                return []
+            return [row["id"] for row in rows]
+
+    while True:
+        query = (
             supabase.table("generations")
-            .select("id, user_id, generated_image_url, created_at")
+            .select("id, generated_image_url")
             .lt("created_at", cutoff_iso)
             .not_.is_("generated_image_url", "null")
-            .execute()
+            .not_.like("generated_image_url", f"%/{IMAGE_PARTITION_ROOT}/%")
+            .order("id")
+            .limit(CLEANUP_PAGE_SIZE)
         )
+        if last_id:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+        if not page:
+            break
+        last_id = page[-1]["id"]
+
+        rows = [
+            {"id": item["id"], "key": image_store.key_from_url(item.get("generated_image_url") or "")}
+            for item in page
+        ]
+        chunks = [rows[i : i + CLEANUP_REMOVE_CHUNK] for i in range(0, len(rows), CLEANUP_REMOVE_CHUNK)]
+        results = await asyncio.gather(*[remove_chunk(chunk) for chunk in chunks])
 
-        expired_items = result.data or []
-
-        if not expired_items:
-            return {
-                "success": True,
-                "message": "삭제할 이미지가 없습니다",
-                "deleted_count": 0,
-            }
-
-        deleted_count = 0
-        failed_count = 0
+        removed_ids = [generation_id for ids in results for generation_id in ids]
+        failed_count += len(rows) - len(removed_ids)
 
-        for item in expired_items:
-            try:
-                image_url = item.get("generated_image_url", "")
-                generation_id = item.get("id")
+        # DB에서 image_url을 null로 일괄 업데이트 (기록은 유지)
+        for i in range(0, len(removed_ids), CLEANUP_REMOVE_CHUNK):
+            supabase.table("generations").update({"generated_image_url": None}).in_(
+                "id", removed_ids[i : i + CLEANUP_REMOVE_CHUNK]
+            ).execute()
+        deleted_count += len(removed_ids)
+        if progress:
+            progress(deleted_count=deleted_count, failed_count=failed_count)
 
-                # Storage에서 파일 삭제
-                if image_url:
-                    try:
-                        if "generated-images/" in image_url:
-                            file_path = image_url.split("generated-images/")[1]
-                            supabase.storage.from_("generated-images").remove(
-                                [file_path]
-                            )
-                    except Exception as storage_error:
-                        print(f"Storage 삭제 실패 ({generation_id}): {storage_error}")
-
-                # DB에서 image_url을 null로 업데이트 (기록은 유지)
-                supabase.table("generations").update({"generated_image_url": None}).eq(
-                    "id", generation_id
-                ).execute()
+        if len(page) < CLEANUP_PAGE_SIZE:
+            break
 
-                deleted_count += 1
+    return {"deleted_count": deleted_count, "failed_count": failed_count}
 
-            except Exception as item_error:
-                print(f"항목 삭제 실패 ({item.get('id')}): {item_error}")
-                failed_count += 1
 
+async def run_expired_image_cleanup(params: dict, progress=None) -> dict:
+    # 7일 전 시각 (UTC, 날짜 분할/기존 키 모두 같은 기준)
+    cutoff_date = datetime.utcnow() - timedelta(days=IMAGE_RETENTION_DAYS)
+    try:
+        partitions = await purge_expired_partitions(cutoff_date)
+    except Exception as e:
+        # 날짜 폴더 목록 조회 실패 → 기존 키 정리는 계속 진행
+        print(f"날짜 폴더 목록 조회 실패: {e}")
+        partitions = {"deleted_days": [], "failed_days": [{"day": None, "error": str(e)}], "deleted_count": 0}
+    if progress:
+        progress(deleted_days=partitions["deleted_days"], deleted_count=partitions["deleted_count"])
+
+    result = await purge_expired_generations(cutoff_date.isoformat() + "+00:00", progress)
+    result["deleted_count"] += partitions["deleted_count"]
+    result["deleted_days"] = partitions["deleted_days"]
+    result["failed_days"] = partitions["failed_days"]
+
+    if result["deleted_count"] == 0 and result["failed_count"] == 0 and not result["failed_days"]:
         return {
             "success": True,
-            "message": f"{deleted_count}개 이미지 삭제 완료",
-            "deleted_count": deleted_count,
-            "failed_count": failed_count,
+            "message": "삭제할 이미지가 없습니다",
+            "deleted_count": 0,
         }
 
-    except Exception as e:
-        print(f"이미지 정리 오류: {e}")
-        return {"success": False, "error": str(e)}
+    return {
+        "success": True,
+        "message": f"{result['deleted_count']}개 이미지 삭제 완료",
+        **result,
+    }
+
+
+@app.post("/api/cleanup/expired-images")
+async def cleanup_expired_images(
+    background: bool = False,
+    x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
+):
+    """7일 경과한 이미지 자동 삭제 (크론잡용). background=true면 작업 등록 후 바로 반환"""
+
+    # 보안: 시크릿 키 확인
+    if x_cleanup_secret != CLEANUP_SECRET:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return await execute_maintenance_job("expired_images", {}, background)
 
 
 @app.get("/api/cleanup/status")
@@ -2318,7 +4730,7 @@ async def get_cleanup_status():
 
         # 만료된 이미지 수
         expired = (
-            supabase.table("generations")
+            supabase.table("generation_images")
             .select("id", count="exact")
             .lt("created_at", cutoff_7d)
             .not_.is_("generated_image_url", "null")
@@ -2327,7 +4739,7 @@ async def get_cleanup_status():
 
         # 유효한 이미지 수
         active = (
-            supabase.table("generations")
+            supabase.table("generation_images")
             .select("id", count="exact")
             .gte("created_at", cutoff_7d)
             .not_.is_("generated_image_url", "null")
@@ -2405,14 +4817,110 @@ async def get_subscription_plans():
     return {"success": True, "plans": SUBSCRIPTION_PLANS}
 
 
+# 서버 시작 시 PostgREST 스키마에서 확인한 RPC 함수 존재 여부 (확인 실패 시 비어 있음 = 미확인)
+PROBED_RPCS = [
+    "get_subscription_status",
+    "deduct_credits_atomic",
+    "add_credits_atomic",
+    "reset_subscription_credits_chunk",
+]
+rpc_capabilities: Dict[str, bool] = {}
+
+
+async def probe_rpc_capabilities():
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(
+                f"{SUPABASE_URL}/rest/v1/",
+                headers={
+                    "apikey": SUPABASE_SERVICE_KEY,
+                    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+                },
+            )
+        response.raise_for_status()
+        paths = response.json().get("paths", {})
+        for name in PROBED_RPCS:
+            rpc_capabilities[name] = f"/rpc/{name}" in paths
+        missing = [name for name, ok in rpc_capabilities.items() if not ok]
+        if missing:
+            print(f"RPC 함수 없음 (대체 경로 사용): {', '.join(missing)}")
+    except Exception as e:
+        print(f"RPC 함수 확인 실패 (요청 시 확인): {e}")
+
+
+@app.on_event("startup")
+async def start_rpc_probe():
+    await probe_rpc_capabilities()
+
+
+def is_missing_rpc_error(error: Exception) -> bool:
+    message = str(error)
+    return "PGRST202" in message or "Could not find the function" in message
+
+
+# 사용자별 구독 상태 캐시 (pricing/mypage/dashboard 페이지 조회용)
+# 구독/결제/취소/크레딧 변경 시 무효화. 프로세스별 캐시라 다른 워커의 변경은 TTL 이내 반영
+SUBSCRIPTION_STATUS_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_STATUS_TTL_SECONDS", "60"))
+SUBSCRIPTION_STATUS_CACHE_SIZE = 10000
+
+
+class SubscriptionStatusCache:
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self.entries.get(user_id)
+        if not entry:
+            return None
+        expires_at, status = entry
+        if time.time() > expires_at:
+            self.entries.pop(user_id, None)
+            return None
+        self.entries.move_to_end(user_id)
+        return status
+
+    def set(self, user_id: str, status: dict):
+        self.entries[user_id] = (time.time() + self.ttl, status)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self.entries.pop(user_id, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+subscription_status_cache = SubscriptionStatusCache(
+    SUBSCRIPTION_STATUS_TTL_SECONDS, SUBSCRIPTION_STATUS_CACHE_SIZE
+)
+
+
 @app.get("/api/subscription/{user_id}")
 async def get_subscription_status(user_id: str):
-    """사용자 구독 상태 조회"""
+    """사용자 구독 상태 조회 (캐시 우선)"""
+    cached = subscription_status_cache.get(user_id)
+    if cached:
+        return cached
+
+    status = await load_subscription_status(user_id)
+    if status.get("success"):
+        subscription_status_cache.set(user_id, status)
+    return status
+
+
+async def load_subscription_status(user_id: str) -> dict:
     try:
-        # RPC 함수 호출 시도
+        # RPC 함수 호출 (시작 시 없다고 확인됐으면 바로 직접 조회)
         try:
-            result = supabase.rpc("get_subscription_status", {"p_user_id": user_id}).execute()
-            if result.data:
+            if rpc_capabilities.get("get_subscription_status", True):
+                result = supabase.rpc("get_subscription_status", {"p_user_id": user_id}).execute()
+            else:
+                result = None
+            if result and result.data:
                 data = result.data
                 return {
                     "success": True,
@@ -2430,8 +4938,11 @@ async def get_subscription_status(user_id: str):
                     "tier": data.get("tier", "free"),
                     "credits": data.get("credits", 0),
                 }
-        except Exception:
-            pass
+        except Exception as e:
+            if is_missing_rpc_error(e):
+                rpc_capabilities["get_subscription_status"] = False
+            else:
+                print(f"구독 상태 RPC 오류: {e}")
 
         # RPC 없으면 직접 조회
         profile_result = (
@@ -3084,6 +5595,309 @@ async def nicepay_billing_subscribe(request: NicepayBillingIssueRequest):
         return {"success": False, "error": str(e)}
 
 
+# 정기 결제 갱신 체크포인트 (subscription_renewals)
+# pending → charging (결제 요청 중) → charged (결제 승인, 후속 기록 전) → completed / failed
+# 주문번호는 구독 id + 갱신 대상 기간 종료일로 고정 → 재실행해도 같은 기간은 한 번만 결제
+# charging에서 멈춘 갱신은 나이스페이에 주문번호로 조회한 뒤에만 다시 결제
+RENEWAL_CONCURRENCY = int(os.getenv("RENEWAL_CONCURRENCY", "5"))
+# 결제 요청 후 이 시간이 지나도 charging이면 중단된 것으로 보고 결제 여부 조회
+RENEWAL_CHARGING_STALE_SECONDS = int(os.getenv("RENEWAL_CHARGING_STALE_SECONDS", "600"))
+RENEWAL_SUBSCRIPTION_COLUMNS = (
+    "id, user_id, plan, billing_key, status, next_billing_date, "
+    "current_period_end, cancel_at_period_end, monthly_credits"
+)
+
+
+def renewal_order_id(subscription: dict) -> str:
+    period_end = subscription["current_period_end"][:10].replace("-", "")
+    return f"renew_{subscription['id']}_{period_end}"
+
+
+async def finalize_subscription_renewal(subscription: dict, renewal: dict) -> dict:
+    """결제 승인 이후 후속 기록 - 중간에 끊겨도 다시 실행 가능 (값은 체크포인트 기준 절대값)"""
+    order_id = renewal["order_id"]
+    new_period_end = renewal["new_period_end"]
+    credits = subscription["monthly_credits"]
+
+    # 이전 실행에서 기간 연장/크레딧 지급까지 끝났으면 건너뜀
+    period_end = datetime.fromisoformat(subscription["current_period_end"].replace("Z", "+00:00"))
+    if period_end < datetime.fromisoformat(new_period_end.replace("Z", "+00:00")):
+        supabase.table("subscriptions").update({
+            "current_period_start": subscription["current_period_end"],
+            "current_period_end": new_period_end,
+            "next_billing_date": new_period_end,
+            "last_credit_granted_at": datetime.now().isoformat(),
+            "credits_granted_this_period": credits,
+            "status": "active",
+        }).eq("id", subscription["id"]).execute()
+
+        # 크레딧 리셋 (월간 리셋형)
+        supabase.table("profiles").update({"credits": credits}).eq(
+            "id", subscription["user_id"]
+        ).execute()
+
+    # 결제/히스토리 기록은 결제 기록이 없을 때만 (재실행 시 중복 방지)
+    existing = (
+        supabase.table("payments").select("id").eq("order_id", order_id).limit(1).execute()
+    )
+    if not existing.data:
+        try:
+            supabase.table("subscription_history").insert({
+                "subscription_id": subscription["id"],
+                "user_id": subscription["user_id"],
+                "event_type": "renewed",
+                "plan": subscription.get("plan"),
+                "amount": renewal["amount"],
+                "credits_granted": credits,
+                "payment_key": renewal.get("tid"),
+            }).execute()
+        except Exception:
+            pass
+
+        supabase.table("payments").insert({
+            "user_id": subscription["user_id"],
+            "order_id": order_id,
+            "amount": renewal["amount"],
+            "credits": credits,
+            "status": "completed",
+            "payment_key": renewal.get("tid"),
+            "method": renewal.get("method") or "card",
+            "paid_at": datetime.now().isoformat(),
+        }).execute()
+
+    supabase.table("subscription_renewals").update({
+        "status": "completed",
+        "updated_at": datetime.now().isoformat(),
+    }).eq("order_id", order_id).execute()
+    subscription_status_cache.invalidate(subscription["user_id"])
+
+    return {
+        "success": True,
+        "subscription_id": subscription["id"],
+        "status": "renewed",
+        "credits_granted": credits,
+        "new_period_end": new_period_end,
+    }
+
+
+def nicepay_auth_header() -> str:
+    auth_string = base64.b64encode(f"{NICEPAY_CLIENT_ID}:{NICEPAY_SECRET_KEY}".encode()).decode()
+    return f"Basic {auth_string}"
+
+
+async def lookup_renewal_payment(renewal: dict) -> Optional[dict]:
+    """
+    charging에서 멈춘 갱신의 결제 여부를 나이스페이에 주문번호로 조회
+    - 결제됨: 결제 정보 반환 / 결제 안 됨: {} / 조회 실패: None (판단 보류)
+    """
+    started_at = parse_db_timestamp(renewal.get("charging_at") or renewal.get("updated_at"))
+    if started_at is None:
+        return None
+    # 나이스페이 주문일자는 한국시간 기준
+    order_date = datetime.utcfromtimestamp(started_at + 9 * 3600).strftime("%Y-%m-%d")
+
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.get(
+                f"https://api.nicepay.co.kr/v1/payments/find/{renewal['order_id']}",
+                headers={"Authorization": nicepay_auth_header()},
+                params={"orderDate": order_date},
+            )
+    except Exception as e:
+        print(f"갱신 결제 조회 오류 ({renewal['order_id']}): {e}")
+        return None
+
+    if response.status_code != 200:
+        print(f"갱신 결제 조회 실패 ({renewal['order_id']}): HTTP {response.status_code}")
+        return None
+    data = response.json()
+    if data.get("resultCode") == "0000" and data.get("status") == "paid":
+        return data
+    return {}
+
+
+async def mark_renewal_charged(subscription: dict, renewal: dict, payment_data: dict) -> dict:
+    renewal.update({
+        "status": "charged",
+        "tid": payment_data.get("tid"),
+        "method": payment_data.get("payMethod", "card"),
+    })
+    supabase.table("subscription_renewals").update({
+        "status": "charged",
+        "tid": renewal["tid"],
+        "method": renewal["method"],
+        "updated_at": datetime.utcnow().isoformat() + "+00:00",
+    }).eq("order_id", renewal["order_id"]).execute()
+
+    return await finalize_subscription_renewal(subscription, renewal)
+
+
+async def resume_charging_renewal(subscription: dict, renewal: dict) -> dict:
+    """결제 요청 중 중단된 갱신 - 나이스페이 조회 결과로 마무리하거나 pending으로 되돌림"""
+    order_id = renewal["order_id"]
+    started_at = parse_db_timestamp(renewal.get("charging_at") or renewal.get("updated_at"))
+    if started_at is not None and time.time() - started_at < RENEWAL_CHARGING_STALE_SECONDS:
+        return {"success": False, "error": "다른 작업에서 결제 중입니다"}
+
+    payment_data = await lookup_renewal_payment(renewal)
+    if payment_data is None:
+        return {"success": False, "error": "결제 여부를 확인할 수 없어 다음 실행에서 다시 확인합니다"}
+    if payment_data:
+        print(f"중단된 갱신 결제 확인됨 → 마무리: {order_id}")
+        return await mark_renewal_charged(subscription, renewal, payment_data)
+
+    # 결제되지 않음 → 다시 결제할 수 있게 되돌림 (다른 작업이 먼저 되돌렸으면 그쪽에 맡김)
+    reverted = (
+        supabase.table("subscription_renewals")
+        .update({"status": "pending", "updated_at": datetime.utcnow().isoformat() + "+00:00"})
+        .eq("order_id", order_id)
+        .eq("status", "charging")
+        .eq("attempts", renewal["attempts"])
+        .execute()
+    )
+    if not reverted.data:
+        return {"success": False, "error": "다른 작업에서 처리 중입니다"}
+    renewal.update(reverted.data[0])
+    return None
+
+
+async def renew_billing_subscription(subscription: dict, retry_failed: bool = False) -> dict:
+    """
+    구독 1건 갱신 (체크포인트 기준으로 이미 처리된 단계는 건너뜀)
+    - retry_failed: 결제 실패로 끝난 같은 기간 갱신을 다시 시도 (수동 재시도용)
+    """
+    subscription_id = subscription["id"]
+    bid = subscription.get("billing_key")
+
+    if not bid:
+        return {"success": False, "error": "빌키가 없습니다"}
+
+    # 취소 예정인 경우
+    if subscription.get("cancel_at_period_end"):
+        supabase.table("subscriptions").update({"status": "expired"}).eq(
+            "id", subscription_id
+        ).execute()
+        supabase.table("profiles").update({"tier": "free"}).eq(
+            "id", subscription["user_id"]
+        ).execute()
+        subscription_status_cache.invalidate(subscription["user_id"])
+        return {"success": True, "status": "expired"}
+
+    plan = subscription.get("plan")
+    plan_info = SUBSCRIPTION_PLANS.get(plan)
+    if not plan_info:
+        return {"success": False, "error": "플랜 정보가 없습니다"}
+
+    amount = plan_info["price"]
+    order_id = renewal_order_id(subscription)
+    new_period_end = (
+        datetime.fromisoformat(subscription["current_period_end"].replace("Z", "+00:00"))
+        + timedelta(days=30)
+    ).isoformat()
+
+    # 체크포인트 생성 (이미 있으면 유지)
+    supabase.table("subscription_renewals").upsert(
+        {
+            "order_id": order_id,
+            "subscription_id": subscription_id,
+            "user_id": subscription["user_id"],
+            "amount": amount,
+            "new_period_end": new_period_end,
+        },
+        on_conflict="order_id",
+        ignore_duplicates=True,
+    ).execute()
+    renewal = (
+        supabase.table("subscription_renewals")
+        .select("*")
+        .eq("order_id", order_id)
+        .single()
+        .execute()
+    ).data
+
+    if renewal["status"] == "completed":
+        return {"success": True, "subscription_id": subscription_id, "status": "already_renewed"}
+    if renewal["status"] == "charged":
+        return await finalize_subscription_renewal(subscription, renewal)
+    if renewal["status"] == "charging":
+        resumed = await resume_charging_renewal(subscription, renewal)
+        if resumed is not None:
+            return resumed
+    if renewal["status"] == "failed":
+        if not retry_failed:
+            return {"success": False, "error": renewal.get("error") or "결제 실패"}
+        # 수동 재시도 → pending으로 되돌린 뒤 같은 주문번호로 다시 결제
+        reopened = (
+            supabase.table("subscription_renewals")
+            .update({"status": "pending", "error": None, "updated_at": datetime.utcnow().isoformat() + "+00:00"})
+            .eq("order_id", order_id)
+            .eq("status", "failed")
+            .execute()
+        )
+        if not reopened.data:
+            return {"success": False, "error": "다른 작업에서 처리 중입니다"}
+        renewal.update(reopened.data[0])
+
+    # 결제 시도 선점: pending → charging 상태 전환에 성공한 작업만 결제
+    # (동시에 실행된 다른 갱신, 결제 결과를 모르는 채 중단된 이전 실행과 중복 결제 방지)
+    now = datetime.utcnow().isoformat() + "+00:00"
+    claimed = (
+        supabase.table("subscription_renewals")
+        .update({
+            "status": "charging",
+            "attempts": renewal["attempts"] + 1,
+            "charging_at": now,
+            "updated_at": now,
+        })
+        .eq("order_id", order_id)
+        .eq("status", "pending")
+        .execute()
+    )
+    if not claimed.data:
+        return {"success": False, "error": "다른 작업에서 처리 중입니다"}
+    renewal.update(claimed.data[0])
+
+    order_name = f"AUTOPIC {plan_info['name']} 구독 갱신"
+
+    try:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            payment_response = await client.post(
+                f"https://api.nicepay.co.kr/v1/subscribe/{bid}/payments",
+                headers={
+                    "Authorization": nicepay_auth_header(),
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "orderId": order_id,
+                    "amount": amount,
+                    "goodsName": order_name,
+                    "cardQuota": 0,
+                    "useShopInterest": False,
+                },
+            )
+    except Exception as e:
+        # 결제 여부를 알 수 없음 → charging 유지, 다음 실행에서 주문번호로 조회 후 처리
+        print(f"갱신 결제 요청 오류 ({order_id}): {e}")
+        return {"success": False, "error": "결제 결과를 확인하지 못했습니다. 다음 실행에서 확인합니다"}
+
+    payment_data = payment_response.json() if payment_response.status_code == 200 else {}
+    if payment_data.get("resultCode") != "0000":
+        error = payment_data.get("resultMsg", "결제 실패")
+        # 결제 실패 처리
+        supabase.table("subscriptions").update({
+            "status": "payment_failed",
+        }).eq("id", subscription_id).execute()
+        supabase.table("subscription_renewals").update({
+            "status": "failed",
+            "error": error,
+            "updated_at": datetime.utcnow().isoformat() + "+00:00",
+        }).eq("order_id", order_id).eq("status", "charging").execute()
+        subscription_status_cache.invalidate(subscription["user_id"])
+        return {"success": False, "error": error}
+
+    return await mark_renewal_charged(subscription, renewal, payment_data)
+
+
 @app.post("/api/nicepay/billing/renew")
 async def nicepay_billing_renew(subscription_id: str):
     """
@@ -3094,7 +5908,7 @@ async def nicepay_billing_renew(subscription_id: str):
         # 구독 정보 조회
         subscription_result = (
             supabase.table("subscriptions")
-            .select("*")
+            .select(RENEWAL_SUBSCRIPTION_COLUMNS)
             .eq("id", subscription_id)
             .single()
             .execute()
@@ -3103,141 +5917,31 @@ async def nicepay_billing_renew(subscription_id: str):
         if not subscription_result.data:
             return {"success": False, "error": "구독을 찾을 수 없습니다"}
         
-        subscription = subscription_result.data
-        bid = subscription.get("billing_key")
+        # 수동 호출은 결제 실패로 끝난 같은 기간 갱신도 다시 시도
+        return await renew_billing_subscription(subscription_result.data, retry_failed=True)
         
-        if not bid:
-            return {"success": False, "error": "빌키가 없습니다"}
-        
-        # 취소 예정인 경우
-        if subscription.get("cancel_at_period_end"):
-            supabase.table("subscriptions").update({"status": "expired"}).eq(
-                "id", subscription_id
-            ).execute()
-            supabase.table("profiles").update({"tier": "free"}).eq(
-                "id", subscription["user_id"]
-            ).execute()
-            return {"success": True, "status": "expired"}
-        
-        # 결제 실행
-        plan = subscription.get("plan")
-        plan_info = SUBSCRIPTION_PLANS.get(plan)
-        if not plan_info:
-            return {"success": False, "error": "플랜 정보가 없습니다"}
-        
-        amount = plan_info["price"]
-        order_id = f"renew_{subscription['user_id'][:8]}_{int(datetime.now().timestamp())}"
-        order_name = f"AUTOPIC {plan_info['name']} 구독 갱신"
-        
-        auth_string = base64.b64encode(f"{NICEPAY_CLIENT_ID}:{NICEPAY_SECRET_KEY}".encode()).decode()
-        
-        async with httpx.AsyncClient() as client:
-            payment_response = await client.post(
-                f"https://api.nicepay.co.kr/v1/subscribe/{bid}/payments",
-                headers={
-                    "Authorization": f"Basic {auth_string}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "orderId": order_id,
-                    "amount": amount,
-                    "goodsName": order_name,
-                    "cardQuota": 0,
-                    "useShopInterest": False,
-                },
-            )
-        
-        if payment_response.status_code != 200:
-            # 결제 실패 처리
-            supabase.table("subscriptions").update({
-                "status": "payment_failed",
-            }).eq("id", subscription_id).execute()
-            return {"success": False, "error": "결제 실패"}
-        
-        payment_data = payment_response.json()
-        
-        if payment_data.get("resultCode") != "0000":
-            supabase.table("subscriptions").update({
-                "status": "payment_failed",
-            }).eq("id", subscription_id).execute()
-            return {"success": False, "error": payment_data.get("resultMsg", "결제 실패")}
-        
-        # 구독 갱신
-        new_period_end = (
-            datetime.fromisoformat(subscription["current_period_end"].replace("Z", "+00:00"))
-            + timedelta(days=30)
-        ).isoformat()
-        
-        supabase.table("subscriptions").update({
-            "current_period_start": subscription["current_period_end"],
-            "current_period_end": new_period_end,
-            "next_billing_date": new_period_end,
-            "last_credit_granted_at": datetime.now().isoformat(),
-            "credits_granted_this_period": subscription["monthly_credits"],
-            "status": "active",
-        }).eq("id", subscription_id).execute()
-        
-        # 크레딧 리셋 (월간 리셋형)
-        supabase.table("profiles").update({
-            "credits": subscription["monthly_credits"]
-        }).eq("id", subscription["user_id"]).execute()
-        
-        # 결제 기록
-        supabase.table("payments").insert({
-            "user_id": subscription["user_id"],
-            "order_id": order_id,
-            "amount": amount,
-            "credits": subscription["monthly_credits"],
-            "status": "completed",
-            "payment_key": payment_data.get("tid"),
-            "method": payment_data.get("payMethod", "card"),
-            "paid_at": datetime.now().isoformat(),
-        }).execute()
-        
-        # 히스토리 기록
-        try:
-            supabase.table("subscription_history").insert({
-                "subscription_id": subscription_id,
-                "user_id": subscription["user_id"],
-                "event_type": "renewed",
-                "plan": plan,
-                "amount": amount,
-                "credits_granted": subscription["monthly_credits"],
-                "payment_key": payment_data.get("tid"),
-            }).execute()
-        except Exception:
-            pass
-        
-        return {
-            "success": True,
-            "subscription_id": subscription_id,
-            "status": "renewed",
-            "credits_granted": subscription["monthly_credits"],
-            "new_period_end": new_period_end,
-        }
-        
-    except Exception as e:
-        print(f"구독 갱신 오류: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"success": False, "error": str(e)}
-
-
-@app.post("/api/nicepay/billing/cancel")
-async def nicepay_billing_cancel(user_id: str, immediate: bool = False, reason: str = None):
-    """
-    나이스페이 구독 취소 (빌키 삭제)
-    """
-    try:
-        # 구독 정보 조회
-        subscription_result = (
-            supabase.table("subscriptions")
-            .select("*")
-            .eq("user_id", user_id)
-            .eq("status", "active")
-            .single()
-            .execute()
-        )
+    except Exception as e:
+        print(f"구독 갱신 오류: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"success": False, "error": str(e)}
+
+
+@app.post("/api/nicepay/billing/cancel")
+async def nicepay_billing_cancel(user_id: str, immediate: bool = False, reason: str = None):
+    """
+    나이스페이 구독 취소 (빌키 삭제)
+    """
+    try:
+        # 구독 정보 조회
+        subscription_result = (
+            supabase.table("subscriptions")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("status", "active")
+            .single()
+            .execute()
+        )
         
         if not subscription_result.data:
             return {"success": False, "error": "활성화된 구독이 없습니다"}
@@ -3284,6 +5988,7 @@ async def nicepay_billing_cancel(user_id: str, immediate: bool = False, reason:
                 "cancelled_at": datetime.now().isoformat(),
                 "cancellation_reason": reason,
             }).eq("id", subscription["id"]).execute()
+        subscription_status_cache.invalidate(user_id)
         
         # 히스토리 기록
         try:
@@ -3312,63 +6017,100 @@ async def nicepay_billing_cancel(user_id: str, immediate: bool = False, reason:
 # 크론잡: 매일 갱신 대상 구독 결제 처리
 @app.post("/api/cron/subscription-billing")
 async def process_subscription_billing(
+    background: bool = False,
     x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
 ):
     """
     정기 결제 갱신 처리 (매일 크론잡으로 실행)
     - next_billing_date가 오늘인 구독 대상
+    - background=true면 작업 등록 후 바로 반환
     """
     if x_cleanup_secret != CLEANUP_SECRET:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    try:
-        today = datetime.now().date().isoformat()
-        tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
-        
-        # 오늘 갱신 대상 구독 조회
-        result = (
+    return await execute_maintenance_job("subscription_billing", {}, background)
+
+
+async def run_subscription_billing(params: dict, progress=None) -> dict:
+    """오늘 갱신 대상 + 이전 실행에서 결제 후 중단된 구독을 동시 처리 (최대 RENEWAL_CONCURRENCY건)"""
+    today = datetime.now().date().isoformat()
+    tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
+
+    # 오늘 갱신 대상 구독 조회 (갱신에 필요한 컬럼 한 번에)
+    result = (
+        supabase.table("subscriptions")
+        .select(RENEWAL_SUBSCRIPTION_COLUMNS)
+        .eq("status", "active")
+        .gte("next_billing_date", today + "T00:00:00")
+        .lt("next_billing_date", tomorrow + "T00:00:00")
+        .execute()
+    )
+    due_subscriptions = {row["id"]: row for row in result.data or []}
+
+    # 결제는 됐지만 후속 기록 전에 중단된 갱신 → 체크포인트 기준으로 재결제 없이 마무리
+    # 결제 요청 중 중단된 갱신(charging) → 나이스페이 조회 후 마무리 또는 재결제
+    stuck = {
+        row["subscription_id"]: row
+        for row in (
+            supabase.table("subscription_renewals")
+            .select("*")
+            .in_("status", ["charged", "charging"])
+            .execute()
+        ).data or []
+    }
+    resumed_subscriptions = {}
+    if stuck:
+        resumed = (
             supabase.table("subscriptions")
-            .select("id, user_id, plan, billing_key, next_billing_date")
-            .eq("status", "active")
-            .gte("next_billing_date", today + "T00:00:00")
-            .lt("next_billing_date", tomorrow + "T00:00:00")
+            .select(RENEWAL_SUBSCRIPTION_COLUMNS)
+            .in_("id", list(stuck.keys()))
             .execute()
         )
-        
-        due_subscriptions = result.data or []
-        
-        if not due_subscriptions:
-            return {
-                "success": True,
-                "message": "갱신 대상 구독이 없습니다",
-                "processed_count": 0,
-            }
-        
-        success_count = 0
-        failed_count = 0
-        
-        for subscription in due_subscriptions:
-            try:
-                renew_result = await nicepay_billing_renew(subscription["id"])
-                if renew_result.get("success"):
-                    success_count += 1
-                else:
-                    failed_count += 1
-                    print(f"구독 갱신 실패 ({subscription['id']}): {renew_result.get('error')}")
-            except Exception as e:
-                failed_count += 1
-                print(f"구독 갱신 오류 ({subscription['id']}): {e}")
-        
+        resumed_subscriptions = {row["id"]: row for row in resumed.data or []}
+        for subscription_id in resumed_subscriptions:
+            due_subscriptions.pop(subscription_id, None)
+
+    if not due_subscriptions and not resumed_subscriptions:
         return {
             "success": True,
-            "message": f"{success_count}개 구독 갱신 완료, {failed_count}개 실패",
-            "processed_count": success_count,
-            "failed_count": failed_count,
+            "message": "갱신 대상 구독이 없습니다",
+            "processed_count": 0,
         }
-        
-    except Exception as e:
-        print(f"구독 갱신 크론잡 오류: {e}")
-        return {"success": False, "error": str(e)}
+
+    semaphore = asyncio.Semaphore(RENEWAL_CONCURRENCY)
+    done = []
+
+    async def run_one(subscription: dict) -> dict:
+        async with semaphore:
+            try:
+                renewal = stuck.get(subscription["id"])
+                if renewal and renewal["status"] == "charged" and subscription["id"] in resumed_subscriptions:
+                    renew_result = await finalize_subscription_renewal(subscription, renewal)
+                else:
+                    renew_result = await renew_billing_subscription(subscription)
+            except Exception as e:
+                renew_result = {"success": False, "error": str(e)}
+            if not renew_result.get("success"):
+                print(f"구독 갱신 실패 ({subscription['id']}): {renew_result.get('error')}")
+            done.append(renew_result)
+            if progress:
+                progress(processed=len(done), total=len(targets))
+            return renew_result
+
+    targets = list(due_subscriptions.values()) + list(resumed_subscriptions.values())
+    results = await asyncio.gather(*[run_one(sub) for sub in targets])
+
+    success_count = sum(1 for r in results if r.get("success"))
+    failed_count = len(results) - success_count
+    skipped_count = sum(1 for r in results if r.get("status") == "already_renewed")
+
+    return {
+        "success": True,
+        "message": f"{success_count}개 구독 갱신 완료, {failed_count}개 실패",
+        "processed_count": success_count,
+        "failed_count": failed_count,
+        "skipped_count": skipped_count,
+    }
 
 
 @app.post("/api/subscription/cancel")
@@ -3409,6 +6151,7 @@ async def cancel_subscription(request: SubscriptionCancelRequest):
                     "cancellation_reason": request.reason,
                 }
             ).eq("id", subscription["id"]).execute()
+        subscription_status_cache.invalidate(request.user_id)
 
         try:
             supabase.table("subscription_history").insert(
@@ -3459,6 +6202,7 @@ async def renew_subscription(request: SubscriptionRenewRequest):
             supabase.table("profiles").update({"tier": "free"}).eq(
                 "id", subscription["user_id"]
             ).execute()
+            subscription_status_cache.invalidate(subscription["user_id"])
             return {"success": True, "status": "expired"}
 
         new_period_end = (
@@ -3533,8 +6277,9 @@ GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID", "")
 GCP_LOCATION = os.getenv("GCP_LOCATION", "us-central1")
 GCP_SERVICE_ACCOUNT_JSON = os.getenv("GCP_SERVICE_ACCOUNT_JSON", "")
 
-# 비디오 생성 비용: 30 크레딧
+# 비디오 생성 비용: standard 30 크레딧 / fast 12 크레딧 (Veo 3.1 Fast 초당 비용 약 37%)
 VIDEO_GENERATION_CREDITS = 30
+VIDEO_FAST_CREDITS = 12
 
 # 비디오 저장 경로
 VIDEO_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "video_outputs")
@@ -3543,16 +6288,290 @@ os.makedirs(VIDEO_OUTPUT_DIR, exist_ok=True)
 
 class VideoGenerateRequest(BaseModel):
     user_id: str
-    images: List[str]  # base64 이미지 4장 (front, side, back, detail)
+    # standard: 레퍼런스 3장 고품질 / fast: 4뷰 합성 1장 빠른 미리보기
+    tier: str = "standard"
+    # True면 같은 이미지로 만든 기존 비디오가 있어도 새로 생성
+    regenerate: bool = False
+    # 레퍼런스 이미지 4장 (front, side, detail, back) - 아래 중 하나로 전달
+    images: List[str] = []  # base64
+    generation_ids: List[str] = []  # generation_images 뷰 id (서버에서 Storage 조회)
+    image_urls: List[str] = []  # 생성 결과 이미지 URL (본인 Storage 경로만 허용)
+
+
+VIDEO_SOURCE_VIEWS = ["front", "side", "detail", "back"]
+
+
+async def load_stored_image(user_id: str, url: Optional[str]) -> bytes:
+    """본인 생성 이미지를 Storage에서 조회 (LRU 캐시 경유)"""
+    key = image_store.key_from_url(url or "")
+    if not key or image_key_owner(key) != user_id:
+        raise ValueError("사용할 수 없는 이미지입니다")
+
+    filepath = await blob_cache.fetch(image_store, key)
+    if not filepath:
+        raise ValueError("이미지가 만료되었거나 찾을 수 없습니다")
+    return await asyncio.to_thread(read_file, filepath)
+
+
+def resolve_generation_image_urls(user_id: str, ids: List[str]) -> List[Optional[str]]:
+    """generation_images 뷰 id → 이미지 URL (요청 사용자 소유만)
+
+    뷰는 계산된 id라 id 조건만으로는 전체 사용자 행을 전개함 → 원본 테이블을 기본 키 + user_id로 직접 조회
+    - "{set_id}:{index}": generation_sets.image_urls[index]
+    - 그 외: 기존 generations 행
+    """
+    set_refs = {}
+    legacy_ids = []
+    for generation_id in ids:
+        set_id, _, index = generation_id.partition(":")
+        if not is_valid_video_id(set_id) or (index and not index.isdigit()):
+            raise ValueError("생성 내역을 찾을 수 없습니다")
+        if index:
+            set_refs[generation_id] = (set_id, int(index))
+        else:
+            legacy_ids.append(generation_id)
+
+    urls_by_id = {}
+    if set_refs:
+        result = (
+            supabase.table("generation_sets")
+            .select("id, image_urls")
+            .eq("user_id", user_id)
+            .in_("id", list({set_id for set_id, _ in set_refs.values()}))
+            .execute()
+        )
+        sets = {row["id"]: row.get("image_urls") or [] for row in result.data or []}
+        for generation_id, (set_id, index) in set_refs.items():
+            image_urls = sets.get(set_id)
+            if image_urls is not None and index < len(image_urls):
+                urls_by_id[generation_id] = image_urls[index]
+    if legacy_ids:
+        result = (
+            supabase.table("generations")
+            .select("id, generated_image_url")
+            .eq("user_id", user_id)
+            .in_("id", legacy_ids)
+            .execute()
+        )
+        urls_by_id.update({row["id"]: row.get("generated_image_url") for row in result.data or []})
+
+    urls = []
+    for generation_id in ids:
+        if generation_id not in urls_by_id:
+            raise ValueError("생성 내역을 찾을 수 없습니다")
+        urls.append(urls_by_id[generation_id])
+    return urls
+
+
+async def resolve_video_source_images(
+    request: VideoGenerateRequest,
+) -> Tuple[List[bytes], List[Optional[str]]]:
+    """요청의 레퍼런스 이미지 (이미지 bytes, 출처 id/URL) - 저장된 생성 결과는 서버에서 직접 조회"""
+    if request.generation_ids:
+        ids = request.generation_ids[: len(VIDEO_SOURCE_VIEWS)]
+        urls = await asyncio.to_thread(resolve_generation_image_urls, request.user_id, ids)
+        images = await asyncio.gather(
+            *[load_stored_image(request.user_id, url) for url in urls]
+        )
+        return list(images), list(ids)
+
+    if request.image_urls:
+        urls = request.image_urls[: len(VIDEO_SOURCE_VIEWS)]
+        images = await asyncio.gather(
+            *[load_stored_image(request.user_id, url) for url in urls]
+        )
+        return list(images), list(urls)
+
+    images = request.images[: len(VIDEO_SOURCE_VIEWS)]
+    return [decode_base64_image(image) for image in images], [None] * len(images)
 
 
 class VideoStatusRequest(BaseModel):
     video_id: str
 
 
+# 사용자별 재사용 가능한 비디오 최대 개수 (초과 시 오래 안 쓴 것부터 캐시 해제)
+VIDEO_CACHE_MAX_ENTRIES_PER_USER = int(os.getenv("VIDEO_CACHE_MAX_ENTRIES_PER_USER", "20"))
+
+
+def build_video_cache_key(tier_name: str, images: List[bytes]) -> str:
+    """비디오 재사용 키 - 사용되는 레퍼런스 이미지 해시 + 프롬프트 버전 + 모델"""
+    tier = VIDEO_TIERS[tier_name]
+    if tier["reference_mode"] == "composite":
+        indices = [idx for idx in (0, 1, 3, 2) if idx < len(images)]
+    else:
+        indices = [0, 1, 3] if len(images) >= 4 else [0, 1, 2]
+
+    prompt_version = get_prompt_version(tier["prompt"])
+    parts = [tier_name, tier["model"], prompt_version]
+    parts += [hashlib.sha256(images[idx]).hexdigest() for idx in indices]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def find_cached_video(user_id: str, cache_key: str) -> Optional[dict]:
+    """같은 키의 진행 중/완료 비디오 조회 → 재사용 응답. 없으면 None"""
+    try:
+        result = (
+            supabase.table("video_generations")
+            .select("id, status, tier, reuse_count, expires_at")
+            .eq("user_id", user_id)
+            .eq("cache_key", cache_key)
+            .in_("status", ["pending", "processing", "completed"])
+            .gt("expires_at", datetime.now().isoformat())
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if not result.data:
+            return None
+
+        video = result.data[0]
+        supabase.table("video_generations").update({
+            "reuse_count": (video.get("reuse_count") or 0) + 1,
+            "cache_used_at": datetime.now().isoformat(),
+        }).eq("id", video["id"]).execute()
+
+        print(f"비디오 재사용: {video['id']} ({video['status']})")
+        return {
+            "success": True,
+            "video_id": video["id"],
+            "status": video["status"],
+            "tier": video.get("tier") or "standard",
+            "credits_used": 0,
+            "reused": True,
+            "message": (
+                "같은 이미지로 생성된 비디오를 불러왔습니다."
+                if video["status"] == "completed"
+                else "같은 이미지로 생성 중인 비디오가 있습니다."
+            ),
+        }
+    except Exception as e:
+        print(f"비디오 캐시 조회 오류: {e}")
+        return None
+
+
+def video_completed_payload(video: dict) -> dict:
+    """video.completed 웹훅 payload (video_generations 행 기준)"""
+    renditions = video.get("renditions") or {}
+    return {
+        "video_id": video["id"],
+        "status": "completed",
+        "tier": video.get("tier") or "standard",
+        "video_url": video.get("video_url"),
+        "poster_url": f"/api/video/poster/{video['id']}" if "poster" in renditions else None,
+        "renditions": renditions,
+        "completed_at": video.get("completed_at"),
+    }
+
+
+async def notify_video_subscribers(video_id: str, user_id: str, event: str, payload: dict):
+    """재사용 등록된 API 키에 완료/실패 웹훅 전송 - 행마다 notified_at 선점 → 키당 1회"""
+    try:
+        claimed = (
+            supabase.table("video_webhook_subscribers")
+            .update({"notified_at": datetime.utcnow().isoformat() + "+00:00"})
+            .eq("video_id", video_id)
+            .is_("notified_at", "null")
+            .execute()
+        )
+    except Exception as e:
+        print(f"비디오 웹훅 구독 조회 오류 ({video_id}): {e}")
+        return
+    for row in claimed.data or []:
+        await emit_webhook_event(row["api_key_id"], user_id, event, payload)
+
+
+async def subscribe_video_webhook(video_id: str, user_id: str, api_key_id: Optional[str]):
+    """재사용된 비디오의 완료 웹훅 대상에 API 키 추가
+
+    - 이미 완료: 바로 video.completed 전송
+    - 진행 중: 구독 등록 → 완료/실패 처리 시 함께 전송 (등록 직후 끝났으면 여기서 전송)
+    """
+    if not api_key_id:
+        return
+    try:
+        video = (
+            supabase.table("video_generations")
+            .select("id, status, tier, video_url, renditions, completed_at, api_key_id")
+            .eq("id", video_id)
+            .single()
+            .execute()
+        ).data
+        if video["status"] == "completed":
+            await emit_webhook_event(api_key_id, user_id, "video.completed", video_completed_payload(video))
+            return
+        if video.get("api_key_id") == api_key_id:
+            # 작업을 시작한 키 → 완료 처리에서 전송
+            return
+
+        supabase.table("video_webhook_subscribers").upsert(
+            {"video_id": video_id, "api_key_id": api_key_id, "user_id": user_id},
+            on_conflict="video_id,api_key_id",
+            ignore_duplicates=True,
+        ).execute()
+
+        # 조회 ~ 등록 사이에 완료/실패했으면 완료 처리에서 구독을 못 봤을 수 있음
+        video = (
+            supabase.table("video_generations")
+            .select("id, status, tier, video_url, renditions, completed_at, error_message")
+            .eq("id", video_id)
+            .single()
+            .execute()
+        ).data
+        if video["status"] == "completed":
+            await notify_video_subscribers(video_id, user_id, "video.completed", video_completed_payload(video))
+        elif video["status"] == "failed":
+            await notify_video_subscribers(video_id, user_id, "video.failed", {
+                "video_id": video_id,
+                "status": "failed",
+                "error_message": video.get("error_message"),
+                "completed_at": video.get("completed_at"),
+            })
+    except Exception as e:
+        print(f"비디오 웹훅 구독 오류 ({video_id}): {e}")
+
+
+def evict_video_cache(user_id: str, video_id: str, cache_key: Optional[str]):
+    """새 비디오 완료 시 같은 키의 이전 비디오와 한도 초과분 캐시 해제 (비디오 자체는 유지)"""
+    try:
+        if cache_key:
+            supabase.table("video_generations").update({"cache_key": None}).eq(
+                "user_id", user_id
+            ).eq("cache_key", cache_key).neq("id", video_id).execute()
+
+        result = (
+            supabase.table("video_generations")
+            .select("id")
+            .eq("user_id", user_id)
+            .not_.is_("cache_key", "null")
+            .order("cache_used_at", desc=True)
+            .range(VIDEO_CACHE_MAX_ENTRIES_PER_USER, VIDEO_CACHE_MAX_ENTRIES_PER_USER + 100)
+            .execute()
+        )
+        stale_ids = [row["id"] for row in result.data or []]
+        if stale_ids:
+            supabase.table("video_generations").update({"cache_key": None}).in_(
+                "id", stale_ids
+            ).execute()
+    except Exception as e:
+        print(f"비디오 캐시 정리 오류: {e}")
+
+
 @app.post("/api/video/generate")
 async def generate_video(request: VideoGenerateRequest):
     """360° 비디오 생성 시작"""
+    return await start_video_generation(request)
+
+
+async def start_video_generation(
+    request: VideoGenerateRequest, api_key_id: Optional[str] = None
+):
+    """비디오 생성 접수 (api_key_id: 설치형 프로그램 요청 시 완료 웹훅 대상 키)"""
+    if video_unavailable_reason:
+        return {
+            "success": False,
+            "error": "비디오 생성을 현재 사용할 수 없습니다 (서버 설정 오류). 관리자에게 문의해주세요.",
+        }
     try:
         # 1. 크레딧 확인
         credits_result = (
@@ -3568,23 +6587,43 @@ async def generate_video(request: VideoGenerateRequest):
         
         current_credits = credits_result.data.get("credits", 0)
         
-        if current_credits < VIDEO_GENERATION_CREDITS:
-            return {
-                "success": False, 
-                "error": f"크레딧이 부족합니다. 필요: {VIDEO_GENERATION_CREDITS}, 보유: {current_credits}"
-            }
+        tier = VIDEO_TIERS.get(request.tier)
+        if not tier:
+            return {"success": False, "error": "지원하지 않는 비디오 유형입니다"}
+        required_credits = tier["credits"]
         
         # 2. 이미지 검증 (4장 필요)
-        if len(request.images) < 3:
+        source_count = len(request.generation_ids or request.image_urls or request.images)
+        if source_count < 3:
             return {"success": False, "error": "최소 3장의 이미지가 필요합니다"}
         
+        try:
+            source_images, sources = await resolve_video_source_images(request)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        
+        # 같은 이미지/프롬프트/모델로 만든 비디오가 있으면 재사용 (크레딧 차감 없음)
+        cache_key = build_video_cache_key(request.tier, source_images)
+        if not request.regenerate:
+            cached = find_cached_video(request.user_id, cache_key)
+            if cached:
+                # 재사용한 API 키도 완료 웹훅을 받도록 등록 (이미 완료된 비디오는 바로 전송)
+                await subscribe_video_webhook(cached["video_id"], request.user_id, api_key_id)
+                return cached
+        
+        if current_credits < required_credits:
+            return {
+                "success": False, 
+                "error": f"크레딧이 부족합니다. 필요: {required_credits}, 보유: {current_credits}"
+            }
+        
         # 3. 비디오 생성 레코드 생성
         video_id = str(uuid.uuid4())
         
         # 이미지 정보 저장 (base64는 너무 크므로 메타데이터만)
         source_images_meta = [
-            {"index": i, "view": ["front", "side", "detail", "back"][i]} 
-            for i in range(len(request.images))
+            {"index": i, "view": VIDEO_SOURCE_VIEWS[i], "source": sources[i]}
+            for i in range(len(source_images))
         ]
         
         insert_result = supabase.table("video_generations").insert({
@@ -3594,39 +6633,68 @@ async def generate_video(request: VideoGenerateRequest):
             "duration_seconds": 8,
             "status": "pending",
             "progress": 0,
-            "credits_used": VIDEO_GENERATION_CREDITS,
+            "tier": request.tier,
+            "cache_key": cache_key,
+            "api_key_id": api_key_id,
+            "credits_used": required_credits,
         }).execute()
         
         if not insert_result.data:
             return {"success": False, "error": "비디오 생성 작업을 시작할 수 없습니다"}
         
+        # 레퍼런스 이미지 전처리/보관 + 작업 큐 등록 (재시작 후에도 이어서 처리)
+        try:
+            references = await asyncio.to_thread(
+                store_video_references, video_id, source_images, request.tier
+            )
+            source_images = None
+            supabase.table("video_jobs").insert({
+                "id": video_id,
+                "user_id": request.user_id,
+                "status": "queued",
+                "tier": request.tier,
+                "credits": required_credits,
+                "cache_key": cache_key,
+                "api_key_id": api_key_id,
+                "reference_paths": references,
+                "heartbeat_at": datetime.utcnow().isoformat() + "+00:00",
+            }).execute()
+        except Exception as e:
+            print(f"비디오 작업 등록 오류: {e}")
+            supabase.table("video_generations").update({
+                "status": "failed",
+                "error_message": "비디오 생성 작업을 시작할 수 없습니다",
+                "completed_at": datetime.now().isoformat()
+            }).eq("id", video_id).execute()
+            return {"success": False, "error": "비디오 생성 작업을 시작할 수 없습니다"}
+        
         # 4. 크레딧 차감
         supabase.table("profiles").update({
-            "credits": current_credits - VIDEO_GENERATION_CREDITS
+            "credits": current_credits - required_credits
         }).eq("id", request.user_id).execute()
+        subscription_status_cache.invalidate(request.user_id)
         
         # 5. 사용 기록
         try:
             supabase.table("usages").insert({
                 "user_id": request.user_id,
                 "action": "video_generation",
-                "credits_used": VIDEO_GENERATION_CREDITS,
-                "metadata": {"video_id": video_id}
+                "credits_used": required_credits,
+                "metadata": {"video_id": video_id, "tier": request.tier}
             }).execute()
         except Exception:
             pass
         
-        # 6. 백그라운드에서 비디오 생성 시작
-        asyncio.create_task(
-            process_video_generation(video_id, request.user_id, request.images)
-        )
+        # 6. 비디오 워커 대기열에 등록 (유형별 워커 풀)
+        await video_workers[request.tier].submit(video_id)
         
         return {
             "success": True,
             "video_id": video_id,
             "status": "pending",
-            "credits_used": VIDEO_GENERATION_CREDITS,
-            "message": "비디오 생성이 시작되었습니다. 약 2-5분 소요됩니다."
+            "tier": request.tier,
+            "credits_used": required_credits,
+            "message": f"비디오 생성이 시작되었습니다. 약 {tier['estimated_time']} 소요됩니다."
         }
         
     except Exception as e:
@@ -3634,57 +6702,16 @@ async def generate_video(request: VideoGenerateRequest):
         return {"success": False, "error": str(e)}
 
 
-async def process_video_generation(video_id: str, user_id: str, images: List[str]):
-    """백그라운드에서 비디오 생성 처리"""
-    # 환경변수 백업 (이미지 생성 API와 충돌 방지)
-    _old_vertexai = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI")
-    _old_credentials = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-    _old_project = os.environ.get("GOOGLE_CLOUD_PROJECT")
-    _old_location = os.environ.get("GOOGLE_CLOUD_LOCATION")
-    
-    try:
-        # 상태 업데이트: processing
-        supabase.table("video_generations").update({
-            "status": "processing",
-            "progress": 10,
-            "started_at": datetime.now().isoformat()
-        }).eq("id", video_id).execute()
-        
-        # Google Vertex AI 클라이언트 초기화
-        if GCP_SERVICE_ACCOUNT_JSON and os.path.exists(GCP_SERVICE_ACCOUNT_JSON):
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GCP_SERVICE_ACCOUNT_JSON
-        
-        os.environ["GOOGLE_CLOUD_PROJECT"] = GCP_PROJECT_ID
-        os.environ["GOOGLE_CLOUD_LOCATION"] = GCP_LOCATION
-        os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
-        
-        from google.genai.types import GenerateVideosConfig, Image, VideoGenerationReferenceImage
-        
-        client = genai.Client(vertexai=True, project=GCP_PROJECT_ID, location=GCP_LOCATION)
-        
-        # 진행률 업데이트
-        supabase.table("video_generations").update({
-            "progress": 20
-        }).eq("id", video_id).execute()
-        
-        # 이미지 준비 (front, side, back 3장 사용)
-        # images[0] = front, images[1] = side, images[2] = detail, images[3] = back
-        image_indices = [0, 1, 3] if len(images) >= 4 else [0, 1, 2]
-        
-        reference_images = []
-        for idx in image_indices:
-            img_bytes = base64.b64decode(images[idx])
-            ref_img = VideoGenerationReferenceImage(
-                image=Image(
-                    image_bytes=img_bytes,
-                    mime_type="image/png"
-                ),
-                reference_type="asset"
-            )
-            reference_images.append(ref_img)
-        
-        # 프롬프트 (Standard 모델용)
-        prompt = """
+# 동시 비디오 생성 수 (Veo 작업은 수 분 단위 → 이미지 생성과 분리된 전용 워커에서 처리)
+VIDEO_MAX_CONCURRENCY = int(os.getenv("VIDEO_MAX_CONCURRENCY", "2"))
+
+# 빠른 미리보기 전용 동시 생성 수 (standard 대기열과 분리)
+VIDEO_FAST_MAX_CONCURRENCY = int(os.getenv("VIDEO_FAST_MAX_CONCURRENCY", "2"))
+
+VIDEO_MODEL = "veo-3.1-generate-preview"
+VIDEO_FAST_MODEL = "veo-3.1-fast-generate-preview"
+
+VIDEO_PROMPT = """
 Create a smooth 360-degree product rotation video.
 
 REFERENCE IMAGES:
@@ -3712,137 +6739,1161 @@ REQUIREMENTS:
 - Consistent lighting throughout
 - No morphing of product shape - only rotation
 """
-        
-        supabase.table("video_generations").update({
-            "progress": 30
-        }).eq("id", video_id).execute()
-        
-        # 비디오 생성 요청
-        operation = client.models.generate_videos(
-            model="veo-3.1-generate-preview",
-            prompt=prompt.strip(),
-            config=GenerateVideosConfig(
-                reference_images=reference_images,
-                aspect_ratio="16:9",
-                number_of_videos=1,
-                duration_seconds=8,
-            ),
+
+VIDEO_FAST_PROMPT = """
+CRITICAL VIDEO START INSTRUCTION:
+- Start the video showing ONLY ONE single product on white background
+- Do NOT show multiple products, grid, or reference images at the beginning
+- Begin IMMEDIATELY with ONLY the front view of ONE product
+- The reference image grid is for YOUR understanding only, NOT for the video output
+
+The input image shows {view_count} DIFFERENT VIEWS of the SAME product arranged horizontally for reference:
+{view_lines}
+
+Create a smooth 360-degree product rotation video:
+1. START with ONLY ONE product showing the FRONT view
+2. Slowly rotate clockwise to SIDE view
+3. {back_step}
+4. Continue rotating to other side
+5. Complete rotation back to FRONT view
+
+RULES:
+- Show ONLY ONE product throughout the entire video
+- The BACK may have different details than the front - this is correct
+- Maintain exact colors and textures from the reference views
+- Clean pure white studio background
+- Professional soft even lighting
+- Smooth, continuous rotation
+- Product centered in frame at all times
+"""
+
+# 합성 이미지 뷰 배치 순서와 프롬프트 설명
+VIDEO_COMPOSITE_ORDER = ["front", "side", "back", "detail"]
+VIDEO_COMPOSITE_VIEW_LABELS = {
+    "front": "FRONT view",
+    "side": "SIDE view",
+    "back": "BACK view (may look different from front)",
+    "detail": "DETAIL view (close-up of material and finish, not a rotation angle)",
+}
+
+
+def build_video_fast_prompt(views: List[str]) -> str:
+    """합성 이미지의 실제 뷰 배치에 맞춘 fast 프롬프트"""
+    lines = []
+    for position, view in enumerate(views, start=1):
+        if position == 1:
+            label = f"View {position} (leftmost)"
+        elif position == len(views):
+            label = f"View {position} (rightmost)"
+        else:
+            label = f"View {position}"
+        lines.append(f"- {label}: {VIDEO_COMPOSITE_VIEW_LABELS[view]}")
+
+    if "back" in views:
+        back_step = (
+            f"Continue rotating to BACK view (use View {views.index('back') + 1} "
+            "as reference - it may look different!)"
         )
-        
-        # GCP 작업 ID 저장
+    else:
+        back_step = (
+            "Continue rotating to the back (no back reference - keep it consistent "
+            "with the front and side views)"
+        )
+    return VIDEO_FAST_PROMPT.format(
+        view_count=len(views), view_lines="\n".join(lines), back_step=back_step
+    )
+
+
+# 비디오 유형
+# - standard: front/side/back 레퍼런스 3장 (asset) → Veo 3.1
+# - fast: 뷰 가로 합성 이미지 1장 (image-to-video) → Veo 3.1 Fast
+VIDEO_TIERS = {
+    "standard": {
+        "name": "고품질",
+        "model": VIDEO_MODEL,
+        "prompt": VIDEO_PROMPT,
+        "reference_mode": "assets",
+        "credits": VIDEO_GENERATION_CREDITS,
+        "concurrency": VIDEO_MAX_CONCURRENCY,
+        "expected_seconds": int(os.getenv("VIDEO_EXPECTED_SECONDS", "150")),
+        "estimated_time": "2-5분",
+    },
+    "fast": {
+        "name": "빠른 미리보기",
+        "model": VIDEO_FAST_MODEL,
+        "prompt": VIDEO_FAST_PROMPT,
+        "reference_mode": "composite",
+        "credits": VIDEO_FAST_CREDITS,
+        "concurrency": VIDEO_FAST_MAX_CONCURRENCY,
+        "expected_seconds": int(os.getenv("VIDEO_FAST_EXPECTED_SECONDS", "75")),
+        "estimated_time": "1-2분",
+    },
+}
+
+_vertex_client: Optional[genai.Client] = None
+# 비디오 인증 설정 오류 (서버 시작 시 확인). 설정되면 비디오 생성만 중단하고 나머지 API는 정상 동작
+video_unavailable_reason: Optional[str] = None
+
+
+def load_vertex_credentials():
+    """서비스 계정 인증 정보 로드 (파일 경로 또는 JSON 문자열). 없으면 기본 인증(ADC) 사용
+
+    설정 값이 잘못되면 원인을 알 수 있는 RuntimeError (서버 시작 시 확인)
+    """
+    if not GCP_SERVICE_ACCOUNT_JSON:
+        return None
+
+    import json as json_module
+    from google.oauth2 import service_account
+
+    scopes = ["https://www.googleapis.com/auth/cloud-platform"]
+    value = GCP_SERVICE_ACCOUNT_JSON.strip()
+
+    # JSON 문자열이 아니면 파일 경로로 취급
+    if not value.startswith("{"):
+        if not os.path.isfile(value):
+            raise RuntimeError(f"GCP_SERVICE_ACCOUNT_JSON 파일을 찾을 수 없습니다: {value}")
+        try:
+            return service_account.Credentials.from_service_account_file(value, scopes=scopes)
+        except ValueError as e:
+            raise RuntimeError(f"GCP_SERVICE_ACCOUNT_JSON 파일이 올바른 서비스 계정 JSON이 아닙니다 ({value}): {e}")
+
+    try:
+        info = json_module.loads(value)
+    except ValueError as e:
+        raise RuntimeError(f"GCP_SERVICE_ACCOUNT_JSON이 올바른 JSON이 아닙니다: {e}")
+    try:
+        return service_account.Credentials.from_service_account_info(info, scopes=scopes)
+    except ValueError as e:
+        raise RuntimeError(f"GCP_SERVICE_ACCOUNT_JSON이 올바른 서비스 계정 정보가 아닙니다: {e}")
+
+
+def get_vertex_client() -> genai.Client:
+    """Vertex AI 클라이언트 (명시적 설정, 프로세스 전역 환경변수 변경 없음, 재사용)"""
+    global _vertex_client
+    if _vertex_client is None:
+        _vertex_client = genai.Client(
+            vertexai=True,
+            project=GCP_PROJECT_ID,
+            location=GCP_LOCATION,
+            credentials=load_vertex_credentials(),
+        )
+    return _vertex_client
+
+
+# 전처리된 레퍼런스 이미지 보관 위치 (image_store, 재시작 후 재제출용)
+VIDEO_REFERENCE_PREFIX = "video_refs"
+
+
+# 합성 이미지의 뷰당 높이 (4뷰 가로 배치)
+VIDEO_COMPOSITE_VIEW_HEIGHT = 640
+
+
+def build_video_composite(images: List[bytes]) -> Tuple[bytes, List[str]]:
+    """뷰 가로 합성 이미지 생성 (front, side, back, detail 중 있는 뷰만 순서대로, 흰 배경)
+
+    (합성 이미지, 배치된 뷰 이름) 반환 → 프롬프트도 같은 배치로 생성
+    """
+    # images 순서는 VIDEO_SOURCE_VIEWS (front, side, detail, back)
+    layout = [
+        view for view in VIDEO_COMPOSITE_ORDER
+        if VIDEO_SOURCE_VIEWS.index(view) < len(images)
+    ]
+    height = VIDEO_COMPOSITE_VIEW_HEIGHT
+
+    views = []
+    for idx in [VIDEO_SOURCE_VIEWS.index(view) for view in layout]:
+        img = Image.open(io.BytesIO(images[idx]))
+        if img.format == "JPEG":
+            img.draft("RGB", (height * 2, height * 2))
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        width = max(1, round(img.width * height / img.height))
+        views.append(img.resize((width, height), Image.Resampling.LANCZOS))
+
+    composite = Image.new("RGB", (sum(view.width for view in views), height), (255, 255, 255))
+    x = 0
+    for view in views:
+        composite.paste(view, (x, 0))
+        x += view.width
+
+    buffer = io.BytesIO()
+    composite.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue(), layout
+
+
+def store_video_references(
+    video_id: str, images: List[bytes], tier: str = "standard"
+) -> List[dict]:
+    """레퍼런스 이미지를 Veo 입력 크기로 줄여 Storage 저장 (standard: front, side, back 3장 / fast: 4뷰 합성 1장)"""
+    if VIDEO_TIERS[tier]["reference_mode"] == "composite":
+        path = f"{VIDEO_REFERENCE_PREFIX}/{video_id}/composite.jpg"
+        composite, layout = build_video_composite(images)
+        image_store.put(path, composite, "image/jpeg")
+        return [{"path": path, "mime_type": "image/jpeg", "views": layout}]
+
+    # images[0] = front, images[1] = side, images[2] = detail, images[3] = back
+    image_indices = [0, 1, 3] if len(images) >= 4 else [0, 1, 2]
+
+    references = []
+    for order, idx in enumerate(image_indices):
+        img_bytes, mime_type = prepare_vision_image(images[idx], "veo")
+        path = f"{VIDEO_REFERENCE_PREFIX}/{video_id}/{order}.jpg"
+        image_store.put(path, img_bytes, mime_type)
+        references.append({"path": path, "mime_type": mime_type})
+    return references
+
+
+def load_video_references(references: List[dict]) -> list:
+    """Storage에서 레퍼런스 이미지를 받아 Veo 입력 이미지로 변환"""
+    from google.genai.types import Image as GenaiImage
+
+    inputs = []
+    for reference in references:
+        img_bytes = image_store.get(reference["path"])
+        if img_bytes is None:
+            raise RuntimeError("레퍼런스 이미지를 찾을 수 없습니다")
+        inputs.append(GenaiImage(image_bytes=img_bytes, mime_type=reference["mime_type"]))
+    return inputs
+
+
+def delete_video_references(references: List[dict]):
+    try:
+        paths = [reference["path"] for reference in references or []]
+        image_store.delete(paths)
+    except Exception as e:
+        print(f"레퍼런스 이미지 삭제 오류: {e}")
+
+
+# 비디오 결과물 (video_store의 {video_id}/ 아래 저장, 후처리는 VIDEO_OUTPUT_DIR/work 에서)
+# - video.mp4: 원본 (오디오 제거 + faststart)
+# - poster.jpg: 첫 프레임 포스터
+# - mobile.mp4: 480p 모바일용
+# - video.webm / hls/index.m3u8: VIDEO_EXTRA_RENDITIONS 설정 시 ("webm,hls")
+VIDEO_RENDITION_FILES = {
+    "main": ("video.mp4", "video/mp4"),
+    "poster": ("poster.jpg", "image/jpeg"),
+    "mobile": ("mobile.mp4", "video/mp4"),
+    "webm": ("video.webm", "video/webm"),
+    "hls": ("hls/index.m3u8", "application/vnd.apple.mpegurl"),
+}
+VIDEO_EXTRA_RENDITIONS = [
+    name.strip()
+    for name in os.getenv("VIDEO_EXTRA_RENDITIONS", "").split(",")
+    if name.strip() in ("webm", "hls")
+]
+FFMPEG_TIMEOUT_SECONDS = 300
+
+
+async def run_ffmpeg(args: List[str]) -> bool:
+    """ffmpeg 비동기 실행 (이벤트 루프 비차단)"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-loglevel", "error", *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        print("ffmpeg를 찾을 수 없습니다")
+        return False
+
+    try:
+        _, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=FFMPEG_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        print(f"ffmpeg 시간 초과: {args[-1]}")
+        return False
+
+    if process.returncode != 0:
+        print(f"ffmpeg 오류 ({args[-1]}): {stderr.decode(errors='ignore')[-500:]}")
+        return False
+    return True
+
+
+async def postprocess_video(video_id: str, video_bytes: bytes) -> List[str]:
+    """비디오 후처리 - faststart 리먹스, 포스터, 모바일/추가 렌디션 생성 후 저장소 업로드. 생성된 렌디션 목록 반환"""
+    video_dir = os.path.join(VIDEO_OUTPUT_DIR, "work", video_id)
+    os.makedirs(video_dir, exist_ok=True)
+    try:
+        renditions = await render_video_renditions(video_id, video_dir, video_bytes)
+        await publish_video_renditions(video_id, video_dir, renditions)
+        return renditions
+    finally:
+        await asyncio.to_thread(shutil.rmtree, video_dir, True)
+
+
+async def render_video_renditions(
+    video_id: str, video_dir: str, video_bytes: bytes
+) -> List[str]:
+
+    main_path = os.path.join(video_dir, VIDEO_RENDITION_FILES["main"][0])
+    temp_path = os.path.join(video_dir, "temp_source.mp4")
+    await asyncio.to_thread(write_file, temp_path, video_bytes)
+
+    # 오디오 제거 + moov atom 앞으로 (다운로드 완료 전 재생 시작 가능)
+    remuxed = await run_ffmpeg([
+        "-i", temp_path,
+        "-c:v", "copy",  # 비디오 코덱 복사 (재인코딩 없음)
+        "-an",  # 오디오 제거
+        "-movflags", "+faststart",
+        main_path,
+    ])
+    if remuxed:
+        os.remove(temp_path)
+        print(f"비디오 리먹스 완료: {video_id}")
+    else:
+        # ffmpeg 실패 시 원본 파일 사용
+        print(f"ffmpeg 리먹스 실패, 원본 사용: {video_id}")
+        os.replace(temp_path, main_path)
+        return ["main"]
+
+    def output(name: str) -> str:
+        return os.path.join(video_dir, VIDEO_RENDITION_FILES[name][0])
+
+    jobs = {
+        "poster": [
+            "-i", main_path,
+            "-frames:v", "1",
+            "-q:v", "3",
+            output("poster"),
+        ],
+        "mobile": [
+            "-i", main_path,
+            "-vf", "scale=-2:480",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+            "-an",
+            "-movflags", "+faststart",
+            output("mobile"),
+        ],
+    }
+    if "webm" in VIDEO_EXTRA_RENDITIONS:
+        jobs["webm"] = [
+            "-i", main_path,
+            "-c:v", "libvpx-vp9", "-crf", "35", "-b:v", "0",
+            "-an",
+            output("webm"),
+        ]
+    if "hls" in VIDEO_EXTRA_RENDITIONS:
+        os.makedirs(os.path.join(video_dir, "hls"), exist_ok=True)
+        jobs["hls"] = [
+            "-i", main_path,
+            "-c:v", "copy",
+            "-an",
+            "-hls_time", "2",
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(video_dir, "hls", "segment_%03d.ts"),
+            output("hls"),
+        ]
+
+    results = await asyncio.gather(*[run_ffmpeg(args) for args in jobs.values()])
+    return ["main"] + [name for name, ok in zip(jobs.keys(), results) if ok]
+
+
+# 업로드 후 바로 요청될 가능성이 높은 렌디션은 로컬 캐시에 남겨둠
+VIDEO_CACHE_PRIME_RENDITIONS = ("main", "poster", "mobile")
+
+
+async def publish_video_renditions(video_id: str, video_dir: str, renditions: List[str]):
+    """렌디션 파일을 video_store에 업로드 ({video_id}/{파일명})"""
+    uploads = []
+    for rendition in renditions:
+        filename, content_type = VIDEO_RENDITION_FILES[rendition]
+        uploads.append((filename, content_type, rendition))
+        if rendition == "hls":
+            for segment in sorted(os.listdir(os.path.join(video_dir, "hls"))):
+                if segment.endswith(".ts"):
+                    uploads.append((f"hls/{segment}", "video/mp2t", None))
+
+    for filename, content_type, rendition in uploads:
+        path = os.path.join(video_dir, filename)
+        key = f"{video_id}/{filename}"
+        data = await asyncio.to_thread(read_file, path)
+        await asyncio.to_thread(video_store.put, key, data, content_type)
+        if rendition in VIDEO_CACHE_PRIME_RENDITIONS:
+            blob_cache.prime(video_store, key, path)
+
+
+# 인덱스 최대 항목 수 - 넘치면 오래 안 쓴 항목부터 제거 (미스 시 DB에서 다시 조회)
+VIDEO_FILE_INDEX_SIZE = int(os.getenv("VIDEO_FILE_INDEX_SIZE", "20000"))
+
+
+class VideoFileIndex:
+    """video_id → {"path": 원본 키, "renditions": [...], "legacy": 이전 방식 로컬 파일 여부}
+
+    완료된 비디오만 등록하는 LRU 인덱스
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self.entries
+
+    def get(self, video_id: str) -> Optional[dict]:
+        entry = self.entries.get(video_id)
+        if entry:
+            self.entries.move_to_end(video_id)
+        return entry
+
+    def set(self, video_id: str, entry: dict):
+        self.entries[video_id] = entry
+        self.entries.move_to_end(video_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def pop(self, video_id: str):
+        self.entries.pop(video_id, None)
+
+
+video_file_index = VideoFileIndex(VIDEO_FILE_INDEX_SIZE)
+
+
+def is_valid_video_id(video_id: str) -> bool:
+    try:
+        uuid.UUID(video_id)
+        return True
+    except ValueError:
+        return False
+
+
+def find_legacy_video_file(video_id: str) -> Optional[str]:
+    """이전 방식 (VIDEO_OUTPUT_DIR/{video_id}_{timestamp}.mp4) 파일 조회 - 경로 기록이 없는 비디오만 1회 탐색"""
+    for legacy in os.listdir(VIDEO_OUTPUT_DIR):
+        if legacy.startswith(video_id) and legacy.endswith(".mp4"):
+            return legacy
+    return None
+
+
+async def open_video_file(video_id: str, relative_path: str) -> Optional[str]:
+    """비디오 파일의 로컬 경로 반환 (인덱스 기반, 저장소 파일은 LRU 캐시 경유)"""
+    entry = video_file_index.get(video_id)
+    if not entry:
+        return None
+
+    if entry["legacy"]:
+        if relative_path != VIDEO_RENDITION_FILES["main"][0]:
+            return None
+        path = os.path.join(VIDEO_OUTPUT_DIR, entry["path"])
+        return path if os.path.exists(path) else None
+
+    return await blob_cache.fetch(video_store, f"{video_id}/{relative_path}")
+
+
+async def find_video_file(video_id: str, rendition: str = "main") -> Optional[str]:
+    """렌디션 파일 로컬 경로 조회. 생성되지 않은 렌디션이면 None"""
+    entry = video_file_index.get(video_id)
+    if not entry or rendition not in entry["renditions"]:
+        return None
+    return await open_video_file(video_id, VIDEO_RENDITION_FILES[rendition][0])
+
+
+def resolve_video_file_index(video_id: str) -> Optional[dict]:
+    """인덱스 미스 시 DB에서 경로 조회 후 등록. 완료되지 않은 비디오면 None"""
+    if not is_valid_video_id(video_id):
+        return None
+
+    result = (
+        supabase.table("video_generations")
+        .select("status, video_path, renditions")
+        .eq("id", video_id)
+        .limit(1)
+        .execute()
+    )
+    if not result.data or result.data[0].get("status") != "completed":
+        return None
+
+    video = result.data[0]
+    if video.get("video_path"):
+        entry = {
+            "path": video["video_path"],
+            "renditions": video.get("renditions") or ["main"],
+            "legacy": False,
+        }
+    else:
+        legacy = find_legacy_video_file(video_id)
+        if not legacy:
+            return None
+        entry = {"path": legacy, "renditions": ["main"], "legacy": True}
+
+    video_file_index.set(video_id, entry)
+    return entry
+
+
+VIDEO_FILE_CHUNK_SIZE = 256 * 1024
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """단일 Range 헤더 (bytes=start-end) 파싱. 잘못된 범위면 None"""
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[6:].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            # bytes=-N → 마지막 N바이트
+            start = max(file_size - int(end_text), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    end = min(end, file_size - 1)
+    if start > end or start >= file_size:
+        return None
+    return start, end
+
+
+def serve_video_file(
+    request: Request,
+    filepath: str,
+    media_type: str,
+    download_name: Optional[str] = None,
+):
+    """파일 응답 - ETag/If-None-Match, Range(206), HEAD 지원. 전체 파일은 FileResponse(sendfile)"""
+    from fastapi.responses import FileResponse, Response, StreamingResponse
+
+    stat = os.stat(filepath)
+    etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400",
+    }
+    if download_name:
+        headers["Content-Disposition"] = f'inline; filename="{download_name}"'
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range_header(range_header, stat.st_size)
+        if not byte_range:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"},
+            )
+
+        start, end = byte_range
+        length = end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        headers["Content-Length"] = str(length)
+
+        if request.method == "HEAD":
+            return Response(status_code=206, headers=headers, media_type=media_type)
+
+        async def iter_range():
+            with open(filepath, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    chunk = await asyncio.to_thread(
+                        f.read, min(VIDEO_FILE_CHUNK_SIZE, remaining)
+                    )
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return StreamingResponse(
+            iter_range(), status_code=206, headers=headers, media_type=media_type
+        )
+
+    # 전체 파일 (HEAD 요청은 FileResponse가 본문 없이 응답)
+    return FileResponse(
+        filepath, media_type=media_type, headers=headers, stat_result=stat
+    )
+
+
+# 최대 시도 횟수 (처리 중 서버 재시작 포함)
+VIDEO_JOB_MAX_ATTEMPTS = 3
+# 작업 생성 후 이 시간이 지나도 끝나지 않으면 실패 처리 + 환불
+VIDEO_JOB_TIMEOUT_SECONDS = int(os.getenv("VIDEO_JOB_TIMEOUT_SECONDS", "1800"))
+# 처리 중인 서버가 heartbeat_at 갱신 → 이 시간 동안 갱신이 없는 작업만 다른 서버가 이어받음
+VIDEO_JOB_HEARTBEAT_SECONDS = 30
+VIDEO_JOB_STALE_SECONDS = int(os.getenv("VIDEO_JOB_STALE_SECONDS", "180"))
+
+
+def parse_db_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+async def fail_video_job(job: dict, message: str):
+    """비디오 작업 실패 처리 - 상태 기록, 레퍼런스 정리, 크레딧 환불"""
+    video_id = job["id"]
+    now = datetime.now().isoformat()
+    try:
         supabase.table("video_generations").update({
-            "gcp_operation_id": str(operation.name) if hasattr(operation, 'name') else None,
-            "progress": 40
+            "status": "failed",
+            "error_message": message,
+            "cache_key": None,
+            "completed_at": now
         }).eq("id", video_id).execute()
-        
-        # 작업 완료 대기 (폴링)
-        progress = 40
-        while not operation.done:
-            await asyncio.sleep(15)
-            operation = client.operations.get(operation)
-            progress = min(progress + 5, 90)
+        supabase.table("video_jobs").update({
+            "status": "failed",
+            "last_error": message,
+            "updated_at": datetime.utcnow().isoformat() + "+00:00"
+        }).eq("id", video_id).execute()
+    except Exception as e:
+        print(f"비디오 상태 업데이트 오류: {e}")
+
+    delete_video_references(job.get("reference_paths"))
+
+    payload = {"video_id": video_id, "status": "failed", "error_message": message, "completed_at": now}
+    await emit_webhook_event(job.get("api_key_id"), job["user_id"], "video.failed", payload)
+    await notify_video_subscribers(video_id, job["user_id"], "video.failed", payload)
+
+    # 크레딧 환불
+    await refund_video_credits(
+        job["user_id"], job.get("credits") or VIDEO_GENERATION_CREDITS, video_id
+    )
+
+
+async def process_video_generation(video_id: str):
+    """비디오 작업 처리 (비디오 워커에서 실행). 저장된 Veo 작업이 있으면 재연결"""
+    job_result = (
+        supabase.table("video_jobs")
+        .select("*")
+        .eq("id", video_id)
+        .single()
+        .execute()
+    )
+    job = job_result.data
+    if not job or job.get("status") in ("completed", "failed"):
+        return
+
+    # 다른 서버에서 처리 중 (heartbeat 갱신 중)이면 건너뜀
+    if job.get("status") == "running" and not is_video_job_stale(job):
+        return
+
+    attempts = job.get("attempts", 0)
+    if attempts >= VIDEO_JOB_MAX_ATTEMPTS:
+        await fail_video_job(job, "비디오 생성 재시도 횟수를 초과했습니다")
+        return
+
+    # 작업 점유 (상태 + 시도 횟수 조건부 업데이트 → 중복 처리 방지)
+    now = datetime.utcnow().isoformat() + "+00:00"
+    claim = (
+        supabase.table("video_jobs")
+        .update({
+            "status": "running",
+            "attempts": attempts + 1,
+            "heartbeat_at": now,
+            "updated_at": now
+        })
+        .eq("id", video_id)
+        .eq("status", job["status"])
+        .eq("attempts", attempts)
+        .execute()
+    )
+    if not claim.data:
+        return
+
+    try:
+        from google.genai.types import (
+            GenerateVideosConfig,
+            GenerateVideosOperation,
+            VideoGenerationReferenceImage,
+        )
+
+        client = get_vertex_client()
+        tier_name = job.get("tier") or "standard"
+        tier = VIDEO_TIERS[tier_name]
+
+        if job.get("gcp_operation_id"):
+            # 재시작 전에 제출된 작업 → 같은 작업에 재연결
+            operation = GenerateVideosOperation(name=job["gcp_operation_id"])
+            submitted_at = parse_db_timestamp(job.get("submitted_at")) or time.time()
+            print(f"비디오 작업 재연결: {video_id}")
+        else:
+            # 상태 업데이트: processing
             supabase.table("video_generations").update({
-                "progress": progress
+                "status": "processing",
+                "progress": 20,
+                "started_at": datetime.now().isoformat()
             }).eq("id", video_id).execute()
-        
+
+            inputs = await asyncio.to_thread(
+                load_video_references, job.get("reference_paths") or []
+            )
+
+            supabase.table("video_generations").update({
+                "progress": 30
+            }).eq("id", video_id).execute()
+
+            config = {
+                "aspect_ratio": "16:9",
+                "number_of_videos": 1,
+                "duration_seconds": 8,
+            }
+            request_kwargs = {}
+            prompt = tier["prompt"]
+            if tier["reference_mode"] == "composite":
+                # 합성 이미지 1장을 시작 이미지로 사용, 프롬프트는 실제 뷰 배치 기준
+                request_kwargs["image"] = inputs[0]
+                references = job.get("reference_paths") or []
+                views = (references[0].get("views") if references else None) or VIDEO_COMPOSITE_ORDER
+                prompt = build_video_fast_prompt(views)
+            else:
+                config["reference_images"] = [
+                    VideoGenerationReferenceImage(image=image, reference_type="asset")
+                    for image in inputs
+                ]
+
+            # 비디오 생성 요청
+            operation = await client.aio.models.generate_videos(
+                model=tier["model"],
+                prompt=prompt.strip(),
+                config=GenerateVideosConfig(**config),
+                **request_kwargs,
+            )
+            inputs = None
+            config = None
+            submitted_at = time.time()
+
+            # GCP 작업 ID 저장 (재시작 시 재연결 기준)
+            now = datetime.utcnow().isoformat() + "+00:00"
+            supabase.table("video_jobs").update({
+                "gcp_operation_id": operation.name,
+                "submitted_at": now,
+                "heartbeat_at": now,
+                "updated_at": now
+            }).eq("id", video_id).execute()
+            supabase.table("video_generations").update({
+                "gcp_operation_id": operation.name,
+                "progress": 40
+            }).eq("id", video_id).execute()
+
+        # 작업 완료 대기 (공용 폴러에서 다른 작업과 함께 폴링)
+        operation = await video_poller.wait(video_id, operation, submitted_at, tier_name)
+
+        if operation.error:
+            await fail_video_job(job, f"비디오 생성 실패: {operation.error}")
+            return
+
         # 결과 처리
         if operation.result and operation.result.generated_videos:
             video = operation.result.generated_videos[0]
-            
+
             if video.video and video.video.video_bytes:
-                # 비디오 파일 저장 (오디오 제거)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{video_id}_{timestamp}.mp4"
-                filepath = os.path.join(VIDEO_OUTPUT_DIR, filename)
-                
-                # 임시 파일로 먼저 저장
-                temp_filepath = os.path.join(VIDEO_OUTPUT_DIR, f"temp_{filename}")
-                with open(temp_filepath, "wb") as f:
-                    f.write(video.video.video_bytes)
-                
-                # ffmpeg로 오디오 제거 (배경음 제거)
-                try:
-                    import subprocess
-                    ffmpeg_cmd = [
-                        "ffmpeg", "-y",
-                        "-i", temp_filepath,
-                        "-c:v", "copy",  # 비디오 코덱 복사 (재인코딩 없음)
-                        "-an",  # 오디오 제거
-                        filepath
-                    ]
-                    subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-                    # 임시 파일 삭제
-                    os.remove(temp_filepath)
-                    print(f"비디오 오디오 제거 완료: {video_id}")
-                except Exception as ffmpeg_error:
-                    print(f"ffmpeg 오디오 제거 실패, 원본 사용: {ffmpeg_error}")
-                    # ffmpeg 실패 시 원본 파일 사용
-                    if os.path.exists(temp_filepath):
-                        os.rename(temp_filepath, filepath)
-                
+                renditions = await postprocess_video(video_id, video.video.video_bytes)
+                video_path = f"{video_id}/{VIDEO_RENDITION_FILES['main'][0]}"
+
                 video_url = f"/api/video/download/{video_id}"
-                
+
                 supabase.table("video_generations").update({
                     "status": "completed",
                     "progress": 100,
                     "video_url": video_url,
+                    "video_path": video_path,
+                    "renditions": renditions,
                     "video_bytes_size": len(video.video.video_bytes),
+                    "cache_used_at": datetime.now().isoformat(),
                     "completed_at": datetime.now().isoformat()
                 }).eq("id", video_id).execute()
-                
+                supabase.table("video_jobs").update({
+                    "status": "completed",
+                    "updated_at": datetime.utcnow().isoformat() + "+00:00"
+                }).eq("id", video_id).execute()
+
+                delete_video_references(job.get("reference_paths"))
+                video_file_index.set(video_id, {
+                    "path": video_path,
+                    "renditions": renditions,
+                    "legacy": False,
+                })
+                await asyncio.to_thread(
+                    evict_video_cache, job["user_id"], video_id, job.get("cache_key")
+                )
+
+                payload = video_completed_payload({
+                    "id": video_id,
+                    "tier": tier_name,
+                    "video_url": video_url,
+                    "renditions": renditions,
+                    "completed_at": datetime.now().isoformat(),
+                })
+                await emit_webhook_event(
+                    job.get("api_key_id"), job["user_id"], "video.completed", payload
+                )
+                # 진행 중에 같은 비디오를 재사용한 다른 API 키
+                await notify_video_subscribers(video_id, job["user_id"], "video.completed", payload)
+
                 print(f"비디오 생성 완료: {video_id}")
                 return
-        
+
         # 실패 처리
-        supabase.table("video_generations").update({
-            "status": "failed",
-            "error_message": "비디오 생성 결과가 없습니다",
-            "completed_at": datetime.now().isoformat()
-        }).eq("id", video_id).execute()
-        
-        # 크레딧 환불
-        await refund_video_credits(user_id, VIDEO_GENERATION_CREDITS, video_id)
-        
+        await fail_video_job(job, "비디오 생성 결과가 없습니다")
+
+    except Exception as e:
+        print(f"비디오 생성 오류: {e}")
+        import traceback
+        traceback.print_exc()
+
+        await fail_video_job(job, str(e))
+
+
+def is_video_job_stale(job: dict) -> bool:
+    """처리 서버의 heartbeat(없으면 마지막 갱신 시각)가 끊긴 작업인지"""
+    last_seen = parse_db_timestamp(job.get("heartbeat_at") or job.get("updated_at"))
+    return last_seen is None or time.time() - last_seen >= VIDEO_JOB_STALE_SECONDS
+
+
+async def recover_video_jobs():
+    """미완료 비디오 작업 복구 - heartbeat가 끊긴 작업만 재연결/재등록, 시간 초과 작업은 실패 + 환불
+
+    다른 서버가 처리 중인 작업(heartbeat 갱신 중)은 건드리지 않음
+    """
+    try:
+        result = (
+            supabase.table("video_jobs")
+            .select("*")
+            .in_("status", ["queued", "running"])
+            .order("created_at")
+            .execute()
+        )
+        jobs = result.data or []
+    except Exception as e:
+        print(f"비디오 작업 복구 조회 오류: {e}")
+        return
+
+    now = time.time()
+    resumed = timed_out = 0
+    for job in jobs:
+        # 이 프로세스의 워커 큐에서 대기/처리 중이거나 Veo 작업을 폴링 중인 작업은 제외
+        if job["id"] in video_poller.pending or is_video_job_local(job["id"]):
+            continue
+        # 대기 중 작업도 접수한 서버가 heartbeat 갱신 (run_video_queue_heartbeat) → 끊긴 것만 이어받음
+        if not is_video_job_stale(job):
+            continue
+        created_at = parse_db_timestamp(job.get("created_at")) or now
+        if now - created_at > VIDEO_JOB_TIMEOUT_SECONDS:
+            await fail_video_job(job, "비디오 생성 시간이 초과되었습니다")
+            timed_out += 1
+            continue
+        await video_workers[job.get("tier") or "standard"].submit(job["id"])
+        resumed += 1
+
+    if resumed or timed_out:
+        print(f"비디오 작업 복구: 재개 {resumed}건, 시간 초과 {timed_out}건")
+
+    # 작업 큐 기록이 없는 오래된 진행 중 비디오 (작업 큐 도입 이전 생성분) 정리
+    try:
+        cutoff_iso = (
+            datetime.utcnow() - timedelta(seconds=VIDEO_JOB_TIMEOUT_SECONDS)
+        ).isoformat() + "+00:00"
+        stale = (
+            supabase.table("video_generations")
+            .select("id, user_id, credits_used")
+            .in_("status", ["pending", "processing"])
+            .lt("created_at", cutoff_iso)
+            .execute()
+        )
+        job_ids = {job["id"] for job in jobs}
+        for row in stale.data or []:
+            if row["id"] not in job_ids:
+                await fail_video_job(
+                    {"id": row["id"], "user_id": row["user_id"], "credits": row.get("credits_used")},
+                    "비디오 생성 시간이 초과되었습니다",
+                )
+    except Exception as e:
+        print(f"오래된 비디오 정리 오류: {e}")
+
+
+async def run_video_recovery_loop():
+    """시작 직후 + 주기적으로 복구 (재시작 직후엔 이전 프로세스의 heartbeat가 아직 최신일 수 있음)"""
+    while True:
+        await recover_video_jobs()
+        await asyncio.sleep(VIDEO_JOB_STALE_SECONDS)
+
+
+VIDEO_POLL_TICK_SECONDS = 2
+VIDEO_PROGRESS_START = 40
+VIDEO_PROGRESS_MAX = 95
+
+
+class VideoOperationPoller:
+    """진행 중인 모든 Veo 작업을 하나의 루프에서 폴링
+
+    - 폴링 간격: 초반엔 길게, 예상 완료 시점 근처에선 짧게
+    - 진행률: 과거 완료 소요 시간 기반 ETA로 계산 (5% 단위)
+    - DB 진행률 기록: 같은 값끼리 묶어서 한 번에 UPDATE
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, dict] = {}
+        # 비디오 유형별 최근 소요 시간 (초)
+        self.durations: Dict[str, deque] = {
+            tier: deque(maxlen=20) for tier in VIDEO_TIERS
+        }
+        self.history_loaded = False
+        self.task: Optional[asyncio.Task] = None
+        self.heartbeat_at = 0.0
+
+    def expected_seconds(self, tier: str) -> float:
+        durations = self.durations[tier]
+        if not durations:
+            return VIDEO_TIERS[tier]["expected_seconds"]
+        return sum(durations) / len(durations)
+
+    def load_history(self):
+        """최근 완료된 비디오의 소요 시간으로 예상 시간 초기화"""
+        self.history_loaded = True
+        try:
+            result = (
+                supabase.table("video_generations")
+                .select("tier, started_at, completed_at")
+                .eq("status", "completed")
+                .order("completed_at", desc=True)
+                .limit(20 * len(VIDEO_TIERS))
+                .execute()
+            )
+            for row in reversed(result.data or []):
+                if not row.get("started_at") or not row.get("completed_at"):
+                    continue
+                started = datetime.fromisoformat(row["started_at"].replace("Z", "+00:00"))
+                completed = datetime.fromisoformat(row["completed_at"].replace("Z", "+00:00"))
+                duration = (completed - started).total_seconds()
+                tier = row.get("tier") or "standard"
+                if tier in self.durations and 0 < duration < 3600:
+                    self.durations[tier].append(duration)
+        except Exception as e:
+            print(f"비디오 소요 시간 이력 조회 오류: {e}")
+
+    def next_interval(self, elapsed: float, tier: str) -> float:
+        ratio = elapsed / self.expected_seconds(tier)
+        if ratio < 0.5:
+            return 30
+        if ratio < 0.8:
+            return 15
+        if ratio < 1.5:
+            return 5
+        return 15
+
+    def estimate_progress(self, elapsed: float, tier: str) -> int:
+        ratio = min(elapsed / self.expected_seconds(tier), 1.0)
+        progress = VIDEO_PROGRESS_START + ratio * (VIDEO_PROGRESS_MAX - VIDEO_PROGRESS_START)
+        return int(progress // 5 * 5)
+
+    async def wait(
+        self,
+        video_id: str,
+        operation,
+        submitted_at: Optional[float] = None,
+        tier: str = "standard",
+    ):
+        """작업 완료까지 대기 후 최종 operation 반환 (시간 초과 시 TimeoutError)"""
+        if not self.history_loaded:
+            await asyncio.to_thread(self.load_history)
+
+        now = time.time()
+        started_at = submitted_at or now
+        future = asyncio.get_running_loop().create_future()
+        self.pending[video_id] = {
+            "operation": operation,
+            "future": future,
+            "started_at": started_at,
+            "tier": tier,
+            # 재연결된 작업은 바로 한 번 조회
+            "next_poll_at": now if submitted_at else now + self.next_interval(0, tier),
+            "progress": VIDEO_PROGRESS_START,
+        }
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        try:
+            return await future
+        finally:
+            self.pending.pop(video_id, None)
+
+    async def _run(self):
+        while self.pending:
+            await asyncio.sleep(VIDEO_POLL_TICK_SECONDS)
+            try:
+                await self._tick()
+            except Exception as e:
+                print(f"비디오 폴러 오류: {e}")
+
+    async def _tick(self):
+        now = time.time()
+        if self.pending and now - self.heartbeat_at >= VIDEO_JOB_HEARTBEAT_SECONDS:
+            # 이 서버가 처리 중인 작업 표시 (다른 서버의 복구 대상에서 제외)
+            self.heartbeat_at = now
+            try:
+                supabase.table("video_jobs").update({
+                    "heartbeat_at": datetime.utcnow().isoformat() + "+00:00"
+                }).in_("id", list(self.pending.keys())).eq("status", "running").execute()
+            except Exception as e:
+                print(f"비디오 작업 heartbeat 오류: {e}")
+
+        due = [
+            (video_id, entry)
+            for video_id, entry in list(self.pending.items())
+            if now >= entry["next_poll_at"] and not entry["future"].done()
+        ]
+        if not due:
+            return
+
+        client = get_vertex_client()
+        results = await asyncio.gather(
+            *[client.aio.operations.get(entry["operation"]) for _, entry in due],
+            return_exceptions=True,
+        )
+
+        progress_updates: Dict[int, List[str]] = defaultdict(list)
+        for (video_id, entry), result in zip(due, results):
+            elapsed = now - entry["started_at"]
+            entry["next_poll_at"] = now + self.next_interval(elapsed, entry["tier"])
+
+            if isinstance(result, BaseException):
+                print(f"비디오 작업 조회 오류 ({video_id}): {result}")
+                if elapsed > VIDEO_JOB_TIMEOUT_SECONDS:
+                    entry["future"].set_exception(result)
+                continue
+
+            if not result.done and elapsed > VIDEO_JOB_TIMEOUT_SECONDS:
+                entry["future"].set_exception(
+                    TimeoutError("비디오 생성 시간이 초과되었습니다")
+                )
+                continue
+
+            entry["operation"] = result
+            if result.done:
+                self.durations[entry["tier"]].append(elapsed)
+                entry["future"].set_result(result)
+                continue
+
+            progress = self.estimate_progress(elapsed, entry["tier"])
+            if progress > entry["progress"]:
+                entry["progress"] = progress
+                progress_updates[progress].append(video_id)
+
+        for progress, video_ids in progress_updates.items():
+            try:
+                supabase.table("video_generations").update({
+                    "progress": progress
+                }).in_("id", video_ids).execute()
+            except Exception as e:
+                print(f"비디오 진행률 업데이트 오류: {e}")
+
+
+video_poller = VideoOperationPoller()
+video_recovery_tasks: set = set()
+
+
+class VideoWorkerPool:
+    """비디오 전용 워커 풀 - 고정 개수 워커가 큐에서 작업을 꺼내 처리"""
+
+    def __init__(self, concurrency: int, name: str = "standard"):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        # 큐에 넣은 뒤 처리가 끝나지 않은 작업 id (중복 등록 방지 + 대기 중 heartbeat 대상)
+        self.tracked: set = set()
+
+    def start(self):
+        if self.workers:
+            return
+        self.queue = asyncio.Queue()
+        self.workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.concurrency)
+        ]
+        print(f"비디오 워커 시작 ({self.name}): {self.concurrency}개")
+
+    async def submit(self, video_id: str):
+        if not self.workers:
+            self.start()
+        if video_id in self.tracked:
+            return
+        self.tracked.add(video_id)
+        await self.queue.put(video_id)
+
+    def pending_count(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    async def _worker(self, index: int):
+        while True:
+            video_id = await self.queue.get()
+            try:
+                await process_video_generation(video_id)
+            except Exception as e:
+                print(f"비디오 워커 오류 ({self.name}-{index}): {e}")
+            finally:
+                self.tracked.discard(video_id)
+                self.queue.task_done()
+
+
+# 비디오 유형별 워커 풀 (빠른 미리보기가 고품질 대기열 뒤에 밀리지 않도록 분리)
+video_workers = {
+    name: VideoWorkerPool(tier["concurrency"], name)
+    for name, tier in VIDEO_TIERS.items()
+}
+
+
+def is_video_job_local(video_id: str) -> bool:
+    return any(video_id in pool.tracked for pool in video_workers.values())
+
+
+async def run_video_queue_heartbeat():
+    """워커 큐에서 대기 중인 작업의 heartbeat 갱신 - 다른 서버/복구 루프가 대기 중 작업을 끊긴 것으로 보지 않도록"""
+    while True:
+        await asyncio.sleep(VIDEO_JOB_HEARTBEAT_SECONDS)
+        video_ids = [video_id for pool in video_workers.values() for video_id in pool.tracked]
+        for i in range(0, len(video_ids), CLEANUP_REMOVE_CHUNK):
+            try:
+                supabase.table("video_jobs").update({
+                    "heartbeat_at": datetime.utcnow().isoformat() + "+00:00"
+                }).in_("id", video_ids[i : i + CLEANUP_REMOVE_CHUNK]).eq("status", "queued").execute()
+            except Exception as e:
+                print(f"비디오 대기 작업 heartbeat 오류: {e}")
+
+
+@app.on_event("startup")
+async def start_video_workers():
+    # 인증 설정 오류는 비디오 작업마다 실패하기 전에 시작 시점에 바로 알림
+    # (서버 시작은 막지 않음 → 이미지 생성/결제/크론은 계속 동작, 비디오 생성만 사용 불가)
+    global video_unavailable_reason
+    try:
+        load_vertex_credentials()
     except Exception as e:
-        print(f"비디오 생성 오류: {e}")
-        import traceback
-        traceback.print_exc()
-        
-        supabase.table("video_generations").update({
-            "status": "failed",
-            "error_message": str(e),
-            "completed_at": datetime.now().isoformat()
-        }).eq("id", video_id).execute()
-        
-        # 크레딧 환불
-        await refund_video_credits(user_id, VIDEO_GENERATION_CREDITS, video_id)
-    
-    finally:
-        # 환경변수 복구 (이미지 생성 API 정상화)
-        if _old_vertexai is None:
-            os.environ.pop("GOOGLE_GENAI_USE_VERTEXAI", None)
-        else:
-            os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = _old_vertexai
-        
-        if _old_credentials is None:
-            os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
-        else:
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = _old_credentials
-        
-        if _old_project is None:
-            os.environ.pop("GOOGLE_CLOUD_PROJECT", None)
-        else:
-            os.environ["GOOGLE_CLOUD_PROJECT"] = _old_project
-        
-        if _old_location is None:
-            os.environ.pop("GOOGLE_CLOUD_LOCATION", None)
-        else:
-            os.environ["GOOGLE_CLOUD_LOCATION"] = _old_location
+        video_unavailable_reason = str(e)
+        print(f"⚠️ 비디오 생성 비활성화 - 인증 설정 오류: {e}")
+        return
+    for pool in video_workers.values():
+        pool.start()
+    video_recovery_tasks.add(asyncio.create_task(run_video_recovery_loop()))
+    video_recovery_tasks.add(asyncio.create_task(run_video_queue_heartbeat()))
 
 
 async def refund_video_credits(user_id: str, credits: int, video_id: str):
-    """비디오 생성 실패 시 크레딧 환불"""
+    """비디오 생성 실패 시 크레딧 환불 (비디오당 1회)"""
     try:
+        # 환불 표시 선점 → 재시작/중복 실패 처리 시 이중 환불 방지
+        claim = (
+            supabase.table("video_generations")
+            .update({"refunded_at": datetime.now().isoformat()})
+            .eq("id", video_id)
+            .is_("refunded_at", "null")
+            .execute()
+        )
+        if not claim.data:
+            return
+
         credits_result = (
             supabase.table("profiles")
             .select("credits")
@@ -3856,6 +7907,7 @@ async def refund_video_credits(user_id: str, credits: int, video_id: str):
             supabase.table("profiles").update({
                 "credits": current_credits + credits
             }).eq("id", user_id).execute()
+            subscription_status_cache.invalidate(user_id)
             
             supabase.table("usages").insert({
                 "user_id": user_id,
@@ -3890,8 +7942,15 @@ async def get_video_status(video_id: str):
             "success": True,
             "video_id": video_id,
             "status": video.get("status"),
+            "tier": video.get("tier") or "standard",
             "progress": video.get("progress", 0),
             "video_url": video.get("video_url"),
+            "poster_url": (
+                f"/api/video/poster/{video_id}"
+                if "poster" in (video.get("renditions") or [])
+                else None
+            ),
+            "renditions": video.get("renditions") or [],
             "error_message": video.get("error_message"),
             "created_at": video.get("created_at"),
             "completed_at": video.get("completed_at"),
@@ -3902,41 +7961,35 @@ async def get_video_status(video_id: str):
         return {"success": False, "error": str(e)}
 
 
-@app.get("/api/video/download/{video_id}")
-async def download_video(video_id: str):
-    """비디오 파일 다운로드"""
-    from fastapi.responses import FileResponse
-    
+@app.api_route("/api/video/download/{video_id}", methods=["GET", "HEAD"])
+async def download_video(request: Request, video_id: str, rendition: str = "main"):
+    """비디오 파일 다운로드 (rendition: main, mobile, webm)"""
+    if rendition not in ("main", "mobile", "webm"):
+        raise HTTPException(status_code=400, detail="지원하지 않는 렌디션입니다")
+
     try:
-        # 비디오 정보 조회
-        result = (
-            supabase.table("video_generations")
-            .select("*")
-            .eq("id", video_id)
-            .single()
-            .execute()
+        # 인덱스에 있으면 DB 조회 없이 바로 응답 (HEAD 확인 요청 포함)
+        if video_id not in video_file_index:
+            if not resolve_video_file_index(video_id):
+                raise HTTPException(status_code=404, detail="비디오를 찾을 수 없습니다")
+
+        # 파일 찾기 (요청한 렌디션이 없으면 원본으로)
+        filepath = (
+            await find_video_file(video_id, rendition)
+            or await find_video_file(video_id)
         )
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="비디오를 찾을 수 없습니다")
-        
-        video = result.data
-        
-        if video.get("status") != "completed":
-            raise HTTPException(status_code=400, detail="비디오 생성이 완료되지 않았습니다")
-        
-        # 파일 찾기
-        for filename in os.listdir(VIDEO_OUTPUT_DIR):
-            if filename.startswith(video_id):
-                filepath = os.path.join(VIDEO_OUTPUT_DIR, filename)
-                return FileResponse(
-                    filepath,
-                    media_type="video/mp4",
-                    filename=f"autopic_360_{video_id[:8]}.mp4"
-                )
-        
-        raise HTTPException(status_code=404, detail="비디오 파일을 찾을 수 없습니다")
-        
+        if not filepath:
+            video_file_index.pop(video_id)
+            raise HTTPException(status_code=404, detail="비디오 파일을 찾을 수 없습니다")
+
+        extension = os.path.splitext(filepath)[1]
+        return serve_video_file(
+            request,
+            filepath,
+            "video/webm" if extension == ".webm" else "video/mp4",
+            download_name=f"autopic_360_{video_id[:8]}{extension}",
+        )
+
     except HTTPException:
         raise
     except Exception as e:
@@ -3944,6 +7997,57 @@ async def download_video(video_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.api_route("/api/video/poster/{video_id}", methods=["GET", "HEAD"])
+async def get_video_poster(request: Request, video_id: str):
+    """비디오 포스터 이미지 (첫 프레임)"""
+    if video_id not in video_file_index:
+        resolve_video_file_index(video_id)
+
+    filepath = await find_video_file(video_id, "poster")
+    if not filepath:
+        raise HTTPException(status_code=404, detail="포스터를 찾을 수 없습니다")
+    return serve_video_file(request, filepath, "image/jpeg")
+
+
+@app.get("/api/video/hls/{video_id}/{filename}")
+async def get_video_hls(request: Request, video_id: str, filename: str):
+    """HLS 플레이리스트/세그먼트"""
+    if filename != "index.m3u8" and not (
+        filename.startswith("segment_") and filename.endswith(".ts")
+    ):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+
+    if video_id not in video_file_index:
+        resolve_video_file_index(video_id)
+
+    entry = video_file_index.get(video_id)
+    if not entry or "hls" not in entry["renditions"]:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+
+    filepath = await open_video_file(video_id, f"hls/{filename}")
+    if not filepath:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return serve_video_file(
+        request,
+        filepath,
+        "application/vnd.apple.mpegurl" if filename.endswith(".m3u8") else "video/mp2t",
+    )
+
+
+@app.get("/api/blob/{namespace}/{key:path}")
+async def get_blob(request: Request, namespace: str, key: str):
+    """공개 URL이 없는 저장소(local, s3) 파일 제공 - LRU 캐시 경유"""
+    store = BLOB_STORES.get(namespace)
+    # 비디오는 /api/video/download 경로로만 제공
+    if not store or store is video_store or key.startswith(f"{VIDEO_REFERENCE_PREFIX}/"):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+
+    filepath = await blob_cache.fetch(store, key)
+    if not filepath:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return serve_video_file(request, filepath, "image/jpeg")
+
+
 @app.get("/api/video/history/{user_id}")
 async def get_video_history(user_id: str, limit: int = 20):
     """사용자의 비디오 생성 히스토리"""
@@ -3972,11 +8076,23 @@ async def get_video_info():
     """비디오 생성 정보 (가격, 사양 등)"""
     return {
         "success": True,
+        "available": video_unavailable_reason is None,
         "credits_required": VIDEO_GENERATION_CREDITS,
         "duration_seconds": 8,
         "format": "mp4",
         "resolution": "16:9 HD",
         "estimated_time": "2-5분",
+        "tiers": [
+            {
+                "tier": name,
+                "name": tier["name"],
+                "credits_required": tier["credits"],
+                "estimated_time": tier["estimated_time"],
+                "expected_seconds": round(video_poller.expected_seconds(name)),
+                "queued": video_workers[name].pending_count(),
+            }
+            for name, tier in VIDEO_TIERS.items()
+        ],
         "features": [
             "360° 회전 비디오",
             "8초 길이",
@@ -3992,7 +8108,12 @@ async def get_video_info():
 # ============================================================================
 
 class DesktopVideoGenerateRequest(BaseModel):
-    images_base64: List[str]  # base64 이미지 4장
+    tier: str = "standard"
+    regenerate: bool = False
+    # 아래 중 하나로 전달 (4장: front, side, detail, back)
+    images_base64: List[str] = []
+    generation_ids: List[str] = []
+    image_urls: List[str] = []
 
 
 @app.post("/api/v1/video/generate")
@@ -4004,17 +8125,21 @@ async def desktop_video_generate(
     if not x_api_key:
         raise HTTPException(status_code=401, detail="API 키가 필요합니다")
     
-    user_id = await verify_api_key(x_api_key)
-    if not user_id:
+    api_key = await verify_api_key_details(x_api_key)
+    if not api_key:
         raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
     
-    # 기존 generate_video 함수 호출
+    # 웹 비디오 생성과 같은 흐름 (완료/실패 시 키에 등록된 웹훅 호출)
     video_request = VideoGenerateRequest(
-        user_id=user_id,
-        images=request.images_base64
+        user_id=api_key["user_id"],
+        tier=request.tier,
+        regenerate=request.regenerate,
+        images=request.images_base64,
+        generation_ids=request.generation_ids,
+        image_urls=request.image_urls,
     )
     
-    return await generate_video(video_request)
+    return await start_video_generation(video_request, api_key["id"])
 
 
 @app.get("/api/v1/video/status/{video_id}")
@@ -4033,9 +8158,11 @@ async def desktop_video_status(
     return await get_video_status(video_id)
 
 
-@app.get("/api/v1/video/download/{video_id}")
+@app.api_route("/api/v1/video/download/{video_id}", methods=["GET", "HEAD"])
 async def desktop_video_download(
+    request: Request,
     video_id: str,
+    rendition: str = "main",
     x_api_key: str = Header(None, alias="X-API-Key")
 ):
     """설치형 프로그램용 비디오 다운로드"""
@@ -4046,7 +8173,285 @@ async def desktop_video_download(
     if not user_id:
         raise HTTPException(status_code=401, detail="유효하지 않은 API 키입니다")
     
-    return await download_video(video_id)
+    return await download_video(request, video_id, rendition)
+
+
+# ============================================================================
+# 저장소 정합성 점검 (Storage / 디스크 ↔ DB)
+# ============================================================================
+
+# 1회 실행당 삭제할 수 있는 최대 파일/폴더 수 (초과분은 다음 실행에서 처리)
+RECONCILE_DELETE_BUDGET = int(os.getenv("RECONCILE_DELETE_BUDGET", "500"))
+RECONCILE_PAGE_SIZE = 1000
+# 작업 중일 수 있는 임시 파일/폴더는 이 시간이 지나야 정리
+RECONCILE_GRACE_SECONDS = 3600
+
+
+def iter_sorted_column(table: str, column: str, apply_filters=None):
+    """테이블 컬럼 값을 오름차순으로 페이지 단위 조회 (키셋 페이지네이션)"""
+    last_value = None
+    while True:
+        query = supabase.table(table).select(column).not_.is_(column, "null")
+        if apply_filters:
+            query = apply_filters(query)
+        if last_value is not None:
+            query = query.gt(column, last_value)
+        rows = query.order(column).limit(RECONCILE_PAGE_SIZE).execute().data or []
+        for row in rows:
+            yield row[column]
+        if len(rows) < RECONCILE_PAGE_SIZE:
+            return
+        last_value = rows[-1][column]
+
+
+def find_orphans(stored: List[str], known) -> List[str]:
+    """정렬된 두 목록 병합 비교 - stored에만 있는 항목 반환 (known은 정렬된 iterator, UUID 등 바이트 순서 정렬 값)"""
+    orphans = []
+    known_iter = iter(known)
+    current = next(known_iter, None)
+    for item in sorted(stored):
+        while current is not None and current < item:
+            current = next(known_iter, None)
+        if current != item:
+            orphans.append(item)
+    return orphans
+
+
+class ReconcileBudget:
+    """삭제 예산 - dry_run이면 삭제 없이 집계만"""
+
+    def __init__(self, limit: int, dry_run: bool):
+        self.remaining = limit
+        self.dry_run = dry_run
+        self.deleted = 0
+        self.exhausted = False
+
+    def take(self, count: int = 1) -> bool:
+        if self.dry_run:
+            return False
+        if self.remaining < count:
+            self.exhausted = True
+            return False
+        self.remaining -= count
+        self.deleted += count
+        return True
+
+
+def is_stale(path: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) > RECONCILE_GRACE_SECONDS
+    except OSError:
+        return False
+
+
+def is_blob_prefix_stale(store: BlobStore, prefix: str) -> bool:
+    """저장소 폴더의 마지막 수정이 유예 시간보다 오래됐는지 (시각을 알 수 없으면 False → 삭제하지 않음)"""
+    modified = store.last_modified(prefix)
+    return modified is not None and time.time() - modified > RECONCILE_GRACE_SECONDS
+
+
+def has_active_video_job(video_id: str) -> bool:
+    rows = supabase.table("video_jobs").select("id").eq("id", video_id).in_(
+        "status", ["queued", "running"]
+    ).limit(1).execute().data
+    return bool(rows)
+
+
+def has_completed_video(video_id: str) -> bool:
+    rows = supabase.table("video_generations").select("id").eq("id", video_id).eq(
+        "status", "completed"
+    ).limit(1).execute().data
+    return bool(rows)
+
+
+def is_video_folder_removable(video_id: str) -> bool:
+    """삭제 직전 재확인 - 목록 조회 이후 완료됐거나 시작된 작업, 방금 업로드된 폴더는 제외"""
+    if has_completed_video(video_id) or has_active_video_job(video_id):
+        return False
+    return is_blob_prefix_stale(video_store, video_id)
+
+
+def is_video_reference_removable(video_id: str) -> bool:
+    """레퍼런스는 video_jobs 행보다 먼저 업로드됨 → 진행 중 작업 재확인 + 유예 시간"""
+    if has_active_video_job(video_id):
+        return False
+    return is_blob_prefix_stale(image_store, f"{VIDEO_REFERENCE_PREFIX}/{video_id}")
+
+
+async def reconcile_video_store(budget: ReconcileBudget) -> List[str]:
+    """video_store의 {video_id}/ 폴더 중 완료된 비디오에 속하지 않는 것"""
+    folders = await asyncio.to_thread(video_store.list_folders, "")
+    known = iter_sorted_column(
+        "video_generations", "id", lambda q: q.eq("status", "completed")
+    )
+    orphans = [
+        folder for folder in find_orphans(folders, known) if is_valid_video_id(folder)
+    ]
+    # 처리 중인 작업이 막 업로드한 폴더일 수 있으므로 진행 중 작업은 제외
+    active_ids = set()
+    for i in range(0, len(orphans), CLEANUP_REMOVE_CHUNK):
+        active = supabase.table("video_jobs").select("id").in_(
+            "id", orphans[i : i + CLEANUP_REMOVE_CHUNK]
+        ).in_("status", ["queued", "running"]).execute().data or []
+        active_ids.update(row["id"] for row in active)
+    orphans = [folder for folder in orphans if folder not in active_ids]
+
+    for folder in orphans:
+        if budget.dry_run or budget.exhausted:
+            continue
+        if not await asyncio.to_thread(is_video_folder_removable, folder):
+            continue
+        if budget.take():
+            await asyncio.to_thread(video_store.delete_prefix, folder)
+    return orphans
+
+
+async def reconcile_video_references(budget: ReconcileBudget) -> List[str]:
+    """image_store의 video_refs/{video_id}/ 중 진행 중인 작업이 없는 것 (완료/실패 시 삭제 누락분)"""
+    folders = await asyncio.to_thread(image_store.list_folders, VIDEO_REFERENCE_PREFIX)
+    known = iter_sorted_column(
+        "video_jobs", "id", lambda q: q.in_("status", ["queued", "running"])
+    )
+    orphans = find_orphans(folders, known)
+    for folder in orphans:
+        if budget.dry_run or budget.exhausted:
+            continue
+        if not await asyncio.to_thread(is_video_reference_removable, folder):
+            continue
+        if budget.take():
+            await asyncio.to_thread(
+                image_store.delete_prefix, f"{VIDEO_REFERENCE_PREFIX}/{folder}"
+            )
+    return orphans
+
+
+async def reconcile_image_partitions(budget: ReconcileBudget) -> List[str]:
+    """날짜 분할 이미지 중 generations에 기록되지 않은 파일 (업로드 후 저장 실패분). 오늘 폴더는 제외"""
+    today = image_partition_day(datetime.utcnow())
+    days = await asyncio.to_thread(image_store.list_folders, IMAGE_PARTITION_ROOT)
+
+    orphans = []
+    for day in sorted(days):
+        if day >= today:
+            continue
+        prefix = f"{IMAGE_PARTITION_ROOT}/{day}"
+        # URL 문자열 정렬은 DB collation에 따라 달라질 수 있어 날짜별로 집합 비교
+        known = {
+            image_store.key_from_url(url)
+            for url in iter_sorted_column(
+                "generation_images",
+                "generated_image_url",
+                lambda q: q.like("generated_image_url", f"%/{prefix}/%"),
+            )
+        }
+        # 저장소 목록은 페이지 단위로 받아 바로 비교 (파일 수 제한 없이 전체 확인)
+        # 목록을 다 받은 뒤 삭제 → 조회 중 offset이 밀려 파일을 건너뛰지 않음
+        pages = image_store.iter_key_pages(prefix, RECONCILE_PAGE_SIZE)
+        day_orphans = []
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                break
+            day_orphans += [key for key in page if key not in known]
+        day_orphans.sort()
+        for i in range(0, len(day_orphans), CLEANUP_REMOVE_CHUNK):
+            chunk = day_orphans[i : i + CLEANUP_REMOVE_CHUNK]
+            if budget.take(len(chunk)):
+                await asyncio.to_thread(image_store.delete, chunk)
+        orphans += day_orphans
+    return orphans
+
+
+def reconcile_local_files(budget: ReconcileBudget) -> List[str]:
+    """디스크 임시 파일 정리 - 남은 작업 폴더, temp_*.mp4, 캐시 *.tmp, DB에 없는 이전 방식 비디오"""
+    candidates = []
+
+    work_dir = os.path.join(VIDEO_OUTPUT_DIR, "work")
+    if os.path.isdir(work_dir):
+        for name in sorted(os.listdir(work_dir)):
+            path = os.path.join(work_dir, name)
+            if is_stale(path):
+                candidates.append(path)
+
+    legacy_files = []
+    for name in sorted(os.listdir(VIDEO_OUTPUT_DIR)):
+        path = os.path.join(VIDEO_OUTPUT_DIR, name)
+        if name.startswith("temp_") or name.endswith(".tmp"):
+            if is_stale(path):
+                candidates.append(path)
+        elif name.endswith(".mp4"):
+            legacy_files.append(name)
+
+    for dirpath, _, filenames in os.walk(BLOB_CACHE_DIR):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name.endswith(".tmp") and is_stale(path):
+                candidates.append(path)
+
+    # 이전 방식 비디오: {video_id}_{timestamp}.mp4
+    if legacy_files:
+        by_id = {}
+        for name in legacy_files:
+            video_id = name.split("_", 1)[0]
+            if is_valid_video_id(video_id):
+                by_id.setdefault(video_id, []).append(name)
+        known = iter_sorted_column(
+            "video_generations", "id", lambda q: q.eq("status", "completed")
+        )
+        for video_id in find_orphans(list(by_id.keys()), known):
+            if video_id not in video_file_index:
+                candidates += [os.path.join(VIDEO_OUTPUT_DIR, name) for name in by_id[video_id]]
+
+    for path in candidates:
+        if budget.take():
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+    return [os.path.relpath(path, os.path.dirname(__file__)) for path in candidates]
+
+
+async def run_storage_reconcile(params: dict, progress=None) -> dict:
+    dry_run = params.get("dry_run", True)
+    budget_tracker = ReconcileBudget(params.get("budget", RECONCILE_DELETE_BUDGET), dry_run)
+    steps = [
+        ("video_store", lambda: reconcile_video_store(budget_tracker)),
+        ("video_refs", lambda: reconcile_video_references(budget_tracker)),
+        ("images", lambda: reconcile_image_partitions(budget_tracker)),
+        ("local_files", lambda: asyncio.to_thread(reconcile_local_files, budget_tracker)),
+    ]
+    orphans = {}
+    for name, step in steps:
+        orphans[name] = await step()
+        if progress:
+            progress(step=name, deleted_count=budget_tracker.deleted)
+
+    orphan_counts = {name: len(items) for name, items in orphans.items()}
+    print(f"저장소 정합성 점검: {orphan_counts} (삭제 {budget_tracker.deleted}개)")
+    return {
+        "success": True,
+        "dry_run": dry_run,
+        "orphan_counts": orphan_counts,
+        "samples": {name: items[:20] for name, items in orphans.items()},
+        "deleted_count": budget_tracker.deleted,
+        "budget_exhausted": budget_tracker.exhausted,
+    }
+
+
+@app.post("/api/cleanup/reconcile")
+async def reconcile_storage(
+    dry_run: bool = True,
+    budget: int = RECONCILE_DELETE_BUDGET,
+    background: bool = False,
+    x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
+):
+    """Storage/디스크와 DB 비교 후 고아 파일 보고 또는 삭제 (기본: dry_run 보고만)"""
+    if x_cleanup_secret != CLEANUP_SECRET:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return await execute_maintenance_job(
+        "storage_reconcile", {"dry_run": dry_run, "budget": max(0, budget)}, background
+    )
 
 
 # ============================================================================
@@ -4055,6 +8460,7 @@ async def desktop_video_download(
 
 @app.post("/api/cron/subscription-credit-reset")
 async def reset_subscription_credits(
+    background: bool = False,
     x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
 ):
     """
@@ -4068,97 +8474,56 @@ async def reset_subscription_credits(
     if x_cleanup_secret != CLEANUP_SECRET:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    try:
-        # 30일 전 날짜 계산
-        cutoff_date = datetime.now() - timedelta(days=30)
-        cutoff_iso = cutoff_date.isoformat()
-        
-        # 크레딧 리셋 대상 구독자 조회
-        result = (
-            supabase.table("subscriptions")
-            .select("id, user_id, plan, monthly_credits, last_credit_granted_at")
-            .eq("status", "active")
-            .lt("last_credit_granted_at", cutoff_iso)
-            .execute()
-        )
-        
-        eligible_subscriptions = result.data or []
-        
-        if not eligible_subscriptions:
-            return {
-                "success": True,
-                "message": "리셋 대상 구독자가 없습니다",
-                "reset_count": 0,
-            }
-        
-        reset_count = 0
-        failed_count = 0
-        details = []
-        
-        for subscription in eligible_subscriptions:
-            try:
-                user_id = subscription["user_id"]
-                subscription_id = subscription["id"]
-                monthly_credits = subscription.get("monthly_credits", 100)
-                
-                # 1. 기존 크레딧 → 월간 크레딧으로 리셋 (누적 아님!)
-                supabase.table("profiles").update({
-                    "credits": monthly_credits
-                }).eq("id", user_id).execute()
-                
-                # 2. 구독 정보 업데이트
-                supabase.table("subscriptions").update({
-                    "last_credit_granted_at": datetime.now().isoformat(),
-                    "credits_granted_this_period": monthly_credits,
-                }).eq("id", subscription_id).execute()
-                
-                # 3. 히스토리 기록
-                try:
-                    supabase.table("subscription_history").insert({
-                        "subscription_id": subscription_id,
-                        "user_id": user_id,
-                        "event_type": "credit_reset",
-                        "plan": subscription.get("plan"),
-                        "credits_granted": monthly_credits,
-                        "metadata": {"previous_granted_at": subscription.get("last_credit_granted_at")},
-                    }).execute()
-                except Exception:
-                    pass
-                
-                # 4. 사용량 기록
-                try:
-                    supabase.table("usages").insert({
-                        "user_id": user_id,
-                        "action": "subscription_credit_reset",
-                        "credits_used": -monthly_credits,
-                        "metadata": {"subscription_id": subscription_id},
-                    }).execute()
-                except Exception:
-                    pass
-                
-                reset_count += 1
-                details.append({
-                    "user_id": user_id[:8] + "...",
-                    "credits_granted": monthly_credits,
-                })
-                
-            except Exception as item_error:
-                print(f"크레딧 리셋 실패 ({subscription.get('id')}): {item_error}")
-                failed_count += 1
-        
+    return await execute_maintenance_job("credit_reset", {}, background)
+
+
+# RPC 1회 = 1 트랜잭션에서 리셋할 최대 구독자 수
+CREDIT_RESET_CHUNK_SIZE = int(os.getenv("CREDIT_RESET_CHUNK_SIZE", "1000"))
+
+
+async def run_subscription_credit_reset(params: dict, progress=None) -> dict:
+    """last_credit_granted_at이 30일 이상 경과한 활성 구독자를 청크 단위 RPC로 리셋 (히스토리/사용량 기록 포함)"""
+    # 30일 전 날짜 계산 (실행 중 기준 고정 → 방금 리셋한 구독자는 다시 대상이 되지 않음)
+    cutoff_iso = (datetime.now() - timedelta(days=30)).isoformat()
+
+    if rpc_capabilities.get("reset_subscription_credits_chunk") is False:
+        return {
+            "success": False,
+            "error": "reset_subscription_credits_chunk 함수가 없습니다 (sql/14_credit_reset_rpc.sql 실행 필요)",
+        }
+
+    reset_count = 0
+    chunks = 0
+    while True:
+        result = supabase.rpc(
+            "reset_subscription_credits_chunk",
+            {"p_cutoff": cutoff_iso, "p_limit": CREDIT_RESET_CHUNK_SIZE},
+        ).execute()
+        count = (result.data or {}).get("reset_count", 0)
+        reset_count += count
+        chunks += 1
+        if progress:
+            progress(reset_count=reset_count, chunks=chunks)
+        if count < CREDIT_RESET_CHUNK_SIZE:
+            break
+
+    # 리셋 대상은 RPC 안에서 정해지므로 캐시 전체 무효화
+    if reset_count:
+        subscription_status_cache.clear()
+
+    if reset_count == 0:
         return {
             "success": True,
-            "message": f"{reset_count}명의 구독자 크레딧이 리셋되었습니다",
-            "reset_count": reset_count,
-            "failed_count": failed_count,
-            "details": details[:10],
+            "message": "리셋 대상 구독자가 없습니다",
+            "reset_count": 0,
         }
-        
-    except Exception as e:
-        print(f"크레딧 리셋 오류: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"success": False, "error": str(e)}
+
+    return {
+        "success": True,
+        "message": f"{reset_count}명의 구독자 크레딧이 리셋되었습니다",
+        "reset_count": reset_count,
+        "chunks": chunks,
+    }
 
 
 @app.get("/api/cron/subscription-reset-status")
@@ -4204,6 +8569,208 @@ async def get_credit_reset_status():
         return {"success": False, "error": str(e)}
 
 
+# ============================================================================
+# 유지보수 작업 (백그라운드 실행 + 단일 실행 잠금)
+# ============================================================================
+# - maintenance_jobs 테이블의 부분 유니크 인덱스로 작업 종류별 동시 실행 1개 보장 (여러 워커/서버 공통)
+# - 크론은 ?background=true 로 등록만 하고 GET /api/maintenance/jobs/{id} 로 상태 확인
+# - 실행 중 heartbeat 갱신. heartbeat가 끊긴 작업(서버 재시작 등)은 다음 등록 시 실패 처리 후 재실행
+
+MAINTENANCE_JOBS = {
+    "expired_images": run_expired_image_cleanup,
+    "storage_reconcile": run_storage_reconcile,
+    "subscription_billing": run_subscription_billing,
+    "credit_reset": run_subscription_credit_reset,
+}
+MAINTENANCE_HEARTBEAT_SECONDS = 30
+MAINTENANCE_STALE_SECONDS = 300
+MAINTENANCE_PROGRESS_INTERVAL = 5
+MAINTENANCE_INSTANCE_ID = f"{os.getenv('HOSTNAME', 'local')}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# 실행 중인 작업 태스크 (GC 방지)
+maintenance_tasks: set = set()
+
+
+class MaintenanceJobRunner:
+    """작업 1건 실행 - 진행 상황/heartbeat 기록"""
+
+    def __init__(self, job: dict):
+        self.job = job
+        self.progress_state = {}
+        self.last_progress_write = 0.0
+        # heartbeat 중단으로 다른 인스턴스가 실패 처리/재실행한 경우 True → 이후 기록하지 않음
+        self.lock_lost = False
+
+    def progress(self, **fields):
+        self.progress_state.update(fields)
+        now = time.time()
+        if now - self.last_progress_write >= MAINTENANCE_PROGRESS_INTERVAL:
+            self.last_progress_write = now
+            self._touch({"progress": self.progress_state})
+
+    def _touch(self, fields: dict):
+        """이 인스턴스가 잡고 있는 실행 중 작업일 때만 기록 (실패 처리된 작업을 되살리지 않도록)"""
+        if self.lock_lost:
+            return
+        try:
+            result = supabase.table("maintenance_jobs").update(
+                {**fields, "heartbeat_at": datetime.utcnow().isoformat() + "+00:00"}
+            ).eq("id", self.job["id"]).eq("locked_by", MAINTENANCE_INSTANCE_ID).eq(
+                "status", "running"
+            ).execute()
+            if not result.data:
+                self.lock_lost = True
+                print(f"유지보수 작업 잠금 상실 ({self.job['id']}) → 상태 기록 중단")
+        except Exception as e:
+            print(f"유지보수 작업 상태 기록 오류 ({self.job['id']}): {e}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(MAINTENANCE_HEARTBEAT_SECONDS)
+            await asyncio.to_thread(self._touch, {})
+
+    async def run(self) -> dict:
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            result = await MAINTENANCE_JOBS[self.job["job_type"]](
+                self.job.get("params") or {}, self.progress
+            )
+            status = "completed" if result.get("success", True) else "failed"
+            self._touch({
+                "status": status,
+                "progress": self.progress_state,
+                "result": result,
+                "error": result.get("error"),
+                "completed_at": datetime.now().isoformat(),
+            })
+            return result
+        except Exception as e:
+            print(f"유지보수 작업 오류 ({self.job['job_type']}): {e}")
+            import traceback
+            traceback.print_exc()
+            self._touch({
+                "status": "failed",
+                "progress": self.progress_state,
+                "error": str(e),
+                "completed_at": datetime.now().isoformat(),
+            })
+            return {"success": False, "error": str(e)}
+        finally:
+            heartbeat.cancel()
+
+
+def find_active_maintenance_job(job_type: str) -> Optional[dict]:
+    result = (
+        supabase.table("maintenance_jobs")
+        .select("*")
+        .eq("job_type", job_type)
+        .eq("status", "running")
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def claim_maintenance_job(job_type: str, params: dict) -> Tuple[Optional[dict], Optional[dict]]:
+    """작업 잠금 획득 → (새 작업, None) / 이미 실행 중이면 (None, 실행 중인 작업)"""
+    for _ in range(2):
+        try:
+            result = supabase.table("maintenance_jobs").insert({
+                "job_type": job_type,
+                "status": "running",
+                "params": params,
+                "locked_by": MAINTENANCE_INSTANCE_ID,
+                "started_at": datetime.now().isoformat(),
+                "heartbeat_at": datetime.utcnow().isoformat() + "+00:00",
+            }).execute()
+            return result.data[0], None
+        except Exception as e:
+            # 유니크 인덱스 충돌 = 같은 종류 작업 실행 중
+            active = find_active_maintenance_job(job_type)
+            if not active:
+                raise e
+
+            heartbeat_at = parse_db_timestamp(active.get("heartbeat_at"))
+            if heartbeat_at and time.time() - heartbeat_at < MAINTENANCE_STALE_SECONDS:
+                return None, active
+
+            # heartbeat 끊긴 작업은 실패 처리 후 한 번 더 시도
+            supabase.table("maintenance_jobs").update({
+                "status": "failed",
+                "error": f"heartbeat 중단 ({active.get('locked_by')})",
+                "completed_at": datetime.now().isoformat(),
+            }).eq("id", active["id"]).eq("status", "running").execute()
+    return None, find_active_maintenance_job(job_type)
+
+
+async def execute_maintenance_job(job_type: str, params: dict, background: bool) -> dict:
+    """작업 실행. background면 등록 후 바로 반환, 아니면 완료까지 기다려 결과 반환"""
+    try:
+        job, active = claim_maintenance_job(job_type, params)
+    except Exception as e:
+        print(f"유지보수 작업 잠금 오류 ({job_type}): {e}")
+        return {"success": False, "error": str(e)}
+    if not job:
+        return {
+            "success": False,
+            "error": "같은 작업이 이미 실행 중입니다",
+            "job_id": active["id"] if active else None,
+            "status": "running",
+        }
+
+    runner = MaintenanceJobRunner(job)
+    if not background:
+        return {**await runner.run(), "job_id": job["id"]}
+
+    task = asyncio.create_task(runner.run())
+    maintenance_tasks.add(task)
+    task.add_done_callback(maintenance_tasks.discard)
+    return {"success": True, "job_id": job["id"], "job_type": job_type, "status": "running"}
+
+
+class MaintenanceJobRequest(BaseModel):
+    job_type: str
+    params: Dict = {}
+
+
+@app.post("/api/maintenance/jobs")
+async def enqueue_maintenance_job(
+    request: MaintenanceJobRequest,
+    x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
+):
+    """유지보수 작업 백그라운드 등록"""
+    if x_cleanup_secret != CLEANUP_SECRET:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if request.job_type not in MAINTENANCE_JOBS:
+        return {"success": False, "error": f"알 수 없는 작업입니다: {request.job_type}"}
+
+    return await execute_maintenance_job(request.job_type, request.params, True)
+
+
+@app.get("/api/maintenance/jobs/{job_id}")
+async def get_maintenance_job(
+    job_id: str,
+    x_cleanup_secret: str = Header(None, alias="X-Cleanup-Secret")
+):
+    """유지보수 작업 상태 조회"""
+    if x_cleanup_secret != CLEANUP_SECRET:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    try:
+        result = (
+            supabase.table("maintenance_jobs")
+            .select("id, job_type, status, params, progress, result, error, started_at, heartbeat_at, completed_at")
+            .eq("id", job_id)
+            .limit(1)
+            .execute()
+        )
+        if not result.data:
+            return {"success": False, "error": "작업을 찾을 수 없습니다"}
+        return {"success": True, "job": result.data[0]}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 # ============================================================================
 # 서버 실행
 # ============================================================================
@@ -0,0 +1,87 @@
+-- ============================================================================
+-- AUTOPIC 배치 생성 시스템 - Supabase 테이블
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- 1. generation_batch_jobs 테이블 (배치 단위)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS generation_batch_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    
+    -- 상태 관리
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'processing', 'completed', 'partial', 'failed')),
+    
+    -- 진행 현황
+    total_items INTEGER NOT NULL DEFAULT 0,
+    completed_items INTEGER NOT NULL DEFAULT 0,
+    failed_items INTEGER NOT NULL DEFAULT 0,
+    
+    -- 크레딧 (접수 시 일괄 예약, 실패분 환불)
+    credits_reserved INTEGER NOT NULL DEFAULT 0,
+    credits_refunded INTEGER NOT NULL DEFAULT 0,
+    
+    -- 타임스탬프
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_batch_jobs_user_id ON generation_batch_jobs(user_id);
+CREATE INDEX IF NOT EXISTS idx_generation_batch_jobs_status ON generation_batch_jobs(status);
+
+
+-- 2. generation_batch_job_items 테이블 (상품 단위)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS generation_batch_job_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    batch_id UUID NOT NULL REFERENCES generation_batch_jobs(id) ON DELETE CASCADE,
+    item_index INTEGER NOT NULL,
+    client_ref TEXT, -- 클라이언트 측 식별자 (상품 코드 등)
+    
+    -- 생성 설정
+    mode TEXT NOT NULL,
+    model_type TEXT NOT NULL,
+    category TEXT,
+    gender TEXT,
+    target TEXT,
+    
+    -- 상태 관리
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'processing', 'completed', 'failed')),
+    
+    -- 결과
+    image_urls JSONB,
+    credits INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    
+    -- 타임스탬프
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_batch_job_items_batch ON generation_batch_job_items(batch_id, item_index);
+
+-- RLS 정책
+ALTER TABLE generation_batch_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE generation_batch_job_items ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own batch jobs" ON generation_batch_jobs;
+DROP POLICY IF EXISTS "Service role can manage batch jobs" ON generation_batch_jobs;
+DROP POLICY IF EXISTS "Service role can manage batch job items" ON generation_batch_job_items;
+
+-- 사용자는 자신의 배치만 조회 가능
+CREATE POLICY "Users can view own batch jobs" ON generation_batch_jobs
+    FOR SELECT USING (auth.uid() = user_id);
+
+-- 서비스 역할은 모든 작업 가능
+CREATE POLICY "Service role can manage batch jobs" ON generation_batch_jobs
+    FOR ALL USING (auth.role() = 'service_role');
+
+CREATE POLICY "Service role can manage batch job items" ON generation_batch_job_items
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
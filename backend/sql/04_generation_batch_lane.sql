@@ -0,0 +1,18 @@
+-- ============================================================================
+-- AUTOPIC 배치 생성 - 처리 레인 컬럼 추가
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- interactive: 즉시 처리 / economy: Gemini 배치 모드 (저렴, 최대 24시간 소요)
+ALTER TABLE generation_batch_jobs
+    ADD COLUMN IF NOT EXISTS lane TEXT NOT NULL DEFAULT 'interactive';
+
+ALTER TABLE generation_batch_jobs DROP CONSTRAINT IF EXISTS generation_batch_jobs_lane_check;
+ALTER TABLE generation_batch_jobs ADD CONSTRAINT generation_batch_jobs_lane_check
+    CHECK (lane IN ('interactive', 'economy'));
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
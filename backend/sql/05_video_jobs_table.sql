@@ -0,0 +1,49 @@
+-- ============================================================================
+-- AUTOPIC 비디오 작업 큐 - Supabase 테이블
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 서버 재시작/배포 중에도 비디오 작업을 이어서 처리하기 위한 영구 작업 큐
+-- ============================================================================
+
+-- 1. video_jobs 테이블 (video_generations 1:1)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS video_jobs (
+    id UUID PRIMARY KEY REFERENCES video_generations(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    -- queued: 대기 / running: 처리 중 / completed: 완료 / failed: 실패
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+
+    -- 전처리된 레퍼런스 이미지 Storage 경로 (generated-images 버킷)
+    reference_paths JSONB NOT NULL DEFAULT '[]',
+
+    -- Veo 작업 ID (제출 후 재시작 시 재연결용)
+    gcp_operation_id TEXT,
+    submitted_at TIMESTAMP WITH TIME ZONE,
+
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_video_jobs_status ON video_jobs(status, created_at);
+
+ALTER TABLE video_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage video jobs" ON video_jobs;
+
+-- 서버 전용 테이블
+CREATE POLICY "Service role can manage video jobs" ON video_jobs
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- 2. video_generations 환불 여부 (중복 환불 방지)
+-- ============================================================================
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS refunded_at TIMESTAMP WITH TIME ZONE;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- AUTOPIC 360° 비디오 - 렌디션 컬럼 추가
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- 후처리로 생성된 결과물 목록 (예: ["main", "poster", "mobile", "webm", "hls"])
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS renditions JSONB NOT NULL DEFAULT '[]';
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- AUTOPIC 360° 비디오 - 저장 경로 컬럼 추가
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- 원본 비디오 파일 경로 (비디오 저장소 기준 상대 경로, 예: {video_id}/video.mp4)
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS video_path TEXT;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
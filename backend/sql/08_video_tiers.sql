@@ -0,0 +1,25 @@
+-- ============================================================================
+-- AUTOPIC 360° 비디오 - 비디오 유형(tier) 컬럼 추가
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- standard: 레퍼런스 3장 고품질 (30 크레딧) / fast: 4뷰 합성 빠른 미리보기 (12 크레딧)
+ALTER TABLE video_generations
+    ADD COLUMN IF NOT EXISTS tier TEXT NOT NULL DEFAULT 'standard';
+
+ALTER TABLE video_generations DROP CONSTRAINT IF EXISTS video_generations_tier_check;
+ALTER TABLE video_generations ADD CONSTRAINT video_generations_tier_check
+    CHECK (tier IN ('standard', 'fast'));
+
+ALTER TABLE video_jobs
+    ADD COLUMN IF NOT EXISTS tier TEXT NOT NULL DEFAULT 'standard';
+
+-- 실패 시 환불할 크레딧
+ALTER TABLE video_jobs
+    ADD COLUMN IF NOT EXISTS credits INTEGER NOT NULL DEFAULT 30;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
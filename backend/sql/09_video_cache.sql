@@ -0,0 +1,23 @@
+-- ============================================================================
+-- AUTOPIC 360° 비디오 - 결과 재사용 캐시
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 같은 레퍼런스 이미지/프롬프트 버전/모델로 다시 요청하면 기존 비디오를 재사용
+-- ============================================================================
+
+-- 재사용 키 (레퍼런스 이미지 해시 + 프롬프트 버전 + 모델). 캐시 해제 시 NULL
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS cache_key TEXT;
+-- 재사용 횟수 / 마지막 사용 시각 (사용자별 LRU 정리 기준)
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS reuse_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS cache_used_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_video_generations_cache_key
+    ON video_generations(user_id, cache_key)
+    WHERE cache_key IS NOT NULL;
+
+ALTER TABLE video_jobs ADD COLUMN IF NOT EXISTS cache_key TEXT;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
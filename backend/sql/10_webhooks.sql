@@ -0,0 +1,75 @@
+-- ============================================================================
+-- AUTOPIC 웹훅 - 설치형 프로그램 작업 완료 알림
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- ============================================================================
+
+-- 1. api_key_webhooks 테이블 (API 키별 웹훅 등록)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS api_key_webhooks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    api_key_id UUID NOT NULL REFERENCES api_keys(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    url TEXT NOT NULL,
+    -- HMAC-SHA256 서명 키
+    secret TEXT NOT NULL,
+    -- video.completed, video.failed, batch.completed, batch.failed
+    events TEXT[] NOT NULL DEFAULT ARRAY['video.completed', 'video.failed', 'batch.completed', 'batch.failed'],
+
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_api_key_webhooks_key ON api_key_webhooks(api_key_id) WHERE is_active;
+
+
+-- 2. webhook_deliveries 테이블 (전송 기록)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    webhook_id UUID NOT NULL REFERENCES api_key_webhooks(id) ON DELETE CASCADE,
+
+    event TEXT NOT NULL,
+    resource_id TEXT,
+    payload JSONB NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'delivered', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    response_status INTEGER,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP WITH TIME ZONE,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    delivered_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_webhook ON webhook_deliveries(webhook_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_pending ON webhook_deliveries(created_at) WHERE status = 'pending';
+
+
+-- 3. 작업 테이블에 요청 API 키 기록
+-- ============================================================================
+ALTER TABLE video_generations ADD COLUMN IF NOT EXISTS api_key_id UUID REFERENCES api_keys(id) ON DELETE SET NULL;
+ALTER TABLE video_jobs ADD COLUMN IF NOT EXISTS api_key_id UUID;
+ALTER TABLE generation_batch_jobs ADD COLUMN IF NOT EXISTS api_key_id UUID REFERENCES api_keys(id) ON DELETE SET NULL;
+
+
+-- RLS 정책 (서버 전용)
+-- ============================================================================
+ALTER TABLE api_key_webhooks ENABLE ROW LEVEL SECURITY;
+ALTER TABLE webhook_deliveries ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage webhooks" ON api_key_webhooks;
+DROP POLICY IF EXISTS "Service role can manage webhook deliveries" ON webhook_deliveries;
+
+CREATE POLICY "Service role can manage webhooks" ON api_key_webhooks
+    FOR ALL USING (auth.role() = 'service_role');
+
+CREATE POLICY "Service role can manage webhook deliveries" ON webhook_deliveries
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
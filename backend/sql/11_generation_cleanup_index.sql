@@ -0,0 +1,15 @@
+-- ============================================================================
+-- AUTOPIC 만료 이미지 정리 - 키셋 스캔용 인덱스
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- cleanup 작업이 id 순으로 페이지 단위 스캔할 때 이미 정리된 행(URL NULL)은 건너뜀
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_generations_cleanup_scan
+    ON generations(id, created_at)
+    WHERE generated_image_url IS NOT NULL;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
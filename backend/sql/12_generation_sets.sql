@@ -0,0 +1,90 @@
+-- ============================================================================
+-- AUTOPIC 생성 내역 - 요청당 1행 (generation_sets)
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 기존: 4분할 이미지마다 generations 1행 (요청당 4회 INSERT)
+-- 변경: generation_sets 1행에 4장 URL/모드/모델/프롬프트 버전/소요 시간/크레딧 저장
+-- 기존 generations 행은 그대로 두고, generation_images 뷰로 이미지 단위 조회 호환
+-- ============================================================================
+
+-- 1. generation_sets 테이블
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS generation_sets (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    -- 생성 설정
+    mode TEXT NOT NULL,
+    model_type TEXT NOT NULL,
+    model TEXT,
+    prompt_version TEXT,
+
+    -- 결과 (보관 기간 만료 시 image_urls만 NULL, image_count는 유지)
+    image_urls JSONB, -- ["https://.../0.jpg", ...] 분할 순서
+    image_count INTEGER NOT NULL DEFAULT 0,
+
+    -- 요청 전체 크레딧 (이미지별 분배는 뷰에서 계산)
+    credits_used INTEGER NOT NULL DEFAULT 0,
+
+    -- 소요 시간 {"generate_ms": ..., "upload_ms": ...}
+    timings JSONB,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_sets_user_created ON generation_sets(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_generation_sets_expiry
+    ON generation_sets(created_at)
+    WHERE image_urls IS NOT NULL;
+
+ALTER TABLE generation_sets ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own generation sets" ON generation_sets;
+DROP POLICY IF EXISTS "Service role can manage generation sets" ON generation_sets;
+
+CREATE POLICY "Users can view own generation sets" ON generation_sets
+    FOR SELECT USING (auth.uid() = user_id);
+
+CREATE POLICY "Service role can manage generation sets" ON generation_sets
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- 2. generation_images 뷰 (기존 generations 행 + generation_sets 이미지 단위 전개)
+-- ============================================================================
+-- id: 기존 행은 generations.id, 신규는 "{set_id}:{index}"
+-- credits_used: 요청 크레딧을 이미지 수로 나누고 나머지는 앞 이미지부터 1씩 (합계 일치)
+-- security_invoker: 조회하는 사용자 권한(RLS)으로 실행
+CREATE OR REPLACE VIEW generation_images
+WITH (security_invoker = true) AS
+SELECT
+    g.id::TEXT AS id,
+    NULL::UUID AS set_id,
+    0 AS image_index,
+    g.user_id,
+    g.generated_image_url,
+    g.mode,
+    g.model_type,
+    g.credits_used,
+    g.created_at
+FROM generations g
+UNION ALL
+SELECT
+    s.id::TEXT || ':' || idx AS id,
+    s.id AS set_id,
+    idx AS image_index,
+    s.user_id,
+    s.image_urls ->> idx AS generated_image_url,
+    s.mode,
+    s.model_type,
+    s.credits_used / s.image_count
+        + CASE WHEN idx < s.credits_used % s.image_count THEN 1 ELSE 0 END AS credits_used,
+    s.created_at
+FROM generation_sets s
+CROSS JOIN LATERAL generate_series(0, s.image_count - 1) AS idx;
+
+GRANT SELECT ON generation_images TO authenticated, service_role;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,43 @@
+-- ============================================================================
+-- AUTOPIC 정기 결제 갱신 체크포인트
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 구독 1건의 1개 기간 갱신 = 1행 (주문번호: renew_{구독 id}_{기간 종료일})
+-- 크론이 중간에 끊겨도 다시 실행하면 완료된 갱신은 건너뛰고,
+-- 결제 승인 후 기록이 끝나지 않은 갱신(charged)은 재결제 없이 마무리
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS subscription_renewals (
+    order_id TEXT PRIMARY KEY,
+    subscription_id UUID NOT NULL REFERENCES subscriptions(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'charged', 'completed', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+
+    -- 결제 정보
+    amount INTEGER NOT NULL,
+    new_period_end TIMESTAMP WITH TIME ZONE NOT NULL,
+    tid TEXT,
+    method TEXT,
+    error TEXT,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_subscription_renewals_open
+    ON subscription_renewals(status)
+    WHERE status IN ('pending', 'charged');
+
+-- 서비스 역할 전용
+ALTER TABLE subscription_renewals ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage subscription renewals" ON subscription_renewals;
+CREATE POLICY "Service role can manage subscription renewals" ON subscription_renewals
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,96 @@
+-- ============================================================================
+-- AUTOPIC 월간 구독 크레딧 리셋 - 서버 측 일괄 처리 RPC
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 구독자마다 4번(프로필/구독/히스토리/사용량) 왕복하던 처리를
+-- 청크(기본 1000명) 단위 한 트랜잭션으로 처리
+-- ============================================================================
+
+-- 1. subscription_history.event_type에 credit_reset 추가
+-- ============================================================================
+ALTER TABLE subscription_history DROP CONSTRAINT IF EXISTS subscription_history_event_type_check;
+ALTER TABLE subscription_history ADD CONSTRAINT subscription_history_event_type_check
+    CHECK (event_type IN (
+        'created', 'renewed', 'cancelled', 'expired',
+        'credits_granted', 'payment_success', 'payment_failed',
+        'plan_changed', 'reactivated', 'credit_reset'
+    ));
+
+CREATE INDEX IF NOT EXISTS idx_subscriptions_credit_reset
+    ON subscriptions(last_credit_granted_at)
+    WHERE status = 'active';
+
+
+-- 2. reset_subscription_credits_chunk(p_cutoff, p_limit)
+-- ============================================================================
+-- last_credit_granted_at < p_cutoff 인 활성 구독자 최대 p_limit명 리셋
+-- 반환: {"reset_count": N} - N < p_limit 이면 남은 대상 없음
+-- SKIP LOCKED: 동시에 실행돼도 같은 구독자를 두 번 리셋하지 않음
+CREATE OR REPLACE FUNCTION reset_subscription_credits_chunk(
+    p_cutoff TIMESTAMP WITH TIME ZONE,
+    p_limit INTEGER DEFAULT 1000
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    CREATE TEMP TABLE IF NOT EXISTS credit_reset_targets (
+        subscription_id UUID,
+        user_id UUID,
+        plan TEXT,
+        monthly_credits INTEGER,
+        previous_granted_at TIMESTAMP WITH TIME ZONE
+    ) ON COMMIT DROP;
+    TRUNCATE credit_reset_targets;
+
+    INSERT INTO credit_reset_targets
+    SELECT id, user_id, plan, COALESCE(monthly_credits, 100), last_credit_granted_at
+    FROM subscriptions
+    WHERE status = 'active'
+      AND last_credit_granted_at < p_cutoff
+    ORDER BY last_credit_granted_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    IF v_count = 0 THEN
+        RETURN jsonb_build_object('reset_count', 0);
+    END IF;
+
+    -- 기존 크레딧 → 월간 크레딧으로 리셋 (누적 아님)
+    UPDATE profiles p
+    SET credits = t.monthly_credits
+    FROM credit_reset_targets t
+    WHERE p.id = t.user_id;
+
+    UPDATE subscriptions s
+    SET last_credit_granted_at = NOW(),
+        credits_granted_this_period = t.monthly_credits
+    FROM credit_reset_targets t
+    WHERE s.id = t.subscription_id;
+
+    INSERT INTO subscription_history (subscription_id, user_id, event_type, plan, credits_granted, metadata)
+    SELECT subscription_id, user_id, 'credit_reset', plan, monthly_credits,
+           jsonb_build_object('previous_granted_at', previous_granted_at)
+    FROM credit_reset_targets;
+
+    INSERT INTO usages (user_id, action, credits_used, metadata)
+    SELECT user_id, 'subscription_credit_reset', -monthly_credits,
+           jsonb_build_object('subscription_id', subscription_id)
+    FROM credit_reset_targets;
+
+    RETURN jsonb_build_object('reset_count', v_count);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION reset_subscription_credits_chunk(TIMESTAMP WITH TIME ZONE, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION reset_subscription_credits_chunk(TIMESTAMP WITH TIME ZONE, INTEGER) TO service_role;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,47 @@
+-- ============================================================================
+-- AUTOPIC 유지보수 작업 (크론) - 백그라운드 실행 기록 + 단일 실행 잠금
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 작업 종류: expired_images, storage_reconcile, subscription_billing, credit_reset
+-- 같은 종류의 running 작업은 1개만 존재 (여러 워커/서버에서 동시에 등록해도 중복 실행 없음)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS maintenance_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job_type TEXT NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+    params JSONB,
+
+    -- 진행 상황 / 결과
+    progress JSONB,
+    result JSONB,
+    error TEXT,
+
+    -- 실행 중인 서버 (호스트:pid) / 생존 신호
+    locked_by TEXT,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- 단일 실행 잠금
+CREATE UNIQUE INDEX IF NOT EXISTS idx_maintenance_jobs_single_run
+    ON maintenance_jobs(job_type)
+    WHERE status = 'running';
+
+CREATE INDEX IF NOT EXISTS idx_maintenance_jobs_created ON maintenance_jobs(job_type, created_at DESC);
+
+-- 서비스 역할 전용
+ALTER TABLE maintenance_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage maintenance jobs" ON maintenance_jobs;
+CREATE POLICY "Service role can manage maintenance jobs" ON maintenance_jobs
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,24 @@
+-- ============================================================================
+-- AUTOPIC 정기 결제 갱신 - 결제 요청 중(charging) 상태 추가
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- pending → charging 전환에 성공한 작업만 결제 요청
+-- charging에서 멈춘 갱신은 나이스페이에 주문번호로 조회한 뒤 마무리하거나 다시 결제
+-- ============================================================================
+
+ALTER TABLE subscription_renewals
+    ADD COLUMN IF NOT EXISTS charging_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE subscription_renewals DROP CONSTRAINT IF EXISTS subscription_renewals_status_check;
+ALTER TABLE subscription_renewals ADD CONSTRAINT subscription_renewals_status_check
+    CHECK (status IN ('pending', 'charging', 'charged', 'completed', 'failed'));
+
+DROP INDEX IF EXISTS idx_subscription_renewals_open;
+CREATE INDEX IF NOT EXISTS idx_subscription_renewals_open
+    ON subscription_renewals(status)
+    WHERE status IN ('pending', 'charging', 'charged');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
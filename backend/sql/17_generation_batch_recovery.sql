@@ -0,0 +1,19 @@
+-- ============================================================================
+-- AUTOPIC 배치 생성 - 중단된 배치 복구용 heartbeat
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 처리 중인 서버가 주기적으로 heartbeat_at 갱신
+-- 갱신이 끊긴 배치는 다른 서버(또는 재시작한 서버)가 남은 아이템 실패 처리 + 환불
+-- ============================================================================
+
+ALTER TABLE generation_batch_jobs
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_generation_batch_jobs_open
+    ON generation_batch_jobs(heartbeat_at)
+    WHERE status IN ('queued', 'processing');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,46 @@
+-- ============================================================================
+-- AUTOPIC 이코노미 레인 - 제출한 Gemini 배치 기록
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 배치 이름 + 제출 키(해시) + 아이템별 배치 내 순서를 기록
+-- 서버가 재시작돼도 heartbeat가 끊긴 배치를 다른 서버가 이어받아 결과 반영
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS economy_batches (
+    name TEXT PRIMARY KEY,              -- Gemini 배치 작업 이름 (batches/...)
+    model TEXT NOT NULL,
+    key_fingerprint TEXT,               -- 제출한 API 키 식별자 (sha256 앞 16자리)
+    item_count INTEGER NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'completed', 'failed')),
+    locked_by TEXT,                     -- 폴링 중인 서버 인스턴스
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+
+    submitted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_economy_batches_running
+    ON economy_batches(heartbeat_at)
+    WHERE status = 'running';
+
+-- 아이템 → 배치 내 순서 매핑
+ALTER TABLE generation_batch_job_items
+    ADD COLUMN IF NOT EXISTS economy_batch_name TEXT,
+    ADD COLUMN IF NOT EXISTS economy_batch_index INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_generation_batch_job_items_economy
+    ON generation_batch_job_items(economy_batch_name)
+    WHERE economy_batch_name IS NOT NULL;
+
+-- 서비스 역할 전용
+ALTER TABLE economy_batches ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage economy batches" ON economy_batches;
+CREATE POLICY "Service role can manage economy batches" ON economy_batches
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,15 @@
+-- ============================================================================
+-- AUTOPIC 비디오 작업 큐 - 처리 서버 heartbeat
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 처리 중인 서버가 주기적으로 heartbeat_at 갱신
+-- 갱신이 끊긴 작업만 다른 서버(또는 재시작한 서버)가 이어받음 → 같은 작업 중복 제출 방지
+-- ============================================================================
+
+ALTER TABLE video_jobs
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
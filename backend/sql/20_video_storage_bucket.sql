@@ -0,0 +1,17 @@
+-- ============================================================================
+-- AUTOPIC 비디오 저장소 버킷
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 완성된 비디오/렌디션(poster, mobile, webm, hls) 저장용 비공개 버킷
+-- 파일은 서버(/api/video/download 등)를 통해서만 제공 → public = false
+-- VIDEO_STORAGE_BUCKET 환경변수로 이름을 바꿨다면 아래 'videos'도 같은 이름으로 변경
+-- ============================================================================
+
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('videos', 'videos', false)
+ON CONFLICT (id) DO NOTHING;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,16 @@
+-- ============================================================================
+-- AUTOPIC 만료 이미지 정리 - 날짜 범위 인덱스
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 날짜 폴더 삭제 후 해당 날짜 생성분 URL 정리를 created_at 범위로 조회
+-- (URL LIKE 전체 스캔 대신 인덱스 범위 스캔)
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_generations_created_with_url
+    ON generations(created_at)
+    WHERE generated_image_url IS NOT NULL;
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
@@ -0,0 +1,20 @@
+-- ============================================================================
+-- AUTOPIC 웹훅 전송 선점 (여러 서버 인스턴스 중복 전송 방지)
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 시도마다 locked_by/lease_until을 조건부 업데이트로 선점한 인스턴스만 전송
+-- 인스턴스가 죽으면 lease_until 만료 후 다른 인스턴스의 주기 점검에서 재시도
+-- ============================================================================
+
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS locked_by TEXT;
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS lease_until TIMESTAMP WITH TIME ZONE;
+
+-- 주기 점검: 대기 중 전송을 id 순으로 페이지 조회
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_pending_id
+    ON webhook_deliveries(id)
+    WHERE status = 'pending';
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
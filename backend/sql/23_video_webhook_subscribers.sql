@@ -0,0 +1,33 @@
+-- ============================================================================
+-- AUTOPIC 비디오 재사용 시 완료 웹훅 구독
+-- ============================================================================
+-- 실행: Supabase Dashboard > SQL Editor에서 실행
+-- 진행 중인 비디오를 다른 API 키가 재사용하면 여기에 등록 → 완료/실패 시 함께 웹훅 전송
+-- notified_at 조건부 업데이트로 키당 1회만 전송
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS video_webhook_subscribers (
+    video_id UUID NOT NULL REFERENCES video_generations(id) ON DELETE CASCADE,
+    api_key_id UUID NOT NULL REFERENCES api_keys(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+
+    notified_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    PRIMARY KEY (video_id, api_key_id)
+);
+
+
+-- RLS 정책 (서버 전용)
+-- ============================================================================
+ALTER TABLE video_webhook_subscribers ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can manage video webhook subscribers" ON video_webhook_subscribers;
+
+CREATE POLICY "Service role can manage video webhook subscribers" ON video_webhook_subscribers
+    FOR ALL USING (auth.role() = 'service_role');
+
+
+-- ============================================================================
+-- 완료!
+-- ============================================================================
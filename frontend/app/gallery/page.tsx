@@ -3,6 +3,7 @@
 import { useState, useEffect, useRef } from 'react';
 import Link from 'next/link';
 import Image from 'next/image';
+import { galleryImage, galleryVideo, type GalleryImage } from '@/lib/gallery';
 import Navbar from '@/components/Navbar';
 import Footer from '@/components/landing/Footer';
 import { 
@@ -33,8 +34,8 @@ function BeforeAfterSlider({
   afterImage, 
   categoryName 
 }: { 
-  beforeImage: string; 
-  afterImage: string;
+  beforeImage: GalleryImage; 
+  afterImage: GalleryImage;
   categoryName: string;
 }) {
   const [sliderPosition, setSliderPosition] = useState(50);
@@ -75,7 +76,9 @@ function BeforeAfterSlider({
       {/* After Image */}
       <div className="absolute inset-0">
         <Image
-          src={afterImage}
+          src={afterImage.src}
+          placeholder={afterImage.blurDataURL ? 'blur' : 'empty'}
+          blurDataURL={afterImage.blurDataURL}
           alt={`${categoryName} - AI`}
           fill
           className="object-cover pointer-events-none"
@@ -90,7 +93,9 @@ function BeforeAfterSlider({
         style={{ clipPath: `inset(0 ${100 - sliderPosition}% 0 0)` }}
       >
         <Image
-          src={beforeImage}
+          src={beforeImage.src}
+          placeholder={beforeImage.blurDataURL ? 'blur' : 'empty'}
+          blurDataURL={beforeImage.blurDataURL}
           alt={`${categoryName} - 원본`}
           fill
           className="object-cover pointer-events-none"
@@ -164,6 +169,8 @@ function CategoryShowcase({
   }, [isActive]);
 
   const generatedImages = [1, 2, 3, 4];
+  const thumbnails = generatedImages.map((imgIndex) => galleryImage(category.folder, imgIndex));
+  const video = galleryVideo(category.folder);
   const imageLabels = ['정면', '측면', '후면', '디테일'];
 
   if (!isActive) return null;
@@ -175,8 +182,8 @@ function CategoryShowcase({
         <div className="lg:col-span-5">
           <div className="sticky top-40">
             <BeforeAfterSlider
-              beforeImage={`/gallery/${category.folder}/0.png`}
-              afterImage={`/gallery/${category.folder}/${selectedImage}.png`}
+              beforeImage={galleryImage(category.folder, 0)}
+              afterImage={galleryImage(category.folder, selectedImage)}
               categoryName={category.name}
             />
             <p className="text-center text-zinc-400 text-sm mt-4">
@@ -205,7 +212,9 @@ function CategoryShowcase({
                   }`}
                 >
                   <Image
-                    src={`/gallery/${category.folder}/${imgIndex}.png`}
+                    src={thumbnails[imgIndex - 1].src}
+                    placeholder={thumbnails[imgIndex - 1].blurDataURL ? 'blur' : 'empty'}
+                    blurDataURL={thumbnails[imgIndex - 1].blurDataURL}
                     alt={`${category.name} ${imageLabels[imgIndex - 1]}`}
                     fill
                     className="object-cover"
@@ -237,7 +246,9 @@ function CategoryShowcase({
               {!videoError ? (
                 <video
                   ref={videoRef}
-                  src={`/gallery/${category.folder}/video.mp4`}
+                  src={video.src}
+                  poster={video.poster}
+                  preload="none"
                   className="w-full h-full object-contain"
                   loop
                   playsInline
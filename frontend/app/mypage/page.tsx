@@ -23,9 +23,11 @@ import toast from 'react-hot-toast';
 
 type TabType = 'overview' | 'generations' | 'credits' | 'settings';
 
+// generation_images 뷰 (기존 generations 행 + generation_sets 이미지 단위 전개)
 interface Generation {
   id: string;
-  source_image_url: string;
+  set_id: string | null; // 같은 요청에서 나온 이미지 묶음 (기존 행은 null)
+  image_index: number;
   generated_image_url: string;
   mode: string;
   model_type: string;
@@ -125,21 +127,28 @@ function groupIntoBatches(generations: Generation[]): ImageBatch[] {
   let currentMode = '';
   let currentTime = 0;
   
-  // 시간순 정렬 (오래된 것 먼저)
+  // 시간순 정렬 (오래된 것 먼저, 같은 요청은 분할 순서)
   const sorted = [...generations].sort((a, b) => 
-    new Date(a.created_at).getTime() - new Date(b.created_at).getTime()
+    new Date(a.created_at).getTime() - new Date(b.created_at).getTime() ||
+    a.image_index - b.image_index
   );
   
   for (const gen of sorted) {
     const genTime = new Date(gen.created_at).getTime();
+    const previous = currentBatch[0];
     
-    // 새 배치 시작 조건: 모드가 다르거나, 5초 이상 차이나거나, 4장 채움
-    if (
-      currentBatch.length === 0 ||
-      gen.mode !== currentMode ||
-      genTime - currentTime > 5000 ||
-      currentBatch.length >= 4
-    ) {
+    // 신규 내역은 set_id로 묶음
+    const sameSet = !!gen.set_id && gen.set_id === previous?.set_id;
+    // 기존 내역: 모드가 같고, 5초 이내, 4장 미만이면 같은 배치
+    const legacyContinues =
+      !gen.set_id &&
+      !!previous &&
+      !previous.set_id &&
+      gen.mode === currentMode &&
+      genTime - currentTime <= 5000 &&
+      currentBatch.length < 4;
+    
+    if (!sameSet && !legacyContinues) {
       // 이전 배치 저장
       if (currentBatch.length > 0) {
         batches.push({
@@ -471,7 +480,7 @@ export default function MyPage() {
       }
 
       const { data: generationsData } = await supabase
-        .from('generations')
+        .from('generation_images')
         .select('*')
         .eq('user_id', userId)
         .order('created_at', { ascending: false })
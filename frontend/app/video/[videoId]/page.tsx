@@ -29,6 +29,15 @@ export default function VideoSharePage() {
   const videoRef = useRef<HTMLVideoElement>(null);
   
   const videoUrl = `${API_URL}/api/video/download/${videoId}`;
+  const posterUrl = `${API_URL}/api/video/poster/${videoId}`;
+  // 모바일 화면에서는 480p 렌디션으로 재생 (다운로드는 원본)
+  const [playbackUrl, setPlaybackUrl] = useState(videoUrl);
+
+  useEffect(() => {
+    if (window.matchMedia('(max-width: 767px)').matches) {
+      setPlaybackUrl(`${videoUrl}?rendition=mobile`);
+    }
+  }, [videoUrl]);
 
   useEffect(() => {
     // 비디오 로드 확인
@@ -196,7 +205,9 @@ export default function VideoSharePage() {
             <div className="relative aspect-video bg-zinc-900 rounded-2xl overflow-hidden group shadow-2xl">
               <video
                 ref={videoRef}
-                src={videoUrl}
+                src={playbackUrl}
+                poster={posterUrl}
+                preload="metadata"
                 className="w-full h-full object-contain"
                 loop
                 playsInline
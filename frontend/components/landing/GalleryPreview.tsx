@@ -2,6 +2,7 @@
 
 import { useState, useRef, useEffect } from 'react';
 import Image from 'next/image';
+import { galleryImage, galleryVideo, type GalleryImage } from '@/lib/gallery';
 import Link from 'next/link';
 import { ArrowRight, Sparkles, Play, Pause, RotateCcw, Check, ImageIcon, Zap } from 'lucide-react';
 
@@ -19,8 +20,8 @@ function BeforeAfterSlider({
   afterImage, 
   categoryName 
 }: { 
-  beforeImage: string; 
-  afterImage: string;
+  beforeImage: GalleryImage; 
+  afterImage: GalleryImage;
   categoryName: string;
 }) {
   const [sliderPosition, setSliderPosition] = useState(50);
@@ -61,7 +62,9 @@ function BeforeAfterSlider({
       {/* After Image */}
       <div className="absolute inset-0 bg-gradient-to-br from-zinc-50 to-zinc-100">
         <Image
-          src={afterImage}
+          src={afterImage.src}
+          placeholder={afterImage.blurDataURL ? 'blur' : 'empty'}
+          blurDataURL={afterImage.blurDataURL}
           alt={`${categoryName} - AI`}
           fill
           className="object-contain pointer-events-none p-4"
@@ -76,7 +79,9 @@ function BeforeAfterSlider({
         style={{ clipPath: `inset(0 ${100 - sliderPosition}% 0 0)` }}
       >
         <Image
-          src={beforeImage}
+          src={beforeImage.src}
+          placeholder={beforeImage.blurDataURL ? 'blur' : 'empty'}
+          blurDataURL={beforeImage.blurDataURL}
           alt={`${categoryName} - 원본`}
           fill
           className="object-cover pointer-events-none"
@@ -150,6 +155,8 @@ function CategoryShowcase({
   }, [isActive]);
 
   const generatedImages = [1, 2, 3, 4];
+  const thumbnails = generatedImages.map((imgIndex) => galleryImage(category.folder, imgIndex));
+  const video = galleryVideo(category.folder);
   const imageLabels = ['정면', '측면', '후면', '디테일'];
 
   if (!isActive) return null;
@@ -160,8 +167,8 @@ function CategoryShowcase({
         {/* 좌측: 비포/애프터 슬라이더 */}
         <div className="lg:col-span-5">
           <BeforeAfterSlider
-            beforeImage={`/gallery/${category.folder}/0.png`}
-            afterImage={`/gallery/${category.folder}/${selectedImage}.png`}
+            beforeImage={galleryImage(category.folder, 0)}
+            afterImage={galleryImage(category.folder, selectedImage)}
             categoryName={category.name}
           />
           <p className="text-center text-zinc-400 text-sm mt-3">
@@ -189,7 +196,9 @@ function CategoryShowcase({
                   }`}
                 >
                   <Image
-                    src={`/gallery/${category.folder}/${imgIndex}.png`}
+                    src={thumbnails[imgIndex - 1].src}
+                    placeholder={thumbnails[imgIndex - 1].blurDataURL ? 'blur' : 'empty'}
+                    blurDataURL={thumbnails[imgIndex - 1].blurDataURL}
                     alt={`${category.name} ${imageLabels[imgIndex - 1]}`}
                     fill
                     className="object-contain bg-zinc-50 p-1"
@@ -221,7 +230,9 @@ function CategoryShowcase({
               {!videoError ? (
                 <video
                   ref={videoRef}
-                  src={`/gallery/${category.folder}/video.mp4`}
+                  src={video.src}
+                  poster={video.poster}
+                  preload="none"
                   className="w-full h-full object-contain"
                   loop
                   playsInline
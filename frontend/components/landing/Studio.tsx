@@ -141,6 +141,8 @@ export default function Studio() {
   const [target, setTarget] = useState<'fashion' | 'kids' | 'pet' | 'food'>('fashion');
   const [isGenerating, setIsGenerating] = useState(false);
   const [generatedImages, setGeneratedImages] = useState<string[]>([]);
+  // 서버에 저장된 생성 결과 URL (비디오 생성 시 이미지 재업로드 대신 사용)
+  const [generatedImageUrls, setGeneratedImageUrls] = useState<string[]>([]);
   const [selectedImageIndex, setSelectedImageIndex] = useState<number>(0);
   const [isDraggingMain, setIsDraggingMain] = useState(false);
   const [isDraggingSub, setIsDraggingSub] = useState(false);
@@ -410,6 +412,7 @@ export default function Studio() {
 
     setIsGenerating(true);
     setGeneratedImages([]);
+    setGeneratedImageUrls([]);
     setIsResultExpanded(true);
     resetZoom();
 
@@ -454,6 +457,7 @@ export default function Studio() {
 
       const images = data.images.map((img: string) => `data:image/jpeg;base64,${img}`);
       setGeneratedImages(images);
+      setGeneratedImageUrls(data.image_urls || []);
       setSelectedImageIndex(0);
       setBalance(data.remaining_credits);
       
@@ -620,14 +624,17 @@ export default function Studio() {
     setShowVideoModal(false);
 
     try {
-      const imageData = generatedImages.map(img => img.split(',')[1]);
+      // 저장된 이미지 URL이 모두 있으면 URL만 전달 (서버에서 직접 조회)
+      const sourceImages = generatedImageUrls.length === generatedImages.length
+        ? { image_urls: generatedImageUrls }
+        : { images: generatedImages.map(img => img.split(',')[1]) };
       
       const response = await fetch(`${API_URL}/api/video/generate`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           user_id: user.id,
-          images: imageData,
+          ...sourceImages,
         }),
       });
 
@@ -0,0 +1,44 @@
+// 갤러리 에셋 매니페스트 (video/build_gallery_assets.py 로 생성)
+// 항목이 없으면 원본 PNG/MP4로 폴백
+// 화면 크기별 AVIF/WebP 변환은 next/image가 담당 → 여기서는 최적화된 WebP 원본만 지정
+import manifest from '@/public/gallery/manifest.json';
+
+interface ManifestImage {
+  width: number;
+  height: number;
+  original: string;
+  src: string;
+  blurDataURL: string;
+}
+
+interface ManifestVideo {
+  src: string;
+  poster: string;
+  blurDataURL: string;
+}
+
+export interface GalleryImage {
+  src: string;
+  blurDataURL?: string;
+}
+
+export interface GalleryVideo {
+  src: string;
+  poster?: string;
+}
+
+const images = manifest.images as Record<string, ManifestImage>;
+const videos = manifest.videos as Record<string, ManifestVideo>;
+
+export function galleryImage(folder: string, index: number): GalleryImage {
+  const entry = images[`${folder}/${index}.png`];
+  if (!entry) {
+    return { src: `/gallery/${folder}/${index}.png` };
+  }
+  return { src: entry.src, blurDataURL: entry.blurDataURL };
+}
+
+export function galleryVideo(folder: string): GalleryVideo {
+  const entry = videos[`${folder}/video.mp4`];
+  return { src: `/gallery/${folder}/video.mp4`, poster: entry?.poster };
+}
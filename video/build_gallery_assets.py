@@ -0,0 +1,243 @@
+"""
+갤러리 정적 에셋 빌드 스크립트
+- frontend/public/gallery/{카테고리}/*.png → WebP (최대 1080px)
+  (화면 크기별 AVIF/WebP 변환은 next/image가 담당 → 원본 PNG 대신 가벼운 WebP를 원본으로 사용)
+- video.mp4 → 포스터 프레임 (WebP)
+- 크기/블러 플레이스홀더를 담은 manifest.json 생성 (GalleryPreview, 갤러리 페이지에서 사용)
+- 원본 해시 기준 증분 빌드 (변경된 파일만 다시 변환)
+
+갤러리 이미지/비디오를 바꾼 뒤 실행하고 _optimized 폴더와 manifest.json을 함께 커밋
+
+사용법:
+    python build_gallery_assets.py            # 변경분만 빌드
+    python build_gallery_assets.py --force    # 전체 다시 빌드
+
+필요: Pillow, ffmpeg (포스터 추출)
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from PIL import Image
+
+# ============================================
+# 설정
+# ============================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GALLERY_DIR = os.path.join(SCRIPT_DIR, "..", "frontend", "public", "gallery")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+OUTPUT_SUBDIR = "_optimized"
+PUBLIC_PREFIX = "/gallery"
+
+MAX_WIDTH = 1080
+WEBP_QUALITY = 80
+POSTER_QUALITY = 82
+POSTER_SECOND = 0.5
+BLUR_SIZE = 16
+
+# 설정이 바뀌면 전체 다시 빌드되도록 해시에 포함
+BUILD_SETTINGS = f"{MAX_WIDTH}|{WEBP_QUALITY}|{POSTER_QUALITY}|{POSTER_SECOND}|{BLUR_SIZE}"
+
+
+def file_hash(path):
+    digest = hashlib.sha256(BUILD_SETTINGS.encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def public_url(*parts):
+    return "/".join([PUBLIC_PREFIX, *parts])
+
+
+def blur_placeholder(img):
+    """아주 작은 WebP를 data URL로 (next/image placeholder="blur"용)"""
+    thumb = img.copy()
+    thumb.thumbnail((BLUR_SIZE, BLUR_SIZE))
+    buffer = io.BytesIO()
+    thumb.save(buffer, "WEBP", quality=40)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def build_image(source_path, category, output_dir):
+    """이미지 1장 → WebP (최대 MAX_WIDTH) + 메타데이터"""
+    name = os.path.splitext(os.path.basename(source_path))[0]
+
+    with Image.open(source_path) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        if img.width > MAX_WIDTH:
+            img = img.resize((MAX_WIDTH, round(img.height * MAX_WIDTH / img.width)), Image.LANCZOS)
+        width, height = img.size
+
+        filename = f"{name}.webp"
+        img.save(os.path.join(output_dir, filename), "WEBP", quality=WEBP_QUALITY, method=6)
+
+        return {
+            "width": width,
+            "height": height,
+            "original": public_url(category, os.path.basename(source_path)),
+            "src": public_url(category, OUTPUT_SUBDIR, filename),
+            "blurDataURL": blur_placeholder(img),
+        }
+
+
+def build_poster(video_path, category, output_dir):
+    """비디오 포스터 프레임 추출 (ffmpeg) → WebP"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        frame_path = os.path.join(temp_dir, "frame.png")
+        result = subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-ss", str(POSTER_SECOND), "-i", video_path,
+                "-frames:v", "1", frame_path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0 or not os.path.exists(frame_path):
+            raise RuntimeError(result.stderr.strip() or "프레임 추출 실패")
+
+        with Image.open(frame_path) as frame:
+            frame = frame.convert("RGB")
+            width, height = frame.size
+            frame.save(os.path.join(output_dir, "poster.webp"), "WEBP", quality=POSTER_QUALITY, method=6)
+            blur = blur_placeholder(frame)
+
+    return {
+        "width": width,
+        "height": height,
+        "src": public_url(category, os.path.basename(video_path)),
+        "poster": public_url(category, OUTPUT_SUBDIR, "poster.webp"),
+        "blurDataURL": blur,
+    }
+
+
+def outputs_exist(gallery_dir, entry):
+    """매니페스트 항목이 가리키는 파일이 모두 남아있는지"""
+    urls = [entry[k] for k in ("src", "poster") if k in entry and OUTPUT_SUBDIR in entry[k]]
+    for url in urls:
+        relative = url[len(PUBLIC_PREFIX) + 1:]
+        if not os.path.exists(os.path.join(gallery_dir, *relative.split("/"))):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="갤러리 이미지/포스터 최적화 빌드")
+    parser.add_argument("--gallery-dir", default=GALLERY_DIR)
+    parser.add_argument("--force", action="store_true", help="해시와 관계없이 전체 다시 빌드")
+    args = parser.parse_args()
+
+    gallery_dir = os.path.abspath(args.gallery_dir)
+    manifest_path = os.path.join(gallery_dir, MANIFEST_NAME)
+
+    print("\n" + "=" * 60)
+    print("🖼️  갤러리 에셋 빌드")
+    print("=" * 60)
+
+    if not os.path.exists(gallery_dir):
+        print(f"\n❌ 갤러리 폴더 없음: {gallery_dir}")
+        return
+
+    previous = {"images": {}, "videos": {}}
+    if os.path.exists(manifest_path) and not args.force:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        # 이전 형식 매니페스트는 재사용하지 않음
+        if previous.get("version") != MANIFEST_VERSION:
+            previous = {"images": {}, "videos": {}}
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("⚠️  ffmpeg 없음 → 포스터는 기존 항목 유지")
+
+    manifest = {"version": MANIFEST_VERSION, "images": {}, "videos": {}}
+    built = skipped = failed = 0
+    bytes_before = bytes_after = 0
+
+    for category in sorted(os.listdir(gallery_dir)):
+        category_path = os.path.join(gallery_dir, category)
+        if not os.path.isdir(category_path) or category.startswith(("_", ".")):
+            continue
+
+        output_dir = os.path.join(category_path, OUTPUT_SUBDIR)
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"\n📁 {category}")
+
+        for filename in sorted(os.listdir(category_path)):
+            source_path = os.path.join(category_path, filename)
+            key = f"{category}/{filename}"
+            lower = filename.lower()
+
+            if lower.endswith((".png", ".jpg", ".jpeg")):
+                section, builder = "images", lambda: build_image(source_path, category, output_dir)
+            elif lower.endswith(".mp4"):
+                section, builder = "videos", lambda: build_poster(source_path, category, output_dir)
+            else:
+                continue
+
+            source_hash = file_hash(source_path)
+            cached = previous.get(section, {}).get(key)
+            if cached and cached.get("hash") == source_hash and outputs_exist(gallery_dir, cached):
+                manifest[section][key] = cached
+                skipped += 1
+                continue
+
+            if section == "videos" and not has_ffmpeg:
+                if cached:
+                    manifest[section][key] = cached
+                continue
+
+            try:
+                entry = builder()
+            except Exception as e:
+                print(f"   ❌ {filename}: {e}")
+                if cached:
+                    manifest[section][key] = cached
+                failed += 1
+                continue
+
+            entry["hash"] = source_hash
+            manifest[section][key] = entry
+            built += 1
+
+            if section == "images":
+                optimized = entry["src"][len(PUBLIC_PREFIX) + 1:]
+                before = os.path.getsize(source_path)
+                after = os.path.getsize(os.path.join(gallery_dir, *optimized.split("/")))
+                bytes_before += before
+                bytes_after += after
+                print(f"   ✅ {filename}: {before // 1024}KB → {after // 1024}KB (webp {entry['width']}w)")
+            else:
+                print(f"   ✅ {filename}: 포스터 생성")
+
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(temp_path, manifest_path)
+
+    print("\n" + "=" * 60)
+    print("📊 결과")
+    print("=" * 60)
+    print(f"   빌드: {built}개 / 스킵(변경 없음): {skipped}개 / 실패: {failed}개")
+    if bytes_before:
+        saved = 100 - bytes_after * 100 // bytes_before
+        print(f"   이미지 용량: {bytes_before // 1024}KB → {bytes_after // 1024}KB ({saved}% 절감)")
+    print(f"   매니페스트: {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,288 +1,370 @@
 """
 갤러리 비디오 일괄 생성 스크립트
-- 각 카테고리 폴더의 생성 이미지로 360° 비디오 생성
+- 각 카테고리 폴더의 생성 이미지(1.png~3.png)로 360° 비디오 생성
 - 생성된 비디오는 각 폴더에 video.mp4로 저장
+- 여러 카테고리를 동시에 제출 (--concurrency), 전체 소요 시간 ≈ 비디오 1개 생성 시간
+- 재개용 매니페스트에 카테고리별 작업 ID/입력 해시 기록
+  - 입력 이미지가 바뀌지 않았고 비디오가 있으면 스킵
+  - 중단된 작업은 다시 실행하면 같은 Veo 작업에 재연결 (재과금 없음)
+
+사용법:
+    python generate_gallery_videos.py                  # 변경된 카테고리만 생성
+    python generate_gallery_videos.py BAG SHOES        # 지정 카테고리만
+    python generate_gallery_videos.py --force --yes    # 전부 다시 생성, 확인 생략
+
+환경변수:
+    GCP_SERVICE_ACCOUNT_JSON  서비스 계정 파일 경로 또는 JSON 문자열 (없으면 기본 인증)
+    GCP_PROJECT_ID, GCP_LOCATION
 """
 
+import argparse
+import asyncio
+import hashlib
+import json
 import os
 import time
 from datetime import datetime
 
+from google import genai
+from google.genai.types import (
+    GenerateVideosConfig,
+    GenerateVideosOperation,
+    Image,
+    VideoGenerationReferenceImage,
+)
+
 # ============================================
 # 설정
 # ============================================
-SERVICE_ACCOUNT_FILE = r"C:\Users\Nam\Desktop\autopic-web\video\gen-lang-client-0839670658-2b0742ad86db.json"
-PROJECT_ID = "gen-lang-client-0839670658"
-LOCATION = "us-central1"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROJECT_ID = os.getenv("GCP_PROJECT_ID", "gen-lang-client-0839670658")
+LOCATION = os.getenv("GCP_LOCATION", "us-central1")
+SERVICE_ACCOUNT_JSON = os.getenv("GCP_SERVICE_ACCOUNT_JSON", "")
 
 # 갤러리 폴더 경로
-GALLERY_DIR = r"C:\Users\Nam\Desktop\autopic-web\frontend\public\gallery"
+GALLERY_DIR = os.path.join(SCRIPT_DIR, "..", "frontend", "public", "gallery")
 
-# 처리할 카테고리 목록
+# 재개용 매니페스트
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, "gallery_videos_manifest.json")
+
+# 처리할 카테고리 목록 (frontend/public/gallery 폴더명)
 CATEGORIES = [
-    "가방",
-    "신발", 
-    "시계",
-    "의류",
-    "쥬얼리",
-    "키즈",
-    "패션잡화"
+    "ACCESSORY",
+    "BAG",
+    "CLOTHING",
+    "JEWELRY",
+    "KIDS",
+    "SHOES",
+    "WATCH",
 ]
 
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = SERVICE_ACCOUNT_FILE
-os.environ["GOOGLE_CLOUD_PROJECT"] = PROJECT_ID
-os.environ["GOOGLE_CLOUD_LOCATION"] = LOCATION
-os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
+MODEL = "veo-3.1-generate-preview"
+DURATION_SECONDS = 8
+COST_PER_SECOND = 0.40  # USD
+KRW_PER_USD = 1400
+POLL_SECONDS = 10
 
-from google import genai
-from google.genai.types import GenerateVideosConfig, Image, VideoGenerationReferenceImage
+# 360° 회전 비디오 프롬프트 (바뀌면 입력 해시도 바뀌어 다시 생성)
+PROMPT = """
+Create a smooth 360-degree product rotation video.
+
+REFERENCE IMAGES:
+- Image 1: FRONT view
+- Image 2: SIDE view
+- Image 3: BACK view
+
+SMOOTH TRANSITION - CRITICAL:
+- NO sudden jumps, cuts, or instant changes between frames
+- Smooth continuous motion throughout the ENTIRE video
+- Each frame must blend naturally and gradually into the next
+- Constant rotation speed - no acceleration, no deceleration, no pauses
+- The product must morph smoothly between angles
+- Like a real turntable rotating at constant speed
+
+ROTATION:
+- Rotate CLOCKWISE only (one direction)
+- Complete exactly ONE full 360-degree rotation
+- 0s: Front → 2s: Side → 4s: Back → 6s: Other side → 8s: Front
+
+REQUIREMENTS:
+- Show ONE product only
+- Pure white background (#FFFFFF)
+- Product stays centered
+- Consistent lighting throughout
+- No morphing of product shape - only rotation
+- Maintain all product details accurately
+"""
+
+
+def create_client():
+    """Vertex AI 클라이언트 (환경변수 변경 없이 명시적 설정)"""
+    credentials = None
+    if SERVICE_ACCOUNT_JSON:
+        from google.oauth2 import service_account
+
+        scopes = ["https://www.googleapis.com/auth/cloud-platform"]
+        if os.path.exists(SERVICE_ACCOUNT_JSON):
+            credentials = service_account.Credentials.from_service_account_file(
+                SERVICE_ACCOUNT_JSON, scopes=scopes
+            )
+        else:
+            credentials = service_account.Credentials.from_service_account_info(
+                json.loads(SERVICE_ACCOUNT_JSON), scopes=scopes
+            )
+    return genai.Client(
+        vertexai=True, project=PROJECT_ID, location=LOCATION, credentials=credentials
+    )
+
+
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
 
 
-def load_image_bytes(image_path):
-    """이미지 파일을 바이트로 로드"""
-    with open(image_path, "rb") as f:
-        return f.read()
+def save_manifest(manifest):
+    temp_path = f"{MANIFEST_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, MANIFEST_PATH)
 
 
 def get_category_images(category_path):
     """카테고리 폴더에서 생성된 이미지 3장 가져오기 (1.png, 2.png, 3.png)"""
     images = []
-    
-    # 모든 카테고리 동일: 1.png, 2.png, 3.png 사용
     for i in range(1, 4):
         img_path = os.path.join(category_path, f"{i}.png")
         if os.path.exists(img_path):
             images.append(img_path)
-    
     return images
 
 
-def generate_video(image_paths, output_path, category_name, duration_seconds=8):
-    """360° 회전 비디오 생성"""
-    
-    print(f"\n{'─'*60}")
-    print(f"🎬 [{category_name}] 비디오 생성 시작")
-    print(f"{'─'*60}")
-    
-    if len(image_paths) < 3:
-        print(f"   ❌ 이미지가 3장 미만입니다. (현재 {len(image_paths)}장)")
-        return False
-    
-    cost = duration_seconds * 0.40
-    print(f"   📷 입력 이미지: {len(image_paths)}장")
-    for i, p in enumerate(image_paths):
-        print(f"      {i+1}. {os.path.basename(p)}")
-    print(f"   ⏱️  길이: {duration_seconds}초")
-    print(f"   💰 예상 비용: ${cost:.2f} (~{int(cost * 1400)}원)")
-    
-    start_time = time.time()
-    
-    print(f"\n   🔑 클라이언트 초기화 중...")
-    client = genai.Client(vertexai=True, project=PROJECT_ID, location=LOCATION)
-    print(f"   ✅ 클라이언트 준비 완료")
-    
-    print(f"   📤 이미지 로드 중...")
-    images_data = []
+def hash_inputs(image_paths):
+    """입력 이미지 + 프롬프트 + 모델 해시 (변경 감지용)"""
+    digest = hashlib.sha256()
+    digest.update(MODEL.encode())
+    digest.update(PROMPT.strip().encode())
+    for path in image_paths:
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def format_elapsed(seconds):
+    mins, secs = divmod(int(seconds), 60)
+    return f"{mins}분 {secs}초" if mins else f"{secs}초"
+
+
+def video_cost():
+    return DURATION_SECONDS * COST_PER_SECOND
+
+
+async def submit_video(client, image_paths):
+    reference_images = []
     for path in image_paths[:3]:
-        img_bytes = load_image_bytes(path)
-        images_data.append(img_bytes)
-        print(f"      ✅ {os.path.basename(path)} ({len(img_bytes):,} bytes)")
-    
-    # 360° 회전 비디오 프롬프트
-    prompt = """
-    Create a smooth 360-degree product rotation video.
-    
-    REFERENCE IMAGES:
-    - Image 1: FRONT view
-    - Image 2: SIDE view  
-    - Image 3: BACK view
-    
-    SMOOTH TRANSITION - CRITICAL:
-    - NO sudden jumps, cuts, or instant changes between frames
-    - Smooth continuous motion throughout the ENTIRE video
-    - Each frame must blend naturally and gradually into the next
-    - Constant rotation speed - no acceleration, no deceleration, no pauses
-    - The product must morph smoothly between angles
-    - Like a real turntable rotating at constant speed
-    
-    ROTATION:
-    - Rotate CLOCKWISE only (one direction)
-    - Complete exactly ONE full 360-degree rotation
-    - 0s: Front → 2s: Side → 4s: Back → 6s: Other side → 8s: Front
-    
-    REQUIREMENTS:
-    - Show ONE product only
-    - Pure white background (#FFFFFF)
-    - Product stays centered
-    - Consistent lighting throughout
-    - No morphing of product shape - only rotation
-    - Maintain all product details accurately
-    """
-
-    print(f"\n   🚀 비디오 생성 요청 중...")
-    
-    try:
-        reference_images = []
-        
-        for i, img_bytes in enumerate(images_data):
-            ref_img = VideoGenerationReferenceImage(
-                image=Image(
-                    image_bytes=img_bytes,
-                    mime_type="image/png"
-                ),
-                reference_type="asset"
+        with open(path, "rb") as f:
+            img_bytes = f.read()
+        reference_images.append(
+            VideoGenerationReferenceImage(
+                image=Image(image_bytes=img_bytes, mime_type="image/png"),
+                reference_type="asset",
             )
-            reference_images.append(ref_img)
-        
-        operation = client.models.generate_videos(
-            model="veo-3.1-generate-preview",
-            prompt=prompt.strip(),
-            config=GenerateVideosConfig(
-                reference_images=reference_images,
-                aspect_ratio="16:9",
-                number_of_videos=1,
-                duration_seconds=duration_seconds,
-            ),
         )
-        
-        print(f"   ✅ 작업 시작됨!")
-        print(f"   ⏳ 생성 중... (약 2-5분 소요)")
-        
-        attempt = 0
-        while not operation.done:
-            attempt += 1
-            elapsed = attempt * 15
-            mins = elapsed // 60
-            secs = elapsed % 60
-            if mins > 0:
-                print(f"   ⏳ 생성 중... ({mins}분 {secs}초 경과)", end="\r")
-            else:
-                print(f"   ⏳ 생성 중... ({secs}초 경과)", end="\r")
-            time.sleep(15)
-            operation = client.operations.get(operation)
-        
-        total_elapsed = time.time() - start_time
-        mins = int(total_elapsed // 60)
-        secs = int(total_elapsed % 60)
-        print(f"\n   ✅ 작업 완료! ({mins}분 {secs}초)")
-        
-        if operation.result and operation.result.generated_videos:
-            video = operation.result.generated_videos[0]
-            
-            if video.video and video.video.video_bytes:
-                with open(output_path, "wb") as f:
-                    f.write(video.video.video_bytes)
-                print(f"   💾 저장됨: {output_path}")
-                return True
-            elif video.video and video.video.uri:
-                print(f"   📍 GCS URI: {video.video.uri}")
-                print(f"   ⚠️  video_bytes 없음 - GCS에서 다운로드 필요")
-                return False
+
+    return await client.aio.models.generate_videos(
+        model=MODEL,
+        prompt=PROMPT.strip(),
+        config=GenerateVideosConfig(
+            reference_images=reference_images,
+            aspect_ratio="16:9",
+            number_of_videos=1,
+            duration_seconds=DURATION_SECONDS,
+        ),
+    )
+
+
+async def process_category(client, semaphore, manifest, category, category_path, images, input_hash):
+    """카테고리 1개 처리 (제출 또는 재연결 → 완료 대기 → 저장)"""
+    entry = manifest.get(category, {})
+    output_path = os.path.join(category_path, "video.mp4")
+
+    async with semaphore:
+        start_time = time.time()
+        try:
+            if entry.get("status") == "submitted" and entry.get("input_hash") == input_hash:
+                # 이전 실행에서 제출된 작업에 재연결
+                operation = GenerateVideosOperation(name=entry["operation_name"])
+                print(f"   🔗 [{category}] 기존 작업에 재연결: {entry['operation_name']}")
             else:
-                print(f"   ❌ video_bytes/uri 없음")
-                return False
-        else:
-            print(f"   ❌ 결과 없음")
-            return False
-            
-    except Exception as e:
-        print(f"\n   ❌ 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+                operation = await submit_video(client, images)
+                entry = {
+                    "status": "submitted",
+                    "input_hash": input_hash,
+                    "operation_name": operation.name,
+                    "submitted_at": datetime.now().isoformat(),
+                }
+                manifest[category] = entry
+                save_manifest(manifest)
+                print(f"   🚀 [{category}] 제출됨: {operation.name}")
+
+            while not operation.done:
+                await asyncio.sleep(POLL_SECONDS)
+                operation = await client.aio.operations.get(operation)
+
+            elapsed = time.time() - start_time
+
+            video = None
+            if operation.result and operation.result.generated_videos:
+                video = operation.result.generated_videos[0]
+
+            if not (video and video.video and video.video.video_bytes):
+                error = str(operation.error) if operation.error else "결과 없음"
+                entry.update({"status": "failed", "error": error})
+                save_manifest(manifest)
+                print(f"   ❌ [{category}] 실패: {error}")
+                return category, False, elapsed
+
+            temp_path = f"{output_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(video.video.video_bytes)
+            os.replace(temp_path, output_path)
+
+            entry.update(
+                {
+                    "status": "completed",
+                    "completed_at": datetime.now().isoformat(),
+                    "elapsed_seconds": round(elapsed, 1),
+                    "cost_usd": video_cost(),
+                }
+            )
+            entry.pop("error", None)
+            save_manifest(manifest)
+            print(f"   ✅ [{category}] 완료 ({format_elapsed(elapsed)}) → {output_path}")
+            return category, True, elapsed
+
+        except Exception as e:
+            elapsed = time.time() - start_time
+            # 제출 후 오류(네트워크 등)는 submitted 상태 유지 → 다음 실행 시 재연결
+            print(f"   ❌ [{category}] 오류: {e}")
+            return category, False, elapsed
+
+
+async def run(categories_to_process, concurrency):
+    client = create_client()
+    manifest = load_manifest()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    started = time.time()
+    results = await asyncio.gather(
+        *[
+            process_category(client, semaphore, manifest, *item)
+            for item in categories_to_process
+        ]
+    )
+    return results, time.time() - started
 
 
 def main():
-    print("\n" + "="*60)
+    parser = argparse.ArgumentParser(description="갤러리 360° 비디오 일괄 생성")
+    parser.add_argument("categories", nargs="*", help="처리할 카테고리 (기본: 전체)")
+    parser.add_argument("--gallery-dir", default=GALLERY_DIR)
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 제출 수")
+    parser.add_argument("--force", action="store_true", help="변경 여부와 관계없이 다시 생성")
+    parser.add_argument("--yes", action="store_true", help="확인 없이 진행")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
     print("🚀 갤러리 비디오 일괄 생성")
-    print("="*60)
-    
-    # 서비스 계정 확인
-    if not os.path.exists(SERVICE_ACCOUNT_FILE):
-        print(f"\n❌ 서비스 계정 파일 없음: {SERVICE_ACCOUNT_FILE}")
-        return
-    print("\n✅ 서비스 계정 파일 확인됨")
-    
-    # 갤러리 폴더 확인
-    if not os.path.exists(GALLERY_DIR):
-        print(f"\n❌ 갤러리 폴더 없음: {GALLERY_DIR}")
+    print("=" * 60)
+
+    gallery_dir = os.path.abspath(args.gallery_dir)
+    if not os.path.exists(gallery_dir):
+        print(f"\n❌ 갤러리 폴더 없음: {gallery_dir}")
         return
-    print(f"✅ 갤러리 폴더 확인됨: {GALLERY_DIR}")
-    
+    print(f"✅ 갤러리 폴더 확인됨: {gallery_dir}")
+
+    manifest = load_manifest()
+
     # 카테고리별 상태 확인
     print("\n📁 카테고리 상태:")
     categories_to_process = []
-    
-    for category in CATEGORIES:
-        category_path = os.path.join(GALLERY_DIR, category)
+
+    for category in args.categories or CATEGORIES:
+        category_path = os.path.join(gallery_dir, category)
         video_path = os.path.join(category_path, "video.mp4")
-        
+
         if not os.path.exists(category_path):
             print(f"   ❌ {category}: 폴더 없음")
             continue
-        
+
         images = get_category_images(category_path)
-        has_video = os.path.exists(video_path)
-        
-        if has_video:
-            print(f"   ✅ {category}: 이미지 {len(images)}장, 비디오 있음 (스킵)")
-        elif len(images) >= 3:
-            print(f"   🎯 {category}: 이미지 {len(images)}장, 비디오 없음 → 생성 필요")
-            categories_to_process.append((category, category_path, images))
-        else:
+        if len(images) < 3:
             print(f"   ⚠️  {category}: 이미지 {len(images)}장 (3장 미만, 스킵)")
-    
+            continue
+
+        input_hash = hash_inputs(images)
+        entry = manifest.get(category, {})
+        unchanged = entry.get("input_hash") == input_hash
+
+        if not args.force and unchanged and entry.get("status") == "completed" and os.path.exists(video_path):
+            print(f"   ✅ {category}: 입력 변경 없음, 비디오 있음 (스킵)")
+            continue
+        if not args.force and unchanged and entry.get("status") == "submitted":
+            print(f"   🔗 {category}: 진행 중이던 작업 재연결 (추가 비용 없음)")
+        else:
+            print(f"   🎯 {category}: 생성 필요")
+        categories_to_process.append((category, category_path, images, input_hash))
+
     if not categories_to_process:
-        print("\n✅ 모든 카테고리에 비디오가 있거나, 생성 가능한 카테고리가 없습니다.")
-        return
-    
-    # 비용 계산
-    total_cost = len(categories_to_process) * 8 * 0.40
-    print(f"\n💰 예상 총 비용: ${total_cost:.2f} (~{int(total_cost * 1400)}원)")
-    print(f"   - {len(categories_to_process)}개 카테고리 × 8초 × $0.40/초")
-    
-    # 처리할 카테고리 목록
-    print(f"\n📋 처리할 카테고리:")
-    for i, (name, _, _) in enumerate(categories_to_process, 1):
-        print(f"   {i}. {name}")
-    
-    # 확인
-    confirm = input("\n진행하시겠습니까? (y/n): ").strip().lower()
-    if confirm != 'y':
-        print("취소됨")
+        print("\n✅ 모든 카테고리가 최신 상태입니다.")
         return
-    
-    # 비디오 생성
-    results = []
-    for i, (category, category_path, images) in enumerate(categories_to_process, 1):
-        print(f"\n\n{'='*60}")
-        print(f"📦 [{i}/{len(categories_to_process)}] {category} 처리 중...")
-        print(f"{'='*60}")
-        
-        video_path = os.path.join(category_path, "video.mp4")
-        success = generate_video(images, video_path, category)
-        results.append((category, success))
-        
-        # 다음 카테고리 전에 잠시 대기 (API 제한 방지)
-        if i < len(categories_to_process):
-            print(f"\n   ⏸️  다음 카테고리 처리 전 10초 대기...")
-            time.sleep(10)
-    
+
+    # 비용 계산 (재연결 작업은 이미 과금됨)
+    new_count = sum(
+        1
+        for category, _, _, input_hash in categories_to_process
+        if args.force
+        or manifest.get(category, {}).get("status") != "submitted"
+        or manifest.get(category, {}).get("input_hash") != input_hash
+    )
+    total_cost = new_count * video_cost()
+    print(f"\n💰 예상 추가 비용: ${total_cost:.2f} (~{int(total_cost * KRW_PER_USD)}원)")
+    print(f"   - 신규 {new_count}개 × {DURATION_SECONDS}초 × ${COST_PER_SECOND:.2f}/초")
+    print(f"   - 동시 제출: {args.concurrency}개")
+
+    if not args.yes:
+        confirm = input("\n진행하시겠습니까? (y/n): ").strip().lower()
+        if confirm != "y":
+            print("취소됨")
+            return
+
+    # 확인 후에만 기존 기록 삭제 (취소 시 진행 중 작업의 operation_name 유지)
+    if args.force:
+        for category, *_ in categories_to_process:
+            manifest.pop(category, None)
+        save_manifest(manifest)
+
+    results, wall_time = asyncio.run(run(categories_to_process, max(1, args.concurrency)))
+
     # 최종 결과
-    print("\n\n" + "="*60)
+    print("\n\n" + "=" * 60)
     print("📊 최종 결과")
-    print("="*60)
-    
-    success_count = sum(1 for _, s in results if s)
-    fail_count = len(results) - success_count
-    
-    for category, success in results:
+    print("=" * 60)
+
+    success_count = 0
+    render_time = 0.0
+    for category, success, elapsed in results:
         status = "✅ 성공" if success else "❌ 실패"
-        print(f"   {category}: {status}")
-    
+        print(f"   {category}: {status} ({format_elapsed(elapsed)})")
+        success_count += 1 if success else 0
+        render_time += elapsed
+
     print(f"\n   성공: {success_count}개")
-    print(f"   실패: {fail_count}개")
-    print(f"   총 비용: ${success_count * 8 * 0.40:.2f}")
+    print(f"   실패: {len(results) - success_count}개")
+    print(f"   전체 소요 시간: {format_elapsed(wall_time)} (개별 합계 {format_elapsed(render_time)})")
+    print(f"   이번 실행 비용: ${new_count * video_cost():.2f}")
 
 
 if __name__ == "__main__":